@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0003_alter_studentchange_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentchange',
+            index=models.Index(fields=['created_at', 'id'], name='schg_created_id_idx'),
+        ),
+    ]
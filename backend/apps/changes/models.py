@@ -51,6 +51,7 @@ class StudentChange(BaseModel):
         indexes = [
             models.Index(fields=["student", "type", "status"], name="schg_student_type_status_idx"),
             models.Index(fields=["effective_date"], name="schg_effective_date_idx"),
+            models.Index(fields=["created_at", "id"], name="schg_created_id_idx"),
         ]
         verbose_name = "学籍异动"
         verbose_name_plural = "学籍异动"
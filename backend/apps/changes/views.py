@@ -6,6 +6,7 @@ from rest_framework.response import Response
 
 from apps.changes.models import StudentChange
 from apps.changes.serializers import StudentChangeSerializer, StudentChangeListSerializer
+from apps.common.pagination import KeysetPagination
 from apps.students.models import Student
 
 
@@ -13,6 +14,7 @@ class StudentChangeViewSet(viewsets.ModelViewSet):
     queryset = StudentChange.objects.select_related("student", "student__current_class").all()
     serializer_class = StudentChangeSerializer
     ordering = ["-created_at"]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -0,0 +1,98 @@
+"""首页仪表盘统计。
+
+所有分布均由分组 values().annotate(Count()) 查询得到，不受分页上限影响；
+结果按 (学期, 日期, 教学周) 短时缓存（DASHBOARD_CACHE_TIMEOUT，默认 60 秒）。
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.common.models import AcademicSetting
+from apps.courses.models import Course
+from apps.schools.models import Class
+from apps.students.models import Student
+from apps.teachers.models import Teacher
+from apps.timetable.models import Lesson
+from apps.timetable.weeks import filter_by_week
+
+
+# 年级展示顺序，未列出的年级按名称排在最后
+GRADE_ORDER = ["一年级", "二年级", "三年级", "四年级", "五年级", "六年级", "初一", "初二", "初三", "高一", "高二", "高三"]
+
+# 班级人数分布只返回人数最多的前 N 个班级
+TOP_CLASSES = 10
+
+
+def _timeout() -> int:
+    return getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60)
+
+
+def _grade_sort_key(name: str):
+    return (GRADE_ORDER.index(name), "") if name in GRADE_ORDER else (len(GRADE_ORDER), name)
+
+
+def compute_dashboard_stats(term: str, day_of_week: int, week=None) -> dict:
+    students = Student.objects.filter(deleted_at__isnull=True)
+    classes = Class.objects.filter(deleted_at__isnull=True)
+    # 与班级列表的人数口径一致：统计未软删除学生
+    class_count = Count("students", filter=Q(students__deleted_at__isnull=True))
+
+    student_status = [
+        {"status": row["status"] or "在校", "count": row["count"]}
+        for row in students.values("status").annotate(count=Count("id")).order_by("-count", "status")
+    ]
+    teacher_status = [
+        {"status": row["employment_status"] or "在职", "count": row["count"]}
+        for row in Teacher.objects.values("employment_status").annotate(count=Count("id")).order_by("-count", "employment_status")
+    ]
+    course_types = [
+        {"category": row["category"] or "必修", "count": row["count"]}
+        for row in Course.objects.values("category").annotate(count=Count("id")).order_by("-count", "category")
+    ]
+    top_classes = [
+        {"classId": str(row["id"]), "className": row["name"], "studentCount": row["student_count"]}
+        for row in classes.values("id", "name").annotate(student_count=class_count).order_by("-student_count", "name")[:TOP_CLASSES]
+    ]
+    grades = sorted(
+        (
+            {"gradeName": row["grade__name"] or "未知年级", "studentCount": row["student_count"]}
+            for row in classes.values("grade__name").annotate(student_count=class_count).order_by()
+        ),
+        key=lambda g: _grade_sort_key(g["gradeName"]),
+    )
+
+    lessons = Lesson.objects.filter(term=term, day_of_week=day_of_week)
+    lessons = filter_by_week(lessons, week)
+
+    return {
+        # 学生总数与学生列表默认口径一致：不含已转出
+        "totalStudents": sum(s["count"] for s in student_status if s["status"] != "转学"),
+        "totalTeachers": sum(t["count"] for t in teacher_status),
+        "totalClasses": classes.count(),
+        "totalCourses": sum(c["count"] for c in course_types),
+        "studentStatusDistribution": student_status,
+        "teacherStatusDistribution": teacher_status,
+        "classStudentDistribution": top_classes,
+        "gradeDistribution": grades,
+        "courseTypeDistribution": course_types,
+        "todayLessonsCount": lessons.count(),
+        "term": term,
+        "dayOfWeek": day_of_week,
+        "generatedAt": timezone.now().isoformat(),
+    }
+
+
+def dashboard_stats(week=None, refresh: bool = False) -> dict:
+    """当前学期、今天的仪表盘统计（带短时缓存）。"""
+    term = AcademicSetting.get_or_create_default().current_term
+    day_of_week = timezone.localdate().isoweekday()
+    key = f"dashboard:stats:{term}:{day_of_week}:{week or ''}"
+    if not refresh:
+        data = cache.get(key)
+        if data is not None:
+            return data
+    data = compute_dashboard_stats(term, day_of_week, week)
+    cache.set(key, data, _timeout())
+    return data
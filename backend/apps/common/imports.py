@@ -0,0 +1,91 @@
+"""导入公共工具：编码回退、致命错误类型与进度回调约定。
+
+各业务模块的 importers.run_import(raw, filename, params, progress=None) 返回：
+    {"data": {...接口原有返回...}, "errors": [{"row": n, "message": "..."}], "rows": 处理行数}
+progress 为可选回调 progress(processed, total)，供异步任务上报进度。
+
+params 带 dry_run=True 时只执行解析与匹配（少量 IN 查询 + 内存索引），不写库，
+data 为 dry_run_result() 的预检结果：将新增/更新/拒绝的行数与前 max_errors 条错误。
+"""
+
+CSV_ENCODINGS = ("utf-8-sig", "utf-8", "gbk", "gb18030", "cp936")
+
+# 每处理多少行回调一次进度
+PROGRESS_EVERY = 200
+
+# 预检（dry_run）默认返回的错误条数及上限
+DRY_RUN_MAX_ERRORS = 50
+DRY_RUN_MAX_ERRORS_LIMIT = 500
+
+
+class ImportFailed(Exception):
+    """导入无法继续（文件无法解码、关联对象不存在等），由视图或任务转换为错误响应。"""
+
+    def __init__(self, code: str, message: str, status: int = 400, details=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+        self.details = details
+
+
+def decode_upload(raw: bytes, message: str = "文件解码失败，建议使用 UTF-8 或 GBK 保存") -> str:
+    for enc in CSV_ENCODINGS:
+        try:
+            return raw.decode(enc)
+        except Exception:
+            continue
+    raise ImportFailed("INVALID_FILE", message)
+
+
+def report_progress(progress, processed: int, total=None, force: bool = False) -> None:
+    if progress is None:
+        return
+    if force or processed % PROGRESS_EVERY == 0:
+        progress(processed, total)
+
+
+def _truthy(value) -> bool:
+    return str(value or "").lower() in {"1", "true", "yes"}
+
+
+def request_flag(request, name: str) -> bool:
+    """表单或查询参数中的布尔开关（1/true/yes）。"""
+    data = getattr(request, "data", None) or {}
+    return _truthy(data.get(name) or request.query_params.get(name))
+
+
+def dry_run_params(request) -> dict:
+    """请求带 dry_run=true 时返回 {"dry_run": True, "max_errors": n}，否则返回空字典。"""
+    data = getattr(request, "data", None) or {}
+    query = request.query_params
+    if not request_flag(request, "dry_run"):
+        return {}
+    try:
+        max_errors = int(data.get("max_errors") or query.get("max_errors") or DRY_RUN_MAX_ERRORS)
+    except (TypeError, ValueError):
+        max_errors = DRY_RUN_MAX_ERRORS
+    return {"dry_run": True, "max_errors": max(1, min(max_errors, DRY_RUN_MAX_ERRORS_LIMIT))}
+
+
+def dry_run_result(
+    rows: int,
+    created: int,
+    updated: int,
+    rejected: int,
+    errors: list,
+    max_errors: int = DRY_RUN_MAX_ERRORS,
+    **extra,
+) -> dict:
+    """预检结果，与 run_import 返回结构一致；data.errors 只保留前 max_errors 条。"""
+    data = {
+        "dry_run": True,
+        "rows": rows,
+        "created": created,
+        "updated": updated,
+        "rejected": rejected,
+        "error_count": len(errors),
+        "errors": list(errors[:max_errors]),
+        **extra,
+    }
+    return {"data": data, "errors": errors, "rows": rows}
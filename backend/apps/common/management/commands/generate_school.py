@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.synthetic import SchoolSpec, generate_school
+
+
+def add_spec_arguments(parser) -> None:
+    defaults = SchoolSpec()
+    parser.add_argument("--grades", type=int, default=defaults.grades, help="年级数")
+    parser.add_argument("--classes-per-grade", type=int, default=defaults.classes_per_grade, help="每个年级的班级数")
+    parser.add_argument("--students-per-class", type=int, default=defaults.students_per_class, help="每班学生数")
+    parser.add_argument("--teachers", type=int, default=defaults.teachers, help="教师数")
+    parser.add_argument("--courses", type=int, default=defaults.courses, help="课程数（最多 12 个不同科目）")
+    parser.add_argument("--exams-per-grade", type=int, default=defaults.exams_per_grade, help="每个年级的考试场数")
+    parser.add_argument("--periods-per-day", type=int, default=defaults.periods_per_day, help="每天节数（最多 8）")
+    parser.add_argument("--days", type=int, default=defaults.days, help="每周上课天数")
+    parser.add_argument("--weeks", default=defaults.weeks, help="课次周次，如 1-20")
+    parser.add_argument("--term", default=defaults.term, help="课表与考试的学期")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_options(options) -> SchoolSpec:
+    return SchoolSpec(
+        grades=options["grades"],
+        classes_per_grade=options["classes_per_grade"],
+        students_per_class=options["students_per_class"],
+        teachers=options["teachers"],
+        courses=options["courses"],
+        exams_per_grade=options["exams_per_grade"],
+        periods_per_day=options["periods_per_day"],
+        days=options["days"],
+        weeks=options["weeks"],
+        term=options["term"],
+        seed=options["seed"],
+    )
+
+
+class Command(BaseCommand):
+    help = "生成一所合成学校（年级/班级/学生/教师/课程/整学期课表/考试与成绩），全部 bulk_create 写入"
+
+    def add_arguments(self, parser):
+        add_spec_arguments(parser)
+
+    def handle(self, *args, **options):
+        data = generate_school(spec_from_options(options))
+        summary = "，".join(f"{name} {count}" for name, count in data.counts.items())
+        self.stdout.write(self.style.SUCCESS(f"已生成（标记 {data.tag}，学期 {data.term}）：{summary}；耗时 {data.elapsed_s} s"))
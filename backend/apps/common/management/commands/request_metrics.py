@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.common.metrics import _budget_for, latency_store, latency_summary
+
+
+class Command(BaseCommand):
+    help = "查看各接口最近请求耗时的 p50/p95（需开启 REQUEST_METRICS_ENABLED）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+        parser.add_argument("--clear", action="store_true", help="清空已记录的样本")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            latency_store.clear()
+            self.stdout.write("已清空接口耗时样本")
+            return
+
+        rows = latency_summary()
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, ensure_ascii=False, indent=2))
+            return
+        if not rows:
+            self.stdout.write("暂无样本")
+            return
+        self.stdout.write(f"{'endpoint':<40} {'samples':>7} {'p50(ms)':>9} {'p95(ms)':>9}  budget")
+        for row in rows:
+            budget = _budget_for(row["endpoint"])
+            self.stdout.write(
+                f"{row['endpoint']:<40} {row['samples']:>7} {row['p50']:>9.2f} {row['p95']:>9.2f}  "
+                + (", ".join(f"{k}<={v}" for k, v in budget.items()) or "-")
+            )
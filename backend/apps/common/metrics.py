@@ -0,0 +1,265 @@
+"""接口性能埋点（按需开启）。
+
+RequestMetricsMiddleware 对每个请求按解析出的 URL 名称（无名称时用路由）记录：
+- SQL 条数与 SQL 总耗时（connection.execute_wrapper）
+- 序列化耗时（DRF 序列化器 .data 的耗时）
+- 总耗时与响应体大小
+
+结果写入 Server-Timing 响应头和一行 JSON 日志（logger: apps.common.metrics），
+流式响应（CSV/ICS 导出）的 SQL 在读取响应体时执行，读取过程同样计入，响应体读完后才记录日志与检查预算
+（响应头此时已发出，Server-Timing 只标注 streaming），
+总耗时样本按接口保留最近 REQUEST_METRICS_WINDOW 条，供 request_metrics 命令计算 p50/p95；
+缓存为 django-redis 时写入 Redis 列表，否则退回进程内存。
+
+REQUEST_METRICS_BUDGETS 按接口配置预算，如 {"student-list": 5} 或
+{"student-list": {"queries": 5, "sql_ms": 50, "total_ms": 300}}；超出时记警告日志，
+REQUEST_METRICS_STRICT=True（测试中使用）时直接抛出 BudgetExceeded 使测试失败。
+"""
+
+import json
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "metrics:latency:"
+ENDPOINTS_KEY = "metrics:endpoints"
+
+_current: ContextVar["RequestMetrics | None"] = ContextVar("request_metrics", default=None)
+
+
+class BudgetExceeded(AssertionError):
+    """接口超出性能预算（仅 REQUEST_METRICS_STRICT 时抛出）。"""
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper 回调：累计 SQL 条数与耗时
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def _window() -> int:
+    return getattr(settings, "REQUEST_METRICS_WINDOW", 200)
+
+
+def _redis():
+    """缓存后端为 django-redis 时返回原生连接，否则返回 None。"""
+    if not settings.CACHES["default"]["BACKEND"].startswith("django_redis."):
+        return None
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+class LatencyStore:
+    """按接口保留最近 N 次的总耗时样本。"""
+
+    def __init__(self):
+        self._local: dict[str, deque] = defaultdict(lambda: deque(maxlen=_window()))
+
+    def add(self, endpoint: str, total_ms: float) -> None:
+        conn = _redis()
+        if conn is None:
+            self._local[endpoint].append(total_ms)
+            return
+        key = KEY_PREFIX + endpoint
+        pipe = conn.pipeline()
+        pipe.lpush(key, total_ms)
+        pipe.ltrim(key, 0, _window() - 1)
+        pipe.sadd(ENDPOINTS_KEY, endpoint)
+        pipe.execute()
+
+    def samples(self) -> dict[str, list[float]]:
+        conn = _redis()
+        if conn is None:
+            return {name: list(values) for name, values in self._local.items()}
+        result = {}
+        for raw in conn.smembers(ENDPOINTS_KEY):
+            name = raw.decode() if isinstance(raw, bytes) else raw
+            result[name] = [float(v) for v in conn.lrange(KEY_PREFIX + name, 0, -1)]
+        return result
+
+    def clear(self) -> None:
+        conn = _redis()
+        if conn is None:
+            self._local.clear()
+            return
+        names = conn.smembers(ENDPOINTS_KEY)
+        if names:
+            conn.delete(*[KEY_PREFIX + (n.decode() if isinstance(n, bytes) else n) for n in names])
+        conn.delete(ENDPOINTS_KEY)
+
+
+latency_store = LatencyStore()
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """最近邻秩百分位。"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def latency_summary() -> list[dict]:
+    return sorted(
+        (
+            {
+                "endpoint": name,
+                "samples": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+            }
+            for name, values in latency_store.samples().items()
+        ),
+        key=lambda row: row["endpoint"],
+    )
+
+
+def _install_serializer_timer() -> None:
+    """给 DRF 序列化器的 .data 计时（只统计最外层，嵌套调用不重复计入）。"""
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, "_metrics_timed", False):
+        return
+
+    def data(self):
+        metrics = _current.get()
+        if metrics is None or metrics._serializer_depth:
+            return original.fget(self)
+        metrics._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics._serializer_depth -= 1
+            metrics.serializer_ms += (time.perf_counter() - started) * 1000
+
+    data._metrics_timed = True
+    BaseSerializer.data = property(data)
+
+
+def _budget_for(endpoint: str) -> dict:
+    budget = getattr(settings, "REQUEST_METRICS_BUDGETS", {}).get(endpoint)
+    if budget is None:
+        return {}
+    if isinstance(budget, int):
+        return {"queries": budget}
+    return budget
+
+
+def check_budget(endpoint: str, record: dict) -> list[str]:
+    """返回超出预算的指标说明，如 ["queries 12 > 5"]。"""
+    return [
+        f"{metric} {record[metric]} > {limit}"
+        for metric, limit in _budget_for(endpoint).items()
+        if metric in record and record[metric] > limit
+    ]
+
+
+@contextmanager
+def _capture(metrics: RequestMetrics):
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(metrics))
+            yield
+    finally:
+        _current.reset(token)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        _install_serializer_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        started = time.perf_counter()
+        with _capture(metrics):
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return response
+        endpoint = match.view_name or match.route
+
+        if response.streaming and not getattr(response, "is_async", False):
+            response["Server-Timing"] = 'size;desc="streaming"'
+            content = response.streaming_content
+            response.streaming_content = self._stream(content, request, response, endpoint, metrics, started)
+            return response
+
+        record = self._record(request, response, endpoint, metrics, started, len(response.content))
+        response["Server-Timing"] = ", ".join([
+            f'sql;dur={record["sql_ms"]};desc="{metrics.queries} queries"',
+            f'serializer;dur={record["serializer_ms"]}',
+            f'total;dur={record["total_ms"]}',
+            f'size;desc="{record["bytes"]} bytes"',
+        ])
+        self._finish(request, endpoint, record)
+        return response
+
+    def _stream(self, content, request, response, endpoint, metrics, started):
+        """逐块读取流式响应体，读取期间执行的 SQL 计入本次请求；读完后记录并检查预算。"""
+        chunks = iter(content)
+        size = 0
+        while True:
+            with _capture(metrics):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            size += len(chunk)
+            yield chunk
+        self._finish(request, endpoint, self._record(request, response, endpoint, metrics, started, size))
+
+    def _record(self, request, response, endpoint, metrics, started, size) -> dict:
+        return {
+            "endpoint": endpoint,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "sql_ms": round(metrics.sql_ms, 2),
+            "serializer_ms": round(metrics.serializer_ms, 2),
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "bytes": size,
+        }
+
+    def _finish(self, request, endpoint: str, record: dict) -> None:
+        logger.info(json.dumps(record, ensure_ascii=False))
+        try:
+            latency_store.add(endpoint, record["total_ms"])
+        except Exception:  # pragma: no cover - 统计不可用时不影响请求
+            logger.warning("failed to record latency for %s", endpoint, exc_info=True)
+
+        exceeded = check_budget(endpoint, record)
+        if exceeded:
+            message = f"{request.method} {endpoint} over budget: {', '.join(exceeded)}"
+            if getattr(settings, "REQUEST_METRICS_STRICT", False):
+                raise BudgetExceeded(message)
+            logger.warning(message)
@@ -1,5 +1,18 @@
+import base64
+import binascii
+import hashlib
+import json
 from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.exceptions import EmptyResultSet, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -33,6 +46,175 @@ class BYSSPagination(PageNumberPagination):
                         "page_size": page_size,
                         "total_pages": total_pages,
                         "total_count": total_count,
+                        "count_is_estimate": getattr(self.page.paginator, "count_is_estimate", False),
+                    },
+                },
+                "message": "操作成功",
+                "timestamp": timezone.now().isoformat(),
+            }
+        )
+
+
+def _count_timeout() -> int:
+    return getattr(settings, "PAGINATION_COUNT_TIMEOUT", 30)
+
+
+def _estimate_min_rows() -> int:
+    return getattr(settings, "PAGINATION_ESTIMATE_MIN_ROWS", 50000)
+
+
+def table_row_estimate(queryset) -> int | None:
+    """MySQL 表统计信息中查询集主表的行数（InnoDB 为估算值），其他数据库返回 None。"""
+    connection = connections[queryset.db]
+    if connection.vendor != "mysql":
+        return None
+    table = queryset.model._meta.db_table
+    key = f"pagination:table_rows:{table}"
+    rows = cache.get(key)
+    if rows is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+            row = cursor.fetchone()
+        rows = int(row[0] or 0) if row else 0
+        cache.set(key, rows, _count_timeout())
+    return rows
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """count 由 count_resolver(object_list) -> (总数, 是否估算) 提供。"""
+
+    def __init__(self, object_list, per_page, count_resolver=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_resolver = count_resolver
+        self.count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        if self.count_resolver is None:
+            return super().count
+        total, self.count_is_estimate = self.count_resolver(self.object_list)
+        return total
+
+
+class CachedCountPagination(BYSSPagination):
+    """大表分页：总数按 (视图, 计数 SQL) 短时缓存（PAGINATION_COUNT_TIMEOUT 秒，默认 30）。
+
+    - 计数查询没有任何 WHERE 条件（含视图固定的软删除、默认状态过滤）时，在 MySQL 上直接使用表统计信息，
+      仅当行数不少于 PAGINATION_ESTIMATE_MIN_ROWS 时采用，此时 pagination.count_is_estimate=true，前端可标注“约”
+    - 视图可实现 get_count_queryset(queryset) 返回仅用于计数的查询集（如去掉仅用于展示的聚合注解）
+    - 缓存期内新增/删除的数据不会立即反映在总数上
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # count 在 DRF 设置 self.request 之前就会被读取
+        self.request = request
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        return CachedCountPaginator(object_list, per_page, count_resolver=self.resolve_count)
+
+    @staticmethod
+    def is_whole_table(queryset) -> bool:
+        """计数结果等于整表行数：无 WHERE 条件、无 DISTINCT、非组合查询。"""
+        query = queryset.query
+        return not query.where and not query.distinct and not query.combinator
+
+    def resolve_count(self, queryset) -> tuple[int, bool]:
+        get_count_queryset = getattr(self.view, "get_count_queryset", None)
+        if get_count_queryset is not None:
+            queryset = get_count_queryset(queryset)
+
+        if self.is_whole_table(queryset):
+            estimate = table_row_estimate(queryset)
+            if estimate is not None and estimate >= _estimate_min_rows():
+                return estimate, True
+
+        queryset = queryset.order_by()
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0, False
+        digest = hashlib.md5(repr((sql, params)).encode("utf-8")).hexdigest()
+        key = f"pagination:count:{type(self.view).__module__}.{type(self.view).__name__}:{digest}"
+        total = cache.get(key)
+        if total is None:
+            total = queryset.count()
+            cache.set(key, total, _count_timeout())
+        return total, False
+
+
+class KeysetPaginationMixin:
+    """请求带 cursor 参数时改用键集（游标）分页，否则沿用页码分页。
+
+    按视图的 cursor_fields（默认 (created_at, id)）排序，下一页条件为
+    (created_at, id) < (上一页最后一行)，走复合索引，不随翻页深度变慢。
+    ?cursor= 为空表示第一页；ordering 仅支持 cursor_fields[0] 的正/倒序（默认倒序），其他排序参数忽略。
+    返回 pagination: {page_size, cursor, next_cursor, has_more}，不计算总数。
+    """
+
+    cursor_query_param = "cursor"
+    default_cursor_fields = ("created_at", "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.view = view
+        fields = getattr(view, "cursor_fields", self.default_cursor_fields)
+        descending = request.query_params.get("ordering") != fields[0]
+        op = "lt" if descending else "gt"
+        page_size = self.get_page_size(request) or self.page_size
+
+        queryset = queryset.order_by(*[f"-{f}" if descending else f for f in fields])
+        self.cursor = request.query_params.get(self.cursor_query_param) or ""
+        if self.cursor:
+            first, second = self.decode_cursor(queryset.model, fields, self.cursor)
+            queryset = queryset.filter(
+                Q(**{f"{fields[0]}__{op}": first}) | Q(**{fields[0]: first, f"{fields[1]}__{op}": second})
+            )
+
+        rows = list(queryset[: page_size + 1])
+        self.has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        self.cursor_page_size = page_size
+        self.next_cursor = self.encode_cursor(queryset.model, fields, rows[-1]) if self.has_more else None
+        return rows
+
+    @staticmethod
+    def encode_cursor(model, fields, obj) -> str:
+        values = [model._meta.get_field(f).value_to_string(obj) for f in fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(model, fields, cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw.decode("utf-8"))
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError(cursor)
+            return [model._meta.get_field(f).to_python(v) for f, v in zip(fields, values)]
+        except (ValueError, TypeError, binascii.Error, DjangoValidationError):
+            raise ValidationError({"cursor": ["无效的游标"]})
+
+    def get_paginated_response(self, data):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "success": True,
+                "data": {
+                    "results": data,
+                    "pagination": {
+                        "page_size": self.cursor_page_size,
+                        "cursor": self.cursor,
+                        "next_cursor": self.next_cursor,
+                        "has_more": self.has_more,
                     },
                 },
                 "message": "操作成功",
@@ -41,3 +223,9 @@ class BYSSPagination(PageNumberPagination):
         )
 
 
+class KeysetPagination(KeysetPaginationMixin, BYSSPagination):
+    pass
+
+
+class CachedCountKeysetPagination(KeysetPaginationMixin, CachedCountPagination):
+    pass
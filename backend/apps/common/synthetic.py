@@ -0,0 +1,226 @@
+"""合成学校数据，用于本地复现生产规模的负载（generate_school 命令、pytest 的 school 夹具与 benchmarks 压测）。
+
+全部通过 bulk_create 写入；编码/学号/工号带随机标记，可在已有数据的库中重复生成。
+"""
+
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+
+from apps.courses.models import Course
+from apps.grades.models import Exam, Score
+from apps.grades.results import refresh_exam_results
+from apps.schools.models import Class, Grade
+from apps.students.models import Student
+from apps.teachers.models import Teacher, TeachingAssignment
+from apps.timetable.conflicts import rebuild_term
+from apps.timetable.models import Lesson, Room
+from apps.timetable.snapshots import schedule_bump
+from apps.timetable.weeks import weeks_to_mask
+
+
+GRADE_NAMES = ["初一", "初二", "初三", "高一", "高二", "高三", "一年级", "二年级", "三年级", "四年级", "五年级", "六年级"]
+COURSE_NAMES = ["语文", "数学", "英语", "道法", "历史", "物理", "化学", "地理", "生物", "体育", "音乐", "美术"]
+MAIN_COURSES = {"语文", "数学", "英语"}
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何林罗高"
+GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂"
+PERIOD_TIMES = [
+    ("08:00", "08:45"), ("08:55", "09:40"), ("10:00", "10:45"), ("10:55", "11:40"),
+    ("14:00", "14:45"), ("14:55", "15:40"), ("16:00", "16:45"), ("16:55", "17:40"),
+]
+BATCH_SIZE = 2000
+
+
+@dataclass
+class SchoolSpec:
+    grades: int = 6
+    classes_per_grade: int = 8
+    students_per_class: int = 45
+    teachers: int = 120
+    courses: int = 9
+    exams_per_grade: int = 2
+    periods_per_day: int = 8
+    days: int = 5
+    weeks: str = "1-20"
+    term: str = "benchmark"
+    seed: int = 42
+
+
+@dataclass
+class SchoolData:
+    tag: str
+    term: str
+    grades: list = field(default_factory=list)
+    classes: list = field(default_factory=list)
+    students: list = field(default_factory=list)
+    teachers: list = field(default_factory=list)
+    courses: list = field(default_factory=list)
+    exams: list = field(default_factory=list)
+    counts: dict = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+
+def _person_name(rnd: random.Random) -> str:
+    return rnd.choice(SURNAMES) + "".join(rnd.choice(GIVEN) for _ in range(rnd.randint(1, 2)))
+
+
+def generate_school(spec: SchoolSpec) -> SchoolData:
+    """按规格生成一所学校：年级、班级、学生、教师、课程、任课、整学期课表、考试与成绩。"""
+    rnd = random.Random(spec.seed)
+    tag = uuid.uuid4().hex[:6]
+    started = time.perf_counter()
+    data = SchoolData(tag=tag, term=spec.term)
+
+    with transaction.atomic():
+        data.grades = Grade.objects.bulk_create(
+            [Grade(name=f"{GRADE_NAMES[i % len(GRADE_NAMES)]}-{tag}{i}") for i in range(spec.grades)]
+        )
+        data.teachers = Teacher.objects.bulk_create(
+            [
+                Teacher(
+                    teacher_id=f"T{tag}{i:05d}",
+                    name=_person_name(rnd),
+                    gender=rnd.choice(["男", "女"]),
+                    phone=f"1{tag}{i:05d}"[:20],
+                    id_card=f"ID{tag}{i:05d}",
+                )
+                for i in range(spec.teachers)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        data.classes = Class.objects.bulk_create(
+            [
+                Class(
+                    code=f"C{tag}{g:02d}{c:02d}",
+                    name=f"{c + 1}班",
+                    grade=grade,
+                    head_teacher=data.teachers[(g * spec.classes_per_grade + c) % len(data.teachers)],
+                    capacity=spec.students_per_class + 5,
+                )
+                for g, grade in enumerate(data.grades)
+                for c in range(spec.classes_per_grade)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        for cls in data.classes:
+            cls.head_teacher_name = cls.head_teacher.name
+        Class.objects.bulk_update(data.classes, ["head_teacher_name"], batch_size=BATCH_SIZE)
+
+        data.courses = Course.objects.bulk_create(
+            [
+                Course(
+                    code=f"K{tag}{i:02d}",
+                    name=COURSE_NAMES[i % len(COURSE_NAMES)],
+                    weekly_hours=5 if COURSE_NAMES[i % len(COURSE_NAMES)] in MAIN_COURSES else 2,
+                    full_score=150 if COURSE_NAMES[i % len(COURSE_NAMES)] in MAIN_COURSES else 100,
+                )
+                for i in range(spec.courses)
+            ]
+        )
+        data.students = Student.objects.bulk_create(
+            [
+                Student(
+                    student_id=f"S{tag}{n:06d}",
+                    name=_person_name(rnd),
+                    gender=rnd.choice(["男", "女"]),
+                    current_class=cls,
+                    status="在校",
+                )
+                for n, cls in enumerate(
+                    cls for cls in data.classes for _ in range(spec.students_per_class)
+                )
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        # 每个班级每门课固定一名任课教师，课表与任课记录一致
+        teacher_of = {
+            (cls.id, course.id): data.teachers[(ci * len(data.courses) + ki) % len(data.teachers)]
+            for ci, cls in enumerate(data.classes)
+            for ki, course in enumerate(data.courses)
+        }
+        assignments = TeachingAssignment.objects.bulk_create(
+            [
+                TeachingAssignment(
+                    course=course,
+                    teacher=teacher_of[(cls.id, course.id)],
+                    class_ref=cls,
+                    subject=course.name,
+                    weekly_hours=course.weekly_hours,
+                    term=spec.term,
+                )
+                for cls in data.classes
+                for course in data.courses
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        rooms = Room.objects.bulk_create([Room(name=f"R{tag}-{cls.code}") for cls in data.classes])
+        week_mask = weeks_to_mask(spec.weeks, "all")
+        lessons = []
+        periods = min(spec.periods_per_day, len(PERIOD_TIMES))
+        for ci, (cls, room) in enumerate(zip(data.classes, rooms)):
+            for day in range(1, spec.days + 1):
+                for period in range(1, periods + 1):
+                    course = data.courses[(ci + day * periods + period) % len(data.courses)]
+                    teacher = teacher_of[(cls.id, course.id)]
+                    start, end = PERIOD_TIMES[period - 1]
+                    lessons.append(Lesson(
+                        term=spec.term, day_of_week=day, start_time=start, end_time=end,
+                        start_period=period, end_period=period, weeks=spec.weeks, week_mask=week_mask,
+                        course=course, teacher=teacher, class_ref=cls, room=room,
+                        course_name=course.name, teacher_name=teacher.name,
+                        class_name=cls.name, room_name=room.name,
+                    ))
+        Lesson.objects.bulk_create(lessons, batch_size=BATCH_SIZE)
+        rebuild_term(spec.term)
+        schedule_bump(spec.term)
+
+        classes_of = {}
+        for cls in data.classes:
+            classes_of.setdefault(cls.grade_id, set()).add(cls.id)
+        data.exams = Exam.objects.bulk_create(
+            [
+                Exam(code=f"E{tag}{g:02d}{e}", name=f"第{e + 1}次月考", term=spec.term, grade=grade)
+                for g, grade in enumerate(data.grades)
+                for e in range(spec.exams_per_grade)
+            ]
+        )
+        score_count = 0
+        for exam in data.exams:
+            scores = []
+            for st in data.students:
+                if st.current_class_id not in classes_of[exam.grade_id]:
+                    continue
+                cls = st.current_class
+                for course in data.courses:
+                    full = Decimal(course.full_score)
+                    # 约 2% 缺考；0.5 分粒度，贴近实际阅卷
+                    value = Decimal(rnd.randint(int(full), int(full) * 2)) / 2 if rnd.random() > 0.02 else None
+                    scores.append(Score(
+                        exam=exam, student=st, course=course, class_ref=cls,
+                        score=value, full_score=full,
+                        student_name=st.name, class_name=cls.name, course_name=course.name,
+                        passed=value is not None and value >= full * Decimal("0.6"),
+                    ))
+            Score.objects.bulk_create(scores, batch_size=BATCH_SIZE)
+            score_count += len(scores)
+            refresh_exam_results(exam.id)
+
+    data.counts = {
+        "grades": len(data.grades),
+        "classes": len(data.classes),
+        "students": len(data.students),
+        "teachers": len(data.teachers),
+        "courses": len(data.courses),
+        "assignments": len(assignments),
+        "lessons": len(lessons),
+        "exams": len(data.exams),
+        "scores": score_count,
+    }
+    data.elapsed_s = round(time.perf_counter() - started, 2)
+    return data
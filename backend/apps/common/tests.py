@@ -0,0 +1,90 @@
+import json
+import logging
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+from apps.common.metrics import BudgetExceeded
+from apps.common.transactions import merge_on_commit
+from apps.courses.models import Course
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _register(flushed: list, value) -> None:
+    merge_on_commit("test", lambda data: data.setdefault("values", []).append(value), flushed.append)
+
+
+def test_registrations_merge_into_one_flush(django_capture_on_commit_callbacks):
+    flushed = []
+    with django_capture_on_commit_callbacks(execute=True):
+        for value in range(3):
+            _register(flushed, value)
+        assert flushed == []
+    assert flushed == [{"values": [0, 1, 2]}]
+
+
+def test_rolled_back_registrations_are_dropped(django_capture_on_commit_callbacks):
+    flushed = []
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                _register(flushed, "rolled back")
+                raise RuntimeError()
+        with transaction.atomic():
+            _register(flushed, "committed")
+    assert flushed == [{"values": ["committed"]}]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_autocommit_flushes_immediately():
+    flushed = []
+    _register(flushed, 1)
+    _register(flushed, 2)
+    assert flushed == [{"values": [1]}, {"values": [2]}]
+
+
+@pytest.fixture
+def metrics_client(settings, db) -> APIClient:
+    # 中间件在首次请求时按当前设置加载，新建的客户端才会带上埋点
+    settings.REQUEST_METRICS_ENABLED = True
+    settings.REQUEST_METRICS_STRICT = True
+    Course.objects.bulk_create([Course(code=f"K{i}", name=f"课程{i}") for i in range(3)])
+    client = APIClient()
+    client.force_authenticate(User.objects.create_superuser("metrics-admin", "m@example.com", "pw"))
+    return client
+
+
+def test_strict_budget_fails_the_request(metrics_client, settings):
+    settings.REQUEST_METRICS_BUDGETS = {"course-list": 1}
+    with pytest.raises(BudgetExceeded, match="course-list over budget: queries"):
+        metrics_client.get("/api/v1/courses/")
+
+    settings.REQUEST_METRICS_BUDGETS = {"course-list": 5}
+    response = metrics_client.get("/api/v1/courses/")
+    assert response.status_code == 200
+    assert 'desc="2 queries"' in response["Server-Timing"]
+
+
+def test_streaming_queries_are_counted(metrics_client, settings, caplog):
+    url = "/api/v1/courses/export/"
+    endpoint = resolve(url).view_name
+    settings.REQUEST_METRICS_STRICT = False
+    with caplog.at_level(logging.INFO, logger="apps.common.metrics"):
+        response = metrics_client.get(url)
+        body = b"".join(response.streaming_content)
+    record = json.loads(caplog.records[0].getMessage())
+    assert record["endpoint"] == endpoint
+    assert record["queries"] >= 1
+    assert record["bytes"] == len(body)
+
+    # 导出的查询在读取响应体时执行，超出预算同样失败
+    settings.REQUEST_METRICS_STRICT = True
+    settings.REQUEST_METRICS_BUDGETS = {endpoint: 0}
+    response = metrics_client.get(url)
+    with pytest.raises(BudgetExceeded):
+        b"".join(response.streaming_content)
@@ -0,0 +1,38 @@
+"""事务提交后合并执行的回调。
+
+同一事务内的多次登记（如逐条保存触发的信号）合并为一份待处理数据，提交后只执行一次 flush。
+待处理数据挂在当前数据库连接上，并与登记的提交回调绑定：事务（或登记所在的保存点）回滚时
+Django 丢弃该回调，下一次登记发现回调已不在待执行列表中便重新开始，回滚的登记不会带入
+同一线程后续的其他事务。
+"""
+
+from django.db import transaction
+
+
+def merge_on_commit(key: str, merge, flush, factory=dict) -> None:
+    """把本次登记合并进当前事务中 key 对应的待处理数据，提交后执行一次 flush(data)。
+
+    merge(data) 就地合并本次登记；factory 创建空的待处理数据。不在事务中时立即执行。
+    外层事务已有待处理数据时，内层保存点中的登记并入其中，保存点回滚后仍会随外层提交执行
+    （调用方的 flush 须幂等）。
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        data = factory()
+        merge(data)
+        flush(data)
+        return
+
+    batches = connection.__dict__.setdefault("_merged_on_commit", {})
+    batch = batches.get(key)
+    if batch is None or not any(entry[1] is batch[1] for entry in connection.run_on_commit):
+        data = factory()
+
+        def run():
+            if batches.get(key) is batch:
+                del batches[key]
+            flush(data)
+
+        batch = batches[key] = (data, run)
+        transaction.on_commit(run)
+    merge(batch[0])
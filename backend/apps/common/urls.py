@@ -1,10 +1,11 @@
 from django.urls import path
-from .views import me, change_password, academic_settings
+from .views import me, change_password, academic_settings, dashboard_stats
 
 urlpatterns = [
     path('auth/me/', me),
     path('auth/change-password/', change_password),
     path('system/academic-settings/', academic_settings),
+    path('dashboard/stats/', dashboard_stats),
 ]
 
 
@@ -5,6 +5,7 @@ from django.utils.timezone import now
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.contrib.auth import update_session_auth_hash
+from .dashboard import dashboard_stats as get_dashboard_stats
 from .models import AcademicSetting
 
 
@@ -174,3 +175,21 @@ def academic_settings(request):
             "timestamp": now().isoformat(),
         }
     )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard_stats(request):
+    """首页仪表盘统计（当前学期、今天）。
+    查询参数：week 可选，按教学周统计今日课次；refresh=1 跳过缓存重新计算
+    """
+    refresh = str(request.query_params.get("refresh") or "").lower() in {"1", "true", "yes"}
+    data = get_dashboard_stats(week=request.query_params.get("week"), refresh=refresh)
+    return Response(
+        {
+            "success": True,
+            "data": data,
+            "message": "操作成功",
+            "timestamp": now().isoformat(),
+        }
+    )
@@ -4,6 +4,20 @@ from apps.teachers.models import TeachingAssignment, Teacher
 from apps.schools.models import Class as SchoolClass
 
 
+# 视图注解的第一条任课记录教师/班级名称（见 CourseViewSet.get_queryset）
+FIRST_ASSIGNMENT_ATTRS = {"teacher": "first_teacher_name", "class_ref": "first_class_name"}
+
+
+def first_assignment_name(obj: Course, relation: str):
+    """优先读取查询集注解；未注解的实例（如新建后的返回）回退为查询第一条任课记录。"""
+    attr = FIRST_ASSIGNMENT_ATTRS[relation]
+    if attr in obj.__dict__:
+        return obj.__dict__[attr]
+    assignment = obj.teaching_assignments.select_related("teacher", "class_ref").first()
+    related = getattr(assignment, relation, None) if assignment else None
+    return related.name if related else None
+
+
 class CourseListSerializer(serializers.ModelSerializer):
     teacher_name = serializers.SerializerMethodField()
     class_name = serializers.SerializerMethodField()
@@ -25,20 +39,10 @@ class CourseListSerializer(serializers.ModelSerializer):
         ]
 
     def get_teacher_name(self, obj: Course):
-        assignment = (
-            obj.teaching_assignments.select_related("teacher", "class_ref").first()
-            if hasattr(obj, "teaching_assignments")
-            else None
-        )
-        return assignment.teacher.name if assignment and assignment.teacher else None
+        return first_assignment_name(obj, "teacher")
 
     def get_class_name(self, obj: Course):
-        assignment = (
-            obj.teaching_assignments.select_related("teacher", "class_ref").first()
-            if hasattr(obj, "teaching_assignments")
-            else None
-        )
-        return assignment.class_ref.name if assignment and assignment.class_ref else None
+        return first_assignment_name(obj, "class_ref")
 
 
 class CourseDetailSerializer(serializers.ModelSerializer):
@@ -149,14 +153,15 @@ class CourseDetailSerializer(serializers.ModelSerializer):
                     weekly_hours=course.weekly_hours,
                     duty="任课",
                 )
+            # 任课记录已变更，丢弃查询时的注解，返回时重新读取
+            for attr in FIRST_ASSIGNMENT_ATTRS.values():
+                course.__dict__.pop(attr, None)
         return course
 
     def get_teacher_name(self, obj: Course):
-        assignment = obj.teaching_assignments.select_related("teacher", "class_ref").first()
-        return assignment.teacher.name if assignment and assignment.teacher else None
+        return first_assignment_name(obj, "teacher")
 
     def get_class_name(self, obj: Course):
-        assignment = obj.teaching_assignments.select_related("teacher", "class_ref").first()
-        return assignment.class_ref.name if assignment and assignment.class_ref else None
+        return first_assignment_name(obj, "class_ref")
 
 
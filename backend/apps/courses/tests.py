@@ -0,0 +1,60 @@
+import pytest
+
+from apps.courses.models import Course
+from apps.schools.models import Class, Grade
+from apps.teachers.models import Teacher, TeachingAssignment
+
+
+pytestmark = pytest.mark.django_db
+
+PAGE_SIZE = 200
+
+
+@pytest.fixture
+def courses():
+    """200 门课程，每门两条任课记录（取主键较小的一条展示）。"""
+    grade = Grade.objects.create(name="初一")
+    classes = Class.objects.bulk_create([Class(code=f"C{i}", name=f"{i}班", grade=grade) for i in range(4)])
+    teachers = Teacher.objects.bulk_create([
+        Teacher(teacher_id=f"T{i}", name=f"教师{i}", phone=f"1380000{i:04d}", id_card=f"11010119800101{i:04d}")
+        for i in range(4)
+    ])
+    courses = Course.objects.bulk_create([Course(code=f"K{i:03d}", name=f"课程{i}") for i in range(PAGE_SIZE)])
+    TeachingAssignment.objects.bulk_create([
+        TeachingAssignment(
+            course=course, teacher=teachers[(i + k) % 4], class_ref=classes[(i + k) % 4], subject=course.name
+        )
+        for i, course in enumerate(courses)
+        for k in range(2)
+    ])
+    return courses
+
+
+def _first_assignment(course: Course) -> TeachingAssignment:
+    return course.teaching_assignments.select_related("teacher", "class_ref").order_by("pk").first()
+
+
+def test_list_page_query_count_is_constant(admin_api_client, courses, django_assert_num_queries):
+    # 分页计数 + 当前页（教师/班级名称随课程一起查出），与行数无关
+    with django_assert_num_queries(2):
+        response = admin_api_client.get(f"/api/v1/courses/?page_size={PAGE_SIZE}")
+    assert response.status_code == 200
+    rows = response.json()["data"]["results"]
+    assert len(rows) == PAGE_SIZE
+
+    course = Course.objects.get(pk=rows[0]["id"])
+    assignment = _first_assignment(course)
+    assert rows[0]["teacher_name"] == assignment.teacher.name
+    assert rows[0]["class_name"] == assignment.class_ref.name
+
+
+def test_detail_query_count(admin_api_client, courses, django_assert_num_queries):
+    course = courses[17]
+    with django_assert_num_queries(1):
+        response = admin_api_client.get(f"/api/v1/courses/{course.pk}/")
+    assert response.status_code == 200
+    data = response.json()
+    data = data.get("data", data)
+    assignment = _first_assignment(course)
+    assert data["teacher_name"] == assignment.teacher.name
+    assert data["class_name"] == assignment.class_ref.name
@@ -1,9 +1,11 @@
+from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
-from django.http import HttpResponse
 
+from apps.common.exports import iter_values, stream_csv, wants_bom
 from apps.common.pagination import BYSSPagination
+from apps.teachers.models import TeachingAssignment
 from .models import Course
 from .serializers import CourseListSerializer, CourseDetailSerializer
 
@@ -16,6 +18,15 @@ class CourseViewSet(viewsets.ModelViewSet):
     filterset_fields = ["status", "category", "code"]
     ordering_fields = ["created_at", "updated_at", "name", "code"]
 
+    def get_queryset(self):
+        # 列表/详情展示的授课教师、班级取课程的第一条任课记录（与 .first() 相同按主键排序），
+        # 以子查询注解随课程一起查出，避免每行两次额外查询
+        first_assignment = TeachingAssignment.objects.filter(course=OuterRef("pk")).order_by("pk")
+        return super().get_queryset().annotate(
+            first_teacher_name=Subquery(first_assignment.values("teacher__name")[:1]),
+            first_class_name=Subquery(first_assignment.values("class_ref__name")[:1]),
+        )
+
     def get_serializer_class(self):
         if self.action in ["list"]:
             return CourseListSerializer
@@ -24,12 +35,8 @@ class CourseViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="export")
     def export_courses(self, request):
         qs = self.filter_queryset(self.get_queryset())
-        rows = ["课程学段,课程名称,课程类型,周课时,分值,状态"]
-        for c in qs:
-            rows.append(f"{c.code},{c.name},{c.category},{c.weekly_hours},{c.full_score or ''},{c.status}")
-        csv_content = "\n".join(rows)
-        response = HttpResponse(csv_content, content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = 'attachment; filename="courses.csv"'
-        return response
+        header = ["课程学段", "课程名称", "课程类型", "周课时", "分值", "状态"]
+        fields = ["code", "name", "category", "weekly_hours", "full_score", "status"]
+        return stream_csv("courses.csv", header, iter_values(qs, fields), bom=wants_bom(request))
 
 
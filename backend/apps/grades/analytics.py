@@ -0,0 +1,220 @@
+"""成绩分析（一分四率）计算。
+
+compute_analytics 用一条按 班级×课程 分组的 SQL 完成统计：条件 Count 统计优秀/良好/低分/合格/超均人数，
+Sum 得到班级总分；年级均分为按课程关联的子查询（整场考试，不受班级/课程筛选影响）；
+超均人数的判断在子查询中用按课程分区的窗口总分/人数完成，不再把成绩逐条取回 Python。
+
+compute_analytics_legacy 保留原先逐条遍历的实现，仅供基准测试对比。
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Q, Subquery, Sum, Value, Window,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from apps.grades.models import Score
+
+
+class _GroupSubquery(Subquery):
+    """只关联分组列的子查询：每组求值一次。Django 默认把它加入 GROUP BY，数据库会对每一行求值。"""
+
+    def get_group_by_cols(self):
+        return []
+
+
+@dataclass
+class AnalyticsParams:
+    exam_id: str
+    class_id: str | None = None
+    course_id: str | None = None
+    excellent_ratio: float = 0.9
+    good_ratio: float = 0.8
+    low_ratio: float = 0.6
+    pass_ratio: float = 0.6
+
+
+def compute_analytics(params: AnalyticsParams) -> list[dict]:
+    exam_scores = Score.objects.filter(exam_id=params.exam_id)
+
+    # 年级均分：该课程整场考试的 总分/人数（按分组的课程关联，每组执行一次）
+    grade_avg = _GroupSubquery(
+        exam_scores.filter(course_id=OuterRef("course_id"), score__isnull=False)
+        .values("course_id")
+        .annotate(avg=Cast(Sum("score"), FloatField()) / Count("id"))
+        .values("avg")[:1],
+        output_field=FloatField(),
+    )
+
+    # 高于年级均分的成绩：按课程分区的窗口总分与人数，score × 人数 > 总分（与均值比较等价，不受舍入影响）；
+    # 非关联子查询，数据库只执行一次
+    above_avg_ids = (
+        exam_scores.filter(score__isnull=False)
+        .annotate(
+            course_total=Window(Sum("score"), partition_by=[F("course_id")]),
+            course_count=Window(Count("id"), partition_by=[F("course_id")]),
+        )
+        .filter(course_total__lt=ExpressionWrapper(F("score") * F("course_count"), output_field=DecimalField()))
+        .values("id")
+    )
+
+    qs = exam_scores
+    if params.class_id:
+        qs = qs.filter(class_ref_id=params.class_id)
+    if params.course_id:
+        qs = qs.filter(course_id=params.course_id)
+
+    # 阈值按浮点计算，与原实现一致；满分为 0 时按 100 计
+    full = Coalesce(NullIf("full_score", Value(0)), Value(100), output_field=DecimalField())
+
+    def threshold(ratio):
+        return ExpressionWrapper(full * Value(ratio, output_field=FloatField()), output_field=FloatField())
+
+    def at_least(ratio):
+        return Q(score__gte=threshold(ratio))
+
+    rows = (
+        qs.values("class_ref_id", "class_ref__name", "course_id", "course__name")
+        .annotate(
+            valid_count=Count("id", filter=Q(score__isnull=False)),
+            sum_score=Sum("score"),
+            excellent=Count("id", filter=at_least(params.excellent_ratio)),
+            good=Count("id", filter=at_least(params.good_ratio) & ~at_least(params.excellent_ratio)),
+            low=Count("id", filter=Q(score__lt=threshold(params.low_ratio))),
+            passed=Count("id", filter=at_least(params.pass_ratio)),
+            above_avg=Count("id", filter=Q(id__in=above_avg_ids)),
+            grade_avg=grade_avg,
+        )
+        .order_by()
+    )
+
+    results = []
+    for r in rows:
+        results.append(
+            _result_row(
+                {
+                    "class_id": str(r["class_ref_id"]),
+                    "class_name": r["class_ref__name"],
+                    "course_id": str(r["course_id"]),
+                    "course_name": r["course__name"],
+                    "valid_count": r["valid_count"],
+                    "excellent": r["excellent"],
+                    "good": r["good"],
+                    "low": r["low"],
+                    "above_avg": r["above_avg"],
+                    "passed": r["passed"],
+                    "sum_score": float(r["sum_score"] or 0),
+                },
+                r["grade_avg"],
+            )
+        )
+    results.sort(key=lambda r: ((r.get("className") or ""), (r.get("courseName") or "")))
+    return results
+
+
+def _result_row(g: dict, grade_avg: float | None) -> dict:
+    denom = g["valid_count"] or 1
+    class_avg = (g["sum_score"] / denom) if g["valid_count"] else None
+    compare_ratio = None
+    # 比均率：班级均分 / 年级均分
+    if grade_avg is not None and grade_avg != 0 and class_avg is not None:
+        compare_ratio = round(class_avg / grade_avg, 4)
+
+    return {
+        "classId": g["class_id"],
+        "className": g["class_name"] or "",
+        "courseId": g["course_id"],
+        "courseName": g["course_name"] or "",
+        "sampleSize": g["valid_count"],
+        "excellentRate": round(g["excellent"] * 100.0 / denom, 2) if g["valid_count"] else 0.0,
+        "goodRate": round(g["good"] * 100.0 / denom, 2) if g["valid_count"] else 0.0,
+        "lowRate": round(g["low"] * 100.0 / denom, 2) if g["valid_count"] else 0.0,
+        "aboveAvgRate": round(g["above_avg"] * 100.0 / denom, 2) if g["valid_count"] else 0.0,
+        "passRate": round(g["passed"] * 100.0 / denom, 2) if g["valid_count"] else 0.0,
+        "compareAvgRate": compare_ratio,
+        "classAvgScore": round(class_avg, 2) if class_avg is not None else None,
+        "gradeAvgScore": round(grade_avg, 2) if grade_avg is not None else None,
+    }
+
+
+def compute_analytics_legacy(params: AnalyticsParams) -> list[dict]:
+    exam_all_qs = (
+        Score.objects.filter(exam_id=params.exam_id, score__isnull=False)
+        .select_related("course")
+        .only("course_id", "score")
+    )
+    course_sum: dict[str, float] = {}
+    course_cnt: dict[str, int] = {}
+    course_name_by_id: dict[str, str] = {}
+    for s in exam_all_qs:
+        cid = str(s.course_id)
+        course_sum[cid] = course_sum.get(cid, 0.0) + float(s.score)
+        course_cnt[cid] = course_cnt.get(cid, 0) + 1
+        if cid not in course_name_by_id:
+            course_name_by_id[cid] = s.course.name if getattr(s, "course", None) else ""
+    course_avg: dict[str, float] = {
+        cid: (course_sum[cid] / course_cnt[cid]) for cid in course_sum.keys() if course_cnt.get(cid)
+    }
+
+    qs = (
+        Score.objects.filter(exam_id=params.exam_id)
+        .select_related("class_ref", "course")
+        .only("class_ref_id", "course_id", "score", "full_score")
+    )
+    if params.class_id:
+        qs = qs.filter(class_ref_id=params.class_id)
+    if params.course_id:
+        qs = qs.filter(course_id=params.course_id)
+
+    groups = defaultdict(
+        lambda: {
+            "class_id": None,
+            "class_name": None,
+            "course_id": None,
+            "course_name": None,
+            "valid_count": 0,
+            "excellent": 0,
+            "good": 0,
+            "low": 0,
+            "above_avg": 0,
+            "passed": 0,
+            "sum_score": 0.0,
+        }
+    )
+
+    for s in qs:
+        key = (str(s.class_ref_id), str(s.course_id))
+        g = groups[key]
+        if g["class_id"] is None:
+            g["class_id"] = str(s.class_ref_id)
+            g["course_id"] = str(s.course_id)
+            g["class_name"] = s.class_ref.name if getattr(s, "class_ref", None) else ""
+            g["course_name"] = course_name_by_id.get(str(s.course_id)) or (
+                s.course.name if getattr(s, "course", None) else ""
+            )
+
+        if s.score is None:
+            continue
+        score_val = float(s.score)
+        full_val = float(s.full_score or 100)
+        g["valid_count"] += 1
+        g["sum_score"] += score_val
+
+        if score_val >= params.excellent_ratio * full_val:
+            g["excellent"] += 1
+        elif score_val >= params.good_ratio * full_val:
+            g["good"] += 1
+        if score_val < params.low_ratio * full_val:
+            g["low"] += 1
+        if score_val >= params.pass_ratio * full_val:
+            g["passed"] += 1
+
+        avg_grade = course_avg.get(str(s.course_id))
+        if avg_grade is not None and score_val > avg_grade:
+            g["above_avg"] += 1
+
+    results = [_result_row(g, course_avg.get(g["course_id"])) for g in groups.values()]
+    results.sort(key=lambda r: ((r.get("className") or ""), (r.get("courseName") or "")))
+    return results
@@ -6,4 +6,5 @@ class GradesConfig(AppConfig):
     name = "apps.grades"
     verbose_name = "成绩管理"
 
-
+    def ready(self):
+        from apps.grades import signals  # noqa: F401
@@ -0,0 +1,104 @@
+"""成绩统计接口（summary / analytics）的按考试版本缓存。
+
+缓存键由 (接口, 考试ID, 考试数据版本号, 查询参数) 组成。成绩变更时（信号与批量导入，
+见 apps.grades.results.flush_pending）在事务提交后递增版本号，旧键自然失效，无需逐个删除。
+GRADES_CACHE_ENABLED=False 时直接计算，不读写缓存。
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+ENDPOINTS = ("summary", "analytics")
+
+# 不参与缓存键的查询参数（导出格式、前端防缓存参数）
+IGNORED_PARAMS = {"format", "_", "t"}
+
+
+def enabled() -> bool:
+    return getattr(settings, "GRADES_CACHE_ENABLED", True)
+
+
+def _timeout() -> int:
+    return getattr(settings, "GRADES_CACHE_TIMEOUT", 24 * 3600)
+
+
+def _version_key(exam_id) -> str:
+    return f"grades:exam:{exam_id}:version"
+
+
+def _counter_key(endpoint: str, kind: str) -> str:
+    return f"grades:cache:{endpoint}:{kind}"
+
+
+def get_exam_version(exam_id) -> int:
+    key = _version_key(exam_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key) or 1
+    return version
+
+
+def bump_exam_version(exam_id) -> None:
+    key = _version_key(exam_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # 键不存在（从未读取或已被淘汰）：任意新值都能让旧缓存失效
+        cache.set(key, 2, None)
+
+
+def _incr(key: str) -> None:
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def cached_exam_data(endpoint: str, exam_id, params, compute):
+    """按考试版本缓存 compute() 的结果（须可序列化）。"""
+    if not enabled():
+        return compute()
+
+    items = sorted((k, params.getlist(k) if hasattr(params, "getlist") else params[k]) for k in params)
+    items = [(k, v) for k, v in items if k not in IGNORED_PARAMS]
+    digest = hashlib.md5(json.dumps(items, ensure_ascii=False).encode("utf-8")).hexdigest()
+    key = f"grades:{endpoint}:{exam_id}:v{get_exam_version(exam_id)}:{digest}"
+
+    data = cache.get(key)
+    if data is not None:
+        _incr(_counter_key(endpoint, "hits"))
+        return data
+
+    _incr(_counter_key(endpoint, "misses"))
+    data = compute()
+    cache.set(key, data, _timeout())
+    return data
+
+
+def cache_metrics() -> dict:
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        hits = cache.get(_counter_key(endpoint, "hits")) or 0
+        misses = cache.get(_counter_key(endpoint, "misses")) or 0
+        total = hits + misses
+        endpoints[endpoint] = {
+            "hits": hits,
+            "misses": misses,
+            "hitRate": round(hits * 100.0 / total, 2) if total else None,
+        }
+    return {
+        "enabled": enabled(),
+        "backend": settings.CACHES.get("default", {}).get("BACKEND", ""),
+        "timeout": _timeout(),
+        "endpoints": endpoints,
+    }
+
+
+def reset_metrics() -> None:
+    cache.delete_many([_counter_key(e, k) for e in ENDPOINTS for k in ("hits", "misses")])
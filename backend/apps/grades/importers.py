@@ -0,0 +1,326 @@
+"""成绩批量导入引擎。
+
+整个文件按三个阶段处理，并分别计时：
+- parse：解析 CSV，得到与数据库无关的成绩记录
+- resolve：用少量 IN (...) 查询一次性加载学生/班级/课程，建立内存索引
+- write：补建缺失的班级/课程，在一个事务内分批 upsert 成绩
+
+预检（dry_run）只执行前两个阶段，见 ScoreImportEngine.preview。
+"""
+
+import csv
+import io
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from apps.common.imports import DRY_RUN_MAX_ERRORS, ImportFailed, decode_upload, dry_run_result, report_progress
+from apps.courses.models import Course
+from apps.grades.models import Exam, Score
+from apps.grades.results import schedule_refresh
+from apps.schools.models import Class
+from apps.students.models import Student
+
+
+# 宽表科目列；表中的“xx排名”列不入库，名次在导入提交后由 results.rank_exam_scores 统一重算
+WIDE_SUBJECTS = ["语文", "道法", "数学", "英语", "历史", "化学", "物理", "体育"]
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _pick(row: dict, keys: list[str]) -> str:
+    for k in keys:
+        if k in row and row[k]:
+            return str(row[k]).strip()
+    return ""
+
+
+def _to_float(value: str, default=None):
+    try:
+        return float(value) if value != "" else default
+    except Exception:
+        return default
+
+
+class ScoreImportEngine:
+    """按考试导入成绩（支持宽表/窄表），返回 {"created": n, "timings": {...}}。"""
+
+    def __init__(self, exam, mode: str = "append", class_id=None, batch_size: int = WRITE_BATCH_SIZE, progress=None):
+        self.exam = exam
+        self.mode = mode
+        self.class_id = class_id
+        self.batch_size = batch_size
+        self.progress = progress
+        self.timings: dict[str, float] = {}
+        self.is_wide = False
+        self.rows = 0
+        # 解析阶段跳过的行，正式导入沿用原行为不返回，仅预检时输出
+        self.errors: list[dict] = []
+
+    @contextmanager
+    def _phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def run(self, content: str) -> dict:
+        with self._phase("parse"):
+            records = self.parse(content)
+        report_progress(self.progress, 0, len(records), force=True)
+        with self._phase("resolve"):
+            index = self.resolve(records)
+        with self._phase("write"):
+            created = self.write(records, index)
+        report_progress(self.progress, len(records), len(records), force=True)
+        return {"created": created, "timings": self.timings}
+
+    def preview(self, content: str, max_errors: int = DRY_RUN_MAX_ERRORS) -> dict:
+        """预检：parse + resolve 后在内存中统计将新增/更新的成绩，不写库。
+
+        除 resolve 的 IN 查询外，仅再查询一次本场考试已有的 (学生, 课程) 组合（覆盖模式下改为统计将删除的条数）。
+        """
+        with self._phase("parse"):
+            records = self.parse(content)
+        with self._phase("resolve"):
+            index = self.resolve(records)
+            students, courses = index["students"], index["courses"]
+
+            errors = list(self.errors)
+            reported = set()
+            pairs = set()
+            for r in records:
+                student = students.get(r["student_id"])
+                if student is None:
+                    # 宽表一行拆成多条记录，同一行只报一次
+                    if r["row"] not in reported:
+                        reported.add(r["row"])
+                        errors.append({"row": r["row"], "message": f"学生不存在: {r['student_id']}"})
+                    continue
+                course = courses.get(r["course_code"])
+                pairs.add((student.pk, course.pk if course is not None else ("new", r["course_code"])))
+
+            scope = Score.objects.filter(exam=self.exam)
+            deleted = 0
+            existing = set()
+            if self.mode == "overwrite":
+                if self.class_id:
+                    scope = scope.filter(class_ref_id=self.class_id)
+                deleted = scope.count()
+            elif pairs:
+                existing = set(
+                    scope.filter(student_id__in={student_pk for student_pk, _ in pairs})
+                    .values_list("student_id", "course_id")
+                )
+        errors.sort(key=lambda e: e["row"])
+        updated = len(pairs & existing)
+        return dry_run_result(
+            rows=self.rows,
+            created=len(pairs) - updated,
+            updated=updated,
+            rejected=len({e["row"] for e in errors}),
+            errors=errors,
+            max_errors=max_errors,
+            deleted=deleted,
+            new_classes=len(index["missing_classes"]),
+            new_courses=len(index["missing_courses"]),
+            timings=self.timings,
+        )
+
+    # ---- parse ----
+    def parse(self, content: str) -> list[dict]:
+        reader = csv.DictReader(io.StringIO(content))
+        fieldnames = [h.strip() for h in (reader.fieldnames or [])]
+        self.is_wide = (
+            ("course" not in fieldnames) and ("课程" not in fieldnames)
+            and any(subj in fieldnames for subj in WIDE_SUBJECTS)
+        )
+        return self._parse_wide(reader) if self.is_wide else self._parse_narrow(reader)
+
+    def _parse_wide(self, reader) -> list[dict]:
+        records = []
+        for idx, row in enumerate(reader, start=2):  # 数据行自第2行起
+            self.rows += 1
+            if not row:
+                continue
+            student_id = _pick(row, ["student_id", "学号", "学籍号", "学籍编码", "学生编码"])
+            class_code = _pick(row, ["class_code", "班级编码"])
+            class_name = _pick(row, ["class", "class_name", "班级", "班级名称"])
+            if not (student_id and (class_code or class_name)):
+                self.errors.append({"row": idx, "message": "学号/班级不能为空"})
+                continue
+            class_key = ("code", class_code) if class_code else ("name", class_name)
+
+            for subj in WIDE_SUBJECTS:
+                score_str = (row.get(subj) or "").strip()
+                if score_str == "":
+                    continue
+                score_val = _to_float(score_str)
+                records.append({
+                    "row": idx,
+                    "student_id": student_id,
+                    "class_key": class_key,
+                    "course_code": subj,
+                    "score": score_val,
+                    "full_score": 100,
+                    "passed": (score_val or 0) >= 60,
+                })
+        # 宽表中的“总分/总分排名”及各科排名用于参考，不入库
+        return records
+
+    def _parse_narrow(self, reader) -> list[dict]:
+        records = []
+        for idx, row in enumerate(reader, start=2):
+            self.rows += 1
+            if not row:
+                continue
+            student_id = _pick(row, ["student_id", "学号"])
+            class_name = _pick(row, ["class", "class_name", "班级"])
+            course_name = _pick(row, ["course", "course_name", "课程", "学科"])
+            score_str = _pick(row, ["score", "分数"])
+            full_str = _pick(row, ["full", "full_score", "满分"]) or "100"
+            if not (student_id and course_name and class_name):
+                self.errors.append({"row": idx, "message": "学号/班级/课程不能为空"})
+                continue
+
+            score_val = _to_float(score_str)
+            full_val = _to_float(full_str, 100)
+            records.append({
+                "row": idx,
+                "student_id": student_id,
+                "class_key": ("name", class_name),
+                "course_code": course_name,
+                "score": score_val,
+                "full_score": full_val,
+                "passed": (score_val or 0) >= max(60, (full_val or 100) * 0.6),
+            })
+        return records
+
+    # ---- resolve ----
+    def resolve(self, records: list[dict]) -> dict:
+        student_ids = {r["student_id"] for r in records}
+        class_codes = {r["class_key"][1] for r in records if r["class_key"][0] == "code"}
+        class_names = {r["class_key"][1] for r in records if r["class_key"][0] == "name"}
+        course_codes = {r["course_code"] for r in records}
+
+        students = {
+            s.student_id: s
+            for s in Student.objects.filter(student_id__in=student_ids).only("id", "student_id", "name")
+        } if student_ids else {}
+
+        classes: dict[tuple, Class] = {}
+        if class_codes:
+            for c in Class.objects.filter(code__in=class_codes).only("id", "code", "name"):
+                classes[("code", c.code)] = c
+        if class_names:
+            # 允许存在同名班级：与 get_or_create 行为保持一致，取最早创建的一条
+            for c in Class.objects.filter(name__in=class_names).order_by("created_at").only("id", "code", "name"):
+                classes.setdefault(("name", c.name), c)
+
+        courses: dict[str, Course] = {}
+        if course_codes:
+            for c in Course.objects.filter(code__in=course_codes).order_by("created_at").only("id", "code", "name"):
+                courses.setdefault(c.code, c)
+
+        # 仅涉及已存在学生的行才需要补建班级/课程，避免为无效行创建脏数据
+        valid = [r for r in records if r["student_id"] in students]
+        return {
+            "students": students,
+            "classes": classes,
+            "courses": courses,
+            "missing_classes": {r["class_key"] for r in valid} - classes.keys(),
+            "missing_courses": {r["course_code"] for r in valid} - courses.keys(),
+        }
+
+    # ---- write ----
+    def write(self, records: list[dict], index: dict) -> int:
+        with transaction.atomic():
+            # 覆盖模式：先清空指定范围的旧数据
+            if self.mode == "overwrite":
+                qs_to_delete = Score.objects.filter(exam=self.exam)
+                if self.class_id:
+                    qs_to_delete = qs_to_delete.filter(class_ref_id=self.class_id)
+                qs_to_delete.delete()
+
+            self._create_missing_refs(index)
+
+            students, classes, courses = index["students"], index["classes"], index["courses"]
+            # 同一文件中重复的 (学生, 课程) 以最后一行为准，与逐行 update_or_create 一致
+            objs: dict[tuple, Score] = {}
+            created = 0
+            for r in records:
+                student = students.get(r["student_id"])
+                if student is None:
+                    continue
+                created += 1
+                cls = classes[r["class_key"]]
+                course = courses[r["course_code"]]
+                objs[(student.pk, course.pk)] = Score(
+                    exam=self.exam,
+                    student=student,
+                    course=course,
+                    class_ref=cls,
+                    score=r["score"],
+                    full_score=r["full_score"],
+                    student_name=student.name,
+                    class_name=cls.name,
+                    course_name=course.name,
+                    passed=r["passed"],
+                )
+            if objs:
+                Score.objects.bulk_create(list(objs.values()), batch_size=self.batch_size, **self._upsert_options())
+                # bulk_create 不触发信号，显式登记汇总表刷新；覆盖删除的学生已由 post_delete 登记
+                schedule_refresh(self.exam.id, {student_pk for student_pk, _ in objs})
+        return created
+
+    def _create_missing_refs(self, index: dict) -> None:
+        grade = self.exam.grade
+        new_classes = []
+        for kind, value in sorted(index["missing_classes"]):
+            # 按编码补建的班级名称与编码相同，同名行直接复用，避免编码冲突
+            same = index["classes"].get(("code", value))
+            if kind == "name" and same is not None and same.name == value:
+                index["classes"][(kind, value)] = same
+                continue
+            cls = Class(code=value, name=value, grade=grade)
+            index["classes"][(kind, value)] = cls
+            new_classes.append(cls)
+        if new_classes:
+            Class.objects.bulk_create(new_classes, batch_size=self.batch_size)
+
+        new_courses = []
+        for code in sorted(index["missing_courses"]):
+            course = Course(code=code, name=code, category="必修", weekly_hours=0)
+            index["courses"][code] = course
+            new_courses.append(course)
+        if new_courses:
+            Course.objects.bulk_create(new_courses, batch_size=self.batch_size)
+
+    def _upsert_options(self) -> dict:
+        # 名次不在此写入：提交后 schedule_refresh 按全部成绩重算班级/年级名次
+        update_fields = ["class_ref", "score", "full_score", "student_name", "class_name", "course_name", "passed", "updated_at"]
+        options = {"update_conflicts": True, "update_fields": update_fields}
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不支持指定冲突列，依赖 unique_together 即可
+        if connection.features.supports_update_conflicts_with_target:
+            options["unique_fields"] = ["exam", "student", "course"]
+        return options
+
+
+def run_import(raw: bytes, filename: str = "", params: dict | None = None, progress=None) -> dict:
+    params = params or {}
+    content = decode_upload(raw, "文件解码失败")
+    exam = Exam.objects.select_related("grade").filter(id=params.get("exam_id")).first()
+    if exam is None:
+        raise ImportFailed("NOT_FOUND", "考试不存在", status=404)
+    engine = ScoreImportEngine(
+        exam,
+        mode=(params.get("mode") or "append").lower(),
+        class_id=params.get("class_id") or None,
+        progress=progress,
+    )
+    if params.get("dry_run"):
+        return engine.preview(content, max_errors=params.get("max_errors") or DRY_RUN_MAX_ERRORS)
+    result = engine.run(content)
+    return {"data": result, "errors": [], "rows": result["created"]}
@@ -0,0 +1,134 @@
+import json
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.courses.models import Course
+from apps.grades.analytics import AnalyticsParams, compute_analytics, compute_analytics_legacy
+from apps.grades.models import Exam, Score
+from apps.schools.models import Class, Grade
+from apps.students.models import Student
+
+
+COURSE_NAMES = ["语文", "数学", "英语", "道法", "历史", "物理", "化学", "地理", "生物", "体育"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "对比成绩分析（一分四率）新旧实现的耗时与结果；默认生成临时考试数据，结束后回滚"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scores", type=int, default=50000, help="生成的成绩条数（默认 50000）")
+        parser.add_argument("--classes", type=int, default=20, help="生成的班级数（默认 20）")
+        parser.add_argument("--exam", help="改为使用已有考试（ID 或编码），不生成数据")
+        parser.add_argument("--repeat", type=int, default=3, help="每种实现重复次数，取最好成绩")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options["exam"]:
+            exam = Exam.objects.filter(code=options["exam"]).first()
+            if exam is None:
+                try:
+                    exam = Exam.objects.filter(id=options["exam"]).first()
+                except Exception:
+                    exam = None
+            if exam is None:
+                raise CommandError(f"考试不存在: {options['exam']}")
+            self._compare(exam, options["repeat"])
+            return
+
+        try:
+            with transaction.atomic():
+                exam = self._generate(options["scores"], options["classes"], options["seed"])
+                self._compare(exam, options["repeat"])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("临时数据已回滚")
+
+    def _generate(self, total: int, class_count: int, seed: int) -> Exam:
+        rnd = random.Random(seed)
+        tag = uuid.uuid4().hex[:6]
+        started = time.perf_counter()
+
+        grade = Grade.objects.create(name=f"基准{tag}")
+        classes = Class.objects.bulk_create(
+            [Class(code=f"BM{tag}{i:03d}", name=f"基准{i}班", grade=grade) for i in range(1, class_count + 1)]
+        )
+        courses = Course.objects.bulk_create(
+            [Course(code=f"BM{tag}{i:02d}", name=name, weekly_hours=0) for i, name in enumerate(COURSE_NAMES)]
+        )
+        student_count = max(1, total // len(courses))
+        students = Student.objects.bulk_create(
+            [
+                Student(
+                    student_id=f"BM{tag}{i:06d}",
+                    name=f"学生{i}",
+                    gender=rnd.choice(["男", "女"]),
+                    current_class=classes[i % len(classes)],
+                )
+                for i in range(student_count)
+            ],
+            batch_size=2000,
+        )
+        exam = Exam.objects.create(code=f"BM{tag}", name="分析基准", term="benchmark", grade=grade)
+
+        scores = []
+        for st in students:
+            cls = st.current_class
+            for course in courses:
+                if len(scores) >= total:
+                    break
+                full = Decimal(150) if course.name in ("语文", "数学", "英语") else Decimal(100)
+                value = None
+                if rnd.random() > 0.02:
+                    # 0.5 分粒度，贴近实际阅卷
+                    value = Decimal(rnd.randint(0, int(full) * 2)) / 2
+                scores.append(
+                    Score(
+                        exam=exam,
+                        student=st,
+                        course=course,
+                        class_ref=cls,
+                        score=value,
+                        full_score=full,
+                        student_name=st.name,
+                        class_name=cls.name,
+                        course_name=course.name,
+                        passed=value is not None and value >= full * Decimal("0.6"),
+                    )
+                )
+        Score.objects.bulk_create(scores, batch_size=2000)
+        self.stdout.write(
+            f"生成考试 {exam.code}: {len(classes)} 个班级，{len(students)} 名学生，{len(scores)} 条成绩，"
+            f"{(time.perf_counter() - started):.1f} s"
+        )
+        return exam
+
+    def _compare(self, exam: Exam, repeat: int) -> None:
+        params = AnalyticsParams(exam_id=str(exam.id))
+        timings = {}
+        outputs = {}
+        for label, fn in (("legacy", compute_analytics_legacy), ("sql", compute_analytics)):
+            best = None
+            for _ in range(max(1, repeat)):
+                t0 = time.perf_counter()
+                outputs[label] = fn(params)
+                elapsed = (time.perf_counter() - t0) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+            self.stdout.write(f"{label:>6}: {best:9.1f} ms（{len(outputs[label])} 组）")
+
+        same = json.dumps(outputs["legacy"], ensure_ascii=False) == json.dumps(outputs["sql"], ensure_ascii=False)
+        speedup = timings["legacy"] / timings["sql"] if timings["sql"] else 0
+        self.stdout.write(f"加速比: {speedup:.1f}x")
+        if same:
+            self.stdout.write(self.style.SUCCESS("新旧结果一致"))
+        else:
+            self.stdout.write(self.style.ERROR("新旧结果不一致"))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.grades.models import Exam
+from apps.grades.results import refresh_exam_results
+
+
+class Command(BaseCommand):
+    help = "重算各科班内/年级名次并重建考试成绩汇总表（ExamResult）"
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--exam", help="考试ID或考试编码")
+        group.add_argument("--all", action="store_true", help="重建全部考试")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            exams = list(Exam.objects.order_by("created_at").only("id", "code", "name"))
+        else:
+            value = options["exam"]
+            exam = Exam.objects.filter(code=value).first()
+            if exam is None:
+                try:
+                    exam = Exam.objects.filter(id=value).first()
+                except Exception:
+                    exam = None
+            if exam is None:
+                raise CommandError(f"考试不存在: {value}")
+            exams = [exam]
+
+        total_rows = 0
+        started = time.perf_counter()
+        for exam in exams:
+            t0 = time.perf_counter()
+            stats = refresh_exam_results(exam.id)
+            total_rows += stats["rebuilt"]
+            self.stdout.write(
+                f"{exam.code} {exam.name}: {stats['rebuilt']} 名学生，"
+                f"更新名次 {stats['ranked']} 条（{stats['rank_ms']:.1f} ms），"
+                f"总耗时 {(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"完成：{len(exams)} 场考试，{total_rows} 行，耗时 {(time.perf_counter() - started):.2f} s"
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schools', '0002_class_head_teacher'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('students', '0002_rename_student_student_id_idx_students_student_1ff8ed_idx_and_more'),
+        ('grades', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamResult',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('student_no', models.CharField(max_length=32, verbose_name='学号')),
+                ('student_name', models.CharField(max_length=64, verbose_name='学生姓名')),
+                ('class_name', models.CharField(max_length=64, verbose_name='班级名称')),
+                ('total', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='总分')),
+                ('rank_in_class', models.PositiveIntegerField(blank=True, null=True, verbose_name='班内总分排名')),
+                ('rank_in_grade', models.PositiveIntegerField(blank=True, null=True, verbose_name='年级总分排名')),
+                ('subjects', models.JSONField(blank=True, default=dict, verbose_name='各科成绩')),
+                ('class_ref', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='exam_results', to='schools.class', verbose_name='班级')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='grades.exam', verbose_name='考试')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_results', to='students.student', verbose_name='学生')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '考试成绩汇总',
+                'verbose_name_plural': '考试成绩汇总',
+                'db_table': 'exam_results',
+                'indexes': [models.Index(fields=['exam', 'class_name', 'student_no'], name='exam_result_exam_id_efb484_idx'), models.Index(fields=['exam', 'class_ref'], name='exam_result_exam_id_7f264c_idx')],
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0002_examresult'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['created_at', 'id'], name='scores_created_7af7bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['exam', 'created_at', 'id'], name='scores_exam_id_a12109_idx'),
+        ),
+    ]
@@ -50,9 +50,38 @@ class Score(BaseModel):
             models.Index(fields=["exam", "class_ref"]),
             models.Index(fields=["student"]),
             models.Index(fields=["course"]),
+            # 键集分页：全量列表与按考试筛选的列表
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["exam", "created_at", "id"]),
         ]
         unique_together = ("exam", "student", "course")
         verbose_name = "成绩"
         verbose_name_plural = "成绩"
 
 
+class ExamResult(BaseModel):
+    """考试成绩汇总（每名学生一行），由 apps.grades.results 随成绩变更增量维护。"""
+
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="results", verbose_name="考试")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="exam_results", verbose_name="学生")
+    class_ref = models.ForeignKey("schools.Class", on_delete=models.PROTECT, related_name="exam_results", verbose_name="班级")
+
+    student_no = models.CharField(max_length=32, verbose_name="学号")
+    student_name = models.CharField(max_length=64, verbose_name="学生姓名")
+    class_name = models.CharField(max_length=64, verbose_name="班级名称")
+
+    total = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, verbose_name="总分")
+    rank_in_class = models.PositiveIntegerField(null=True, blank=True, verbose_name="班内总分排名")
+    rank_in_grade = models.PositiveIntegerField(null=True, blank=True, verbose_name="年级总分排名")
+    # {"chinese": {"score": 88.0, "rank_in_class": 3, "rank_in_grade": 25}, ...}
+    subjects = models.JSONField(default=dict, blank=True, verbose_name="各科成绩")
+
+    class Meta:
+        db_table = "exam_results"
+        indexes = [
+            models.Index(fields=["exam", "class_name", "student_no"]),
+            models.Index(fields=["exam", "class_ref"]),
+        ]
+        unique_together = ("exam", "student")
+        verbose_name = "考试成绩汇总"
+        verbose_name_plural = "考试成绩汇总"
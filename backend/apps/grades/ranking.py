@@ -0,0 +1,105 @@
+"""成绩排名：按考试计算每条成绩的班内/年级名次（同分并列，1,1,3）。
+
+MySQL 8 上用一条 RANK() OVER (PARTITION BY ...) 的 UPDATE ... JOIN 完成；
+其他数据库（如测试用的 SQLite）退回到 Python 计算后 bulk_update。
+只改写名次发生变化的行，无分数的成绩名次置空。
+"""
+
+import logging
+import time
+
+from django.db import connection
+
+from apps.grades.models import Score
+
+
+logger = logging.getLogger(__name__)
+
+
+def competition_ranks(items) -> dict:
+    """items 为 [(key, value)]，按 value 降序并列排名，value 为 None 的不参与。"""
+    ranks = {}
+    ordered = sorted((it for it in items if it[1] is not None), key=lambda it: -it[1])
+    last_value = None
+    last_rank = 0
+    for i, (key, value) in enumerate(ordered, start=1):
+        if value != last_value:
+            last_rank = i
+            last_value = value
+        ranks[key] = last_rank
+    return ranks
+
+
+_RANKED = """
+    SELECT id, student_id, rank_in_class, rank_in_grade,
+           CASE WHEN score IS NULL THEN NULL
+                ELSE RANK() OVER (PARTITION BY course_id, class_ref_id ORDER BY score DESC) END AS new_class,
+           CASE WHEN score IS NULL THEN NULL
+                ELSE RANK() OVER (PARTITION BY course_id ORDER BY score DESC) END AS new_grade
+    FROM scores
+    WHERE exam_id = %s
+"""
+
+_CHANGED = "NOT (r.rank_in_class <=> r.new_class) OR NOT (r.rank_in_grade <=> r.new_grade)"
+
+
+def rank_exam_scores(exam_id) -> dict:
+    """重算一场考试全部成绩的名次。
+
+    返回 {"rows": 改写行数, "elapsed_ms": 耗时, "student_ids": 名次变化的学生}。
+    """
+    started = time.perf_counter()
+    if connection.vendor == "mysql":
+        rows, student_ids = _rank_mysql(exam_id)
+    else:
+        rows, student_ids = _rank_python(exam_id)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("ranked exam %s: %s rows updated in %.2f ms", exam_id, rows, elapsed_ms)
+    return {"rows": rows, "elapsed_ms": elapsed_ms, "student_ids": student_ids}
+
+
+def _rank_mysql(exam_id) -> tuple[int, set]:
+    exam_key = Score._meta.get_field("exam").get_db_prep_value(exam_id, connection)
+    with connection.cursor() as cursor:
+        # 先取出名次将变化的学生，供汇总表增量刷新
+        cursor.execute(f"SELECT DISTINCT r.student_id FROM ({_RANKED}) r WHERE {_CHANGED}", [exam_key])
+        student_ids = {row[0] for row in cursor.fetchall()}
+        if not student_ids:
+            return 0, set()
+        cursor.execute(
+            f"""
+            UPDATE scores s
+            JOIN ({_RANKED}) r ON r.id = s.id
+            SET s.rank_in_class = r.new_class, s.rank_in_grade = r.new_grade
+            WHERE {_CHANGED}
+            """,
+            [exam_key],
+        )
+        return cursor.rowcount, student_ids
+
+
+def _rank_python(exam_id) -> tuple[int, set]:
+    rows = list(
+        Score.objects.filter(exam_id=exam_id).values_list(
+            "id", "student_id", "course_id", "class_ref_id", "score", "rank_in_class", "rank_in_grade"
+        )
+    )
+    by_course, by_class = {}, {}
+    for pk, _sid, course_id, class_id, score, _rc, _rg in rows:
+        by_course.setdefault(course_id, []).append((pk, score))
+        by_class.setdefault((course_id, class_id), []).append((pk, score))
+    grade_ranks, class_ranks = {}, {}
+    for items in by_course.values():
+        grade_ranks.update(competition_ranks(items))
+    for items in by_class.values():
+        class_ranks.update(competition_ranks(items))
+
+    changed, student_ids = [], set()
+    for pk, sid, _course_id, _class_id, _score, rank_in_class, rank_in_grade in rows:
+        new_class, new_grade = class_ranks.get(pk), grade_ranks.get(pk)
+        if new_class != rank_in_class or new_grade != rank_in_grade:
+            changed.append(Score(id=pk, rank_in_class=new_class, rank_in_grade=new_grade))
+            student_ids.add(sid)
+    if changed:
+        Score.objects.bulk_update(changed, ["rank_in_class", "rank_in_grade"], batch_size=1000)
+    return len(changed), student_ids
@@ -0,0 +1,175 @@
+"""考试成绩汇总表（ExamResult）的维护。
+
+成绩变更时先重算整场考试各科名次（apps.grades.ranking），再只重建成绩或名次
+有变化的学生的汇总行，最后在内存中对整场考试重排总分名次，仅回写名次变化的行。
+Score 的增删改通过信号登记，事务提交后统一刷新；
+bulk_create 等不触发信号的批量写入需自行调用 schedule_refresh。
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+
+from apps.common.transactions import merge_on_commit
+from apps.grades.cache import bump_exam_version
+from apps.grades.models import ExamResult, Score
+from apps.grades.ranking import competition_ranks, rank_exam_scores
+
+
+# 课程名称 → 汇总中的学科键
+SUBJECT_MAP = {
+    "语文": "chinese",
+    "数学": "math",
+    "英语": "english",
+    "道法": "daofa",
+    "道德与法治": "daofa",
+    "思想品德": "daofa",
+    "历史": "history",
+    "物理": "physics",
+    "化学": "chemistry",
+    "地理": "geography",
+    "生物": "biology",
+}
+
+SUBJECT_KEYS = [
+    "chinese",
+    "math",
+    "english",
+    "daofa",
+    "history",
+    "physics",
+    "chemistry",
+    "geography",
+    "biology",
+]
+
+ALL_STUDENTS = object()
+
+
+def schedule_refresh(exam_id, student_ids=None) -> None:
+    """登记待刷新的考试/学生，当前事务提交后统一刷新（无事务时立即执行）。
+
+    student_ids 为空表示整场考试重建。同一事务内的登记合并为一次刷新；事务回滚时登记一并丢弃。
+    """
+    key = str(exam_id)
+    student_ids = None if student_ids is None else {str(s) for s in student_ids}
+
+    def merge(pending: dict) -> None:
+        if student_ids is None:
+            pending[key] = ALL_STUDENTS
+        elif pending.get(key) is not ALL_STUDENTS:
+            pending.setdefault(key, set()).update(student_ids)
+
+    merge_on_commit("grades.refresh", merge, flush_pending)
+
+
+def flush_pending(pending: dict) -> None:
+    for exam_id, students in pending.items():
+        refresh_exam_results(exam_id, None if students is ALL_STUDENTS else students)
+
+
+def refresh_exam_results(exam_id, student_ids=None) -> dict:
+    """重排各科名次，重算指定学生（默认整场考试）的汇总行并重排总分名次。返回写入统计。"""
+    with transaction.atomic():
+        ranking = rank_exam_scores(exam_id)
+        if student_ids is not None:
+            # 名次变化的学生汇总行中的各科名次也需更新
+            student_ids = set(student_ids) | {str(s) for s in ranking["student_ids"]}
+        rebuilt = _rebuild_rows(exam_id, student_ids)
+        reranked = _rerank(exam_id)
+    # 数据已变化，令该考试的统计缓存失效
+    transaction.on_commit(lambda: bump_exam_version(exam_id))
+    return {
+        "ranked": ranking["rows"],
+        "rank_ms": ranking["elapsed_ms"],
+        "rebuilt": rebuilt,
+        "reranked": reranked,
+    }
+
+
+def _rebuild_rows(exam_id, student_ids=None) -> int:
+    scores = Score.objects.filter(exam_id=exam_id)
+    results = ExamResult.objects.filter(exam_id=exam_id)
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+        scores = scores.filter(student_id__in=student_ids)
+        results = results.filter(student_id__in=student_ids)
+
+    rows: dict = {}
+    for s in scores.values(
+        "student_id", "student__student_id", "student__name", "student_name",
+        "class_ref_id", "class_ref__name", "class_name",
+        "course_name", "course__name", "score", "rank_in_class", "rank_in_grade",
+    ).order_by("created_at"):
+        sid = s["student_id"]
+        row = rows.get(sid)
+        if row is None:
+            row = rows[sid] = ExamResult(
+                exam_id=exam_id,
+                student_id=sid,
+                class_ref_id=s["class_ref_id"],
+                student_no=s["student__student_id"],
+                student_name=s["student_name"] or s["student__name"],
+                class_name=s["class_name"] or s["class_ref__name"],
+                subjects={},
+            )
+        key = SUBJECT_MAP.get((s["course_name"] or s["course__name"] or "").strip())
+        if not key:
+            continue
+        row.subjects[key] = {
+            "score": float(s["score"]) if s["score"] is not None else None,
+            "rank_in_class": s["rank_in_class"],
+            "rank_in_grade": s["rank_in_grade"],
+        }
+
+    for row in rows.values():
+        values = [v["score"] for v in row.subjects.values() if v["score"] is not None]
+        row.total = round(sum(values), 2) if values else None
+
+    results.delete()
+    ExamResult.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def _rerank(exam_id) -> int:
+    current = list(
+        ExamResult.objects.filter(exam_id=exam_id).values_list(
+            "id", "class_ref_id", "total", "rank_in_class", "rank_in_grade"
+        )
+    )
+    by_class = defaultdict(list)
+    for pk, class_id, total, _rc, _rg in current:
+        by_class[class_id].append((pk, total))
+    grade_ranks = competition_ranks([(pk, total) for pk, _c, total, _rc, _rg in current])
+    class_ranks = {}
+    for items in by_class.values():
+        class_ranks.update(competition_ranks(items))
+
+    changed = []
+    for pk, _class_id, _total, rank_in_class, rank_in_grade in current:
+        new_class, new_grade = class_ranks.get(pk), grade_ranks.get(pk)
+        if new_class != rank_in_class or new_grade != rank_in_grade:
+            changed.append(ExamResult(id=pk, rank_in_class=new_class, rank_in_grade=new_grade))
+    if changed:
+        ExamResult.objects.bulk_update(changed, ["rank_in_class", "rank_in_grade"], batch_size=1000)
+    return len(changed)
+
+
+def summary_row(result: ExamResult, rank_mode: str = "class") -> dict:
+    """转换为 /scores/summary/ 的行结构。"""
+    rank_field = "rank_in_class" if rank_mode == "class" else "rank_in_grade"
+    row = {
+        "id": str(result.student_id),
+        "studentId": result.student_no,
+        "studentName": result.student_name,
+        "className": result.class_name,
+    }
+    for key in SUBJECT_KEYS:
+        item = result.subjects.get(key) or {}
+        row[key] = item.get("score")
+        row[f"{key}Rank"] = item.get(rank_field)
+    row["total"] = float(result.total) if result.total is not None else None
+    row["totalRank"] = getattr(result, rank_field)
+    return row
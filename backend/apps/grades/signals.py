@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.grades.models import Score
+from apps.grades.results import schedule_refresh
+
+
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def refresh_exam_result_on_score_change(sender, instance: Score, **kwargs):
+    schedule_refresh(instance.exam_id, [instance.student_id])
@@ -0,0 +1 @@
+# imports app package
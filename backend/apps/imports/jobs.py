@@ -0,0 +1,179 @@
+"""导入任务的提交与执行。
+
+上传接口默认异步（携带 async=false 时在请求内同步导入）：文件先落盘为 ImportJob，再交给 Celery 执行，
+接口返回 202 与任务ID，前端轮询 /import-jobs/<id>/；
+CELERY_TASK_ALWAYS_EAGER=True 时在当前进程内同步执行（开发/测试）。
+执行中的进度写入缓存（导入本身处于事务中，写库的进度对轮询方不可见），结束后落库。
+上传文件存放在私有目录（见 models.import_storage），任务结束（成功或失败）即删除；
+执行进程崩溃时任务停留在 RUNNING，超过 IMPORT_JOB_TIMEOUT 后在查询任务时标记为失败。
+"""
+
+import datetime as dt
+import logging
+import time
+
+from django.conf import settings
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.common.imports import ImportFailed
+from apps.imports.models import ImportJob
+
+
+logger = logging.getLogger(__name__)
+
+IMPORTERS = {
+    ImportJob.Kind.STUDENTS: "apps.students.importers.run_import",
+    ImportJob.Kind.TEACHERS: "apps.teachers.importers.run_import",
+    ImportJob.Kind.CLASSES: "apps.schools.importers.run_import",
+    ImportJob.Kind.SCORES: "apps.grades.importers.run_import",
+    ImportJob.Kind.TIMETABLE: "apps.timetable.importers.run_import",
+}
+
+# 错误明细最多保留条数
+MAX_STORED_ERRORS = 200
+PROGRESS_TTL = 6 * 3600
+
+
+def wants_async(request) -> bool:
+    """文件上传默认走导入任务，async=0/false/no 时同步导入。"""
+    value = request.data.get("async") or request.query_params.get("async") or ""
+    return str(value).lower() not in {"0", "false", "no"}
+
+
+def progress_key(job_id) -> str:
+    return f"imports:job:{job_id}:progress"
+
+
+def submit_import_job(request, kind: str, file, params: dict | None = None) -> ImportJob:
+    from apps.imports.tasks import run_import_job
+
+    user = getattr(request, "user", None)
+    job = ImportJob.objects.create(
+        kind=kind,
+        file=file,
+        original_name=getattr(file, "name", "") or "",
+        params=params or {},
+        created_by=user if getattr(user, "is_authenticated", False) else None,
+    )
+    job_id = str(job.id)
+    transaction.on_commit(lambda: run_import_job.delay(job_id))
+    return job
+
+
+def job_accepted_response(job: ImportJob) -> Response:
+    job.refresh_from_db()
+    return Response(
+        {
+            "success": True,
+            "data": {"job_id": str(job.id), "status": job.status},
+            "message": "导入任务已提交",
+            "timestamp": timezone.now().isoformat(),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def run_job(job_id) -> None:
+    # 条件更新认领任务：重复投递或多个 worker 同时拿到同一任务时，只有一个能把 PENDING 改为 RUNNING
+    now = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job_id, status=ImportJob.Status.PENDING).update(
+        status=ImportJob.Status.RUNNING, started_at=now, updated_at=now
+    )
+    if not claimed:
+        return
+    job = ImportJob.objects.get(pk=job_id)
+
+    key = progress_key(job.id)
+    last_flush = [0.0]
+
+    def progress(processed, total=None):
+        now = time.monotonic()
+        if now - last_flush[0] < 0.5 and total is None:
+            return
+        last_flush[0] = now
+        cache.set(key, {"processed": processed, "total": total}, PROGRESS_TTL)
+
+    try:
+        importer = import_string(IMPORTERS[job.kind])
+        with job.file.open("rb") as fh:
+            raw = fh.read()
+        outcome = importer(raw, job.original_name, job.params, progress=progress)
+    except ImportFailed as exc:
+        _finish(job, ImportJob.Status.FAILED, message=exc.message, errors=exc.details or [])
+    except Exception as exc:
+        logger.exception("import job %s failed", job.id)
+        _finish(job, ImportJob.Status.FAILED, message=str(exc)[:255])
+    else:
+        _finish(
+            job,
+            ImportJob.Status.SUCCEEDED,
+            result=outcome.get("data") or {},
+            errors=outcome.get("errors") or [],
+            rows=outcome.get("rows") or 0,
+        )
+    finally:
+        cache.delete(key)
+
+
+def _finish(job: ImportJob, status_value: str, message: str = "", result=None, errors=None, rows=None) -> None:
+    errors = list(errors) if isinstance(errors, (list, tuple)) else ([errors] if errors else [])
+    job.status = status_value
+    job.message = message
+    job.result = result or {}
+    job.error_count = len(errors)
+    job.errors = errors[:MAX_STORED_ERRORS]
+    if rows is not None:
+        job.rows_total = rows
+        job.rows_processed = rows
+    job.finished_at = timezone.now()
+    _delete_file(job)
+    job.save(
+        update_fields=[
+            "status", "message", "result", "error_count", "errors",
+            "rows_total", "rows_processed", "finished_at", "file", "updated_at",
+        ]
+    )
+
+
+def _delete_file(job: ImportJob) -> None:
+    if not job.file:
+        return
+    try:
+        job.file.delete(save=False)
+    except OSError:
+        logger.warning("failed to delete import file of job %s", job.id, exc_info=True)
+
+
+def _job_timeout() -> int:
+    return getattr(settings, "IMPORT_JOB_TIMEOUT", 30 * 60)
+
+
+def fail_if_stale(job: ImportJob) -> bool:
+    """RUNNING 超过 IMPORT_JOB_TIMEOUT 的任务（执行进程已退出）标记为失败，返回是否标记。"""
+    if job.status != ImportJob.Status.RUNNING or job.started_at is None:
+        return False
+    if timezone.now() - job.started_at < dt.timedelta(seconds=_job_timeout()):
+        return False
+    _finish(job, ImportJob.Status.FAILED, message="导入超时：执行进程可能已退出，请重新导入")
+    return True
+
+
+def expire_stale_jobs() -> int:
+    deadline = timezone.now() - dt.timedelta(seconds=_job_timeout())
+    stale = ImportJob.objects.filter(status=ImportJob.Status.RUNNING, started_at__lt=deadline)
+    return sum(fail_if_stale(job) for job in stale)
+
+
+def live_progress(job: ImportJob) -> tuple[int, int | None]:
+    """执行中的任务优先读取缓存中的实时进度。"""
+    if job.status == ImportJob.Status.RUNNING:
+        data = cache.get(progress_key(job.id))
+        if data:
+            return data.get("processed") or 0, data.get("total")
+    return job.rows_processed, job.rows_total
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('kind', models.CharField(choices=[('students', '学生'), ('teachers', '教师'), ('classes', '班级'), ('scores', '成绩'), ('timetable', '课程表')], max_length=16, verbose_name='导入类型')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '导入中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=16, verbose_name='状态')),
+                ('file', models.FileField(upload_to='imports/%Y%m/', verbose_name='导入文件')),
+                ('original_name', models.CharField(blank=True, default='', max_length=255, verbose_name='原始文件名')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='导入参数')),
+                ('rows_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='总行数')),
+                ('rows_processed', models.PositiveIntegerField(default=0, verbose_name='已处理行数')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='错误数')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='错误明细')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='导入结果')),
+                ('message', models.CharField(blank=True, default='', max_length=255, verbose_name='说明')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '导入任务',
+                'verbose_name_plural': '导入任务',
+                'db_table': 'import_jobs',
+                'indexes': [models.Index(fields=['kind', 'created_at'], name='import_jobs_kind_ed3e11_idx'), models.Index(fields=['status'], name='import_jobs_status_46b7f9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:15
+
+import apps.imports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(storage=apps.imports.models.import_storage, upload_to=apps.imports.models.import_upload_to, verbose_name='导入文件'),
+        ),
+    ]
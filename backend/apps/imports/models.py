@@ -0,0 +1,77 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+
+from apps.common.models import BaseModel
+
+
+class PrivateImportStorage(FileSystemStorage):
+    """导入文件的私有存储：位于 MEDIA_ROOT 之外（IMPORT_FILES_ROOT，每次读取设置），没有对外 URL。"""
+
+    @property
+    def base_location(self):
+        return settings.IMPORT_FILES_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError("导入文件不提供访问地址")
+
+
+def import_storage() -> FileSystemStorage:
+    return PrivateImportStorage()
+
+
+def import_upload_to(instance, filename: str) -> str:
+    # 不沿用原始文件名（原名记录在 original_name），只保留扩展名供解析器识别格式
+    ext = os.path.splitext(filename)[1].lower()[:10]
+    return f"{timezone.now():%Y%m}/{uuid.uuid4().hex}{ext}"
+
+
+class ImportJob(BaseModel):
+    class Kind(models.TextChoices):
+        STUDENTS = "students", "学生"
+        TEACHERS = "teachers", "教师"
+        CLASSES = "classes", "班级"
+        SCORES = "scores", "成绩"
+        TIMETABLE = "timetable", "课程表"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "排队中"
+        RUNNING = "running", "导入中"
+        SUCCEEDED = "succeeded", "已完成"
+        FAILED = "failed", "失败"
+
+    kind = models.CharField(max_length=16, choices=Kind.choices, verbose_name="导入类型")
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING, verbose_name="状态")
+    file = models.FileField(storage=import_storage, upload_to=import_upload_to, verbose_name="导入文件")
+    original_name = models.CharField(max_length=255, blank=True, default="", verbose_name="原始文件名")
+    params = models.JSONField(default=dict, blank=True, verbose_name="导入参数")
+
+    rows_total = models.PositiveIntegerField(null=True, blank=True, verbose_name="总行数")
+    rows_processed = models.PositiveIntegerField(default=0, verbose_name="已处理行数")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="错误数")
+    errors = models.JSONField(default=list, blank=True, verbose_name="错误明细")
+    result = models.JSONField(default=dict, blank=True, verbose_name="导入结果")
+    message = models.CharField(max_length=255, blank=True, default="", verbose_name="说明")
+
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="开始时间")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="结束时间")
+
+    class Meta:
+        db_table = "import_jobs"
+        indexes = [
+            models.Index(fields=["kind", "created_at"]),
+            models.Index(fields=["status"]),
+        ]
+        verbose_name = "导入任务"
+        verbose_name_plural = "导入任务"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.get_kind_display()} {self.original_name}({self.get_status_display()})"
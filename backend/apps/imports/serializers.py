@@ -0,0 +1,63 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.imports.jobs import live_progress
+from apps.imports.models import ImportJob
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    rows_processed = serializers.SerializerMethodField()
+    rows_total = serializers.SerializerMethodField()
+    elapsed_ms = serializers.SerializerMethodField()
+    throughput = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "original_name",
+            "params",
+            "rows_total",
+            "rows_processed",
+            "error_count",
+            "errors",
+            "result",
+            "message",
+            "elapsed_ms",
+            "throughput",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+    def _progress(self, obj: ImportJob):
+        cached = getattr(obj, "_live_progress", None)
+        if cached is None:
+            cached = live_progress(obj)
+            obj._live_progress = cached
+        return cached
+
+    def get_rows_processed(self, obj: ImportJob):
+        return self._progress(obj)[0]
+
+    def get_rows_total(self, obj: ImportJob):
+        return self._progress(obj)[1]
+
+    def _elapsed_seconds(self, obj: ImportJob):
+        if not obj.started_at:
+            return None
+        end = obj.finished_at or timezone.now()
+        return max((end - obj.started_at).total_seconds(), 0.0)
+
+    def get_elapsed_ms(self, obj: ImportJob):
+        seconds = self._elapsed_seconds(obj)
+        return round(seconds * 1000) if seconds is not None else None
+
+    def get_throughput(self, obj: ImportJob):
+        """每秒处理行数。"""
+        seconds = self._elapsed_seconds(obj)
+        if not seconds:
+            return None
+        return round(self._progress(obj)[0] / seconds, 1)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from apps.imports.jobs import run_job
+
+
+@shared_task(name="imports.run_import_job", ignore_result=True)
+def run_import_job(job_id: str) -> None:
+    run_job(job_id)
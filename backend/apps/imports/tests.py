@@ -0,0 +1,71 @@
+import datetime as dt
+
+import pytest
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from apps.imports.jobs import run_job
+from apps.imports.models import ImportJob
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def import_root(settings, tmp_path):
+    settings.IMPORT_FILES_ROOT = tmp_path / "imports"
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.IMPORT_FILES_ROOT
+
+
+def _job(name="students.csv", **fields) -> ImportJob:
+    content = "学号,姓名,性别,班级\nS0001,张三,男,1班\n".encode("utf-8")
+    return ImportJob.objects.create(
+        kind=ImportJob.Kind.STUDENTS, file=ContentFile(content, name=name), original_name=name, **fields
+    )
+
+
+def test_upload_is_private_and_renamed(import_root, settings):
+    job = _job()
+    path = job.file.path
+    assert path.startswith(str(import_root))
+    assert not path.startswith(str(settings.MEDIA_ROOT))
+    assert "students" not in job.file.name
+    assert job.file.name.endswith(".csv")
+    with pytest.raises(ValueError):
+        job.file.url
+
+
+@pytest.mark.parametrize("name", ["students.csv", "students.bin"])
+def test_file_deleted_when_job_finishes(import_root, name):
+    # .bin 无法解析，任务失败时同样删除文件
+    job = _job(name)
+    run_job(job.id)
+    job.refresh_from_db()
+    assert job.status in {ImportJob.Status.SUCCEEDED, ImportJob.Status.FAILED}
+    assert not job.file
+    assert not any(p.is_file() for p in import_root.rglob("*"))
+
+
+def test_job_is_claimed_once(monkeypatch):
+    job = _job()
+    ImportJob.objects.filter(pk=job.pk).update(status=ImportJob.Status.RUNNING)
+    run_job(job.id)
+    job.refresh_from_db()
+    assert job.status == ImportJob.Status.RUNNING
+    assert job.file
+
+
+def test_stale_running_job_fails_on_poll(admin_api_client, settings):
+    settings.IMPORT_JOB_TIMEOUT = 60
+    job = _job(status=ImportJob.Status.RUNNING, started_at=timezone.now() - dt.timedelta(minutes=5))
+    fresh = _job(status=ImportJob.Status.RUNNING, started_at=timezone.now())
+
+    data = admin_api_client.get(f"/api/v1/import-jobs/{job.id}/").json()["data"]
+    assert data["status"] == ImportJob.Status.FAILED
+    assert data["message"].startswith("导入超时")
+    fresh.refresh_from_db()
+    assert fresh.status == ImportJob.Status.RUNNING
+
+    job.refresh_from_db()
+    assert not job.file
@@ -0,0 +1,9 @@
+from rest_framework.routers import DefaultRouter
+
+from .views import ImportJobViewSet
+
+
+router = DefaultRouter()
+router.register(r"import-jobs", ImportJobViewSet, basename="import-job")
+
+urlpatterns = router.urls
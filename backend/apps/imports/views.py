@@ -0,0 +1,42 @@
+from django.utils import timezone
+from rest_framework import viewsets, filters
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from django_filters.rest_framework import DjangoFilterBackend
+
+from apps.common.pagination import BYSSPagination
+from apps.imports.jobs import expire_stale_jobs, fail_if_stale
+from apps.imports.models import ImportJob
+from apps.imports.serializers import ImportJobSerializer
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """导入任务查询：GET /import-jobs/ 列表，GET /import-jobs/<id>/ 轮询进度。"""
+
+    queryset = ImportJob.objects.all().order_by("-created_at")
+    serializer_class = ImportJobSerializer
+    pagination_class = BYSSPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ["kind", "status"]
+    ordering_fields = ["created_at", "finished_at"]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        user = self.request.user
+        # 非管理员仅能查看自己提交的任务
+        if not getattr(user, "is_staff", False):
+            qs = qs.filter(created_by_id=getattr(user, "id", None))
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        expire_stale_jobs()
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_object()
+        # 执行进程崩溃的任务不会自行结束，轮询时超时即标记失败，前端据此停止等待
+        fail_if_stale(job)
+        serializer = self.get_serializer(job)
+        return Response({"success": True, "data": serializer.data, "timestamp": timezone.now().isoformat()})
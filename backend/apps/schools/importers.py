@@ -0,0 +1,132 @@
+import csv
+import io
+
+from apps.common.imports import DRY_RUN_MAX_ERRORS, decode_upload, dry_run_result, report_progress
+from .models import Class, Grade
+
+
+def _first_val(row, keys, default=""):
+    for k in keys:
+        v = row.get(k)
+        if v is not None and str(v).strip() != "":
+            return str(v).strip()
+    return default
+
+
+# 未填写年级时归入的默认年级
+DEFAULT_GRADE = "一年级"
+
+
+def parse_items(items: list, errors: list | None = None) -> list[dict]:
+    """JSON 数组 { items: [...] } 转为标准化记录；传入 errors 时记录被跳过的项（row 从 1 起）。"""
+    records = []
+    for idx, row in enumerate(items, start=1):
+        code = row.get("code")
+        name = row.get("name")
+        if not code or not name:
+            if errors is not None:
+                errors.append({"row": idx, "message": "编码/名称不能为空"})
+            continue
+        records.append({
+            "code": code,
+            "name": name,
+            "grade_name": row.get("grade") or row.get("grade_name"),
+            "head_teacher_name": row.get("head_teacher_name") or row.get("headTeacherName"),
+            "capacity": row.get("capacity") or 50,
+            "status": row.get("status") or "在读",
+            "remark": row.get("remark") or "",
+        })
+    return records
+
+
+def parse_csv(content: str, errors: list | None = None) -> list[dict]:
+    """CSV 转为标准化记录，支持中文表头；传入 errors 时记录被跳过的行。"""
+    records = []
+    for idx, row in enumerate(csv.DictReader(io.StringIO(content)), start=2):  # 数据行自第2行起
+        code = _first_val(row, ["code", "编码"])
+        name = _first_val(row, ["name", "名称"])
+        grade_name = _first_val(row, ["grade", "grade_name", "年级"])
+        head_teacher_name = _first_val(row, ["head_teacher_name", "headTeacherName", "班主任", "班主任名称"])
+        capacity_str = _first_val(row, ["capacity", "容量"], "50")
+        try:
+            capacity = int(capacity_str)
+        except Exception:
+            capacity = 50
+        if not code or not name:
+            if errors is not None:
+                errors.append({"row": idx, "message": "编码/名称不能为空"})
+            continue
+        records.append({
+            "code": code,
+            "name": name,
+            "grade_name": grade_name,
+            "head_teacher_name": head_teacher_name or None,
+            "capacity": capacity,
+            "status": _first_val(row, ["status", "状态"], "在读"),
+            "remark": _first_val(row, ["remark", "备注"], ""),
+        })
+    return records
+
+
+def import_classes(records: list[dict], progress=None) -> dict:
+    created = 0
+    updated = 0
+    ids = []
+    for i, rec in enumerate(records, start=1):
+        report_progress(progress, i, len(records))
+        grade = None
+        if rec["grade_name"]:
+            grade, _ = Grade.objects.get_or_create(name=rec["grade_name"])
+        obj, is_created = Class.objects.update_or_create(
+            code=rec["code"],
+            defaults={
+                "name": rec["name"],
+                "grade": grade or Grade.objects.get_or_create(name=DEFAULT_GRADE)[0],
+                "head_teacher_name": rec["head_teacher_name"],
+                "capacity": rec["capacity"],
+                "status": rec["status"],
+                "remark": rec["remark"],
+            },
+        )
+        created += 1 if is_created else 0
+        updated += 0 if is_created else 1
+        ids.append(obj.id)
+    report_progress(progress, len(records), len(records), force=True)
+    return {"data": {"created": created, "updated": updated, "ids": ids}, "errors": [], "rows": len(records)}
+
+
+def preview_classes(records: list[dict], errors: list | None = None, max_errors: int = DRY_RUN_MAX_ERRORS) -> dict:
+    """预检：按编码一次 IN 查询区分新增/更新，并统计需新建的年级，不写库。"""
+    errors = errors or []
+    codes = {str(r["code"]) for r in records}
+    seen = set(Class.objects.filter(code__in=codes).values_list("code", flat=True)) if codes else set()
+    created = 0
+    for rec in records:
+        key = str(rec["code"])
+        if key not in seen:
+            seen.add(key)
+            created += 1
+    grade_names = {r["grade_name"] or DEFAULT_GRADE for r in records}
+    existing_grades = set(Grade.objects.filter(name__in=grade_names).values_list("name", flat=True)) if grade_names else set()
+    return dry_run_result(
+        rows=len(records) + len(errors),
+        created=created,
+        updated=len(records) - created,
+        rejected=len(errors),
+        errors=errors,
+        max_errors=max_errors,
+        new_grades=len(grade_names - existing_grades),
+    )
+
+
+def run_import(raw: bytes, filename: str = "", params: dict | None = None, progress=None) -> dict:
+    params = params or {}
+    content = decode_upload(raw)
+    if params.get("dry_run"):
+        errors: list[dict] = []
+        records = parse_csv(content, errors)
+        return preview_classes(records, errors, max_errors=params.get("max_errors") or DRY_RUN_MAX_ERRORS)
+    outcome = import_classes(parse_csv(content), progress=progress)
+    # 异步任务结果需可 JSON 序列化
+    outcome["data"]["ids"] = [str(i) for i in outcome["data"]["ids"]]
+    return outcome
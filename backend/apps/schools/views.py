@@ -6,9 +6,14 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, filters
 from rest_framework.response import Response
 
-from django.http import HttpResponse
+from apps.common.exports import iter_values, stream_csv, wants_bom
+from apps.common.imports import ImportFailed, dry_run_params
+from apps.common.pagination import CachedCountPagination
+from apps.imports.jobs import job_accepted_response, submit_import_job, wants_async
+from apps.imports.models import ImportJob
+from . import importers
 from .filters import ClassFilter
-from .models import Class, Grade
+from .models import Class
 from .serializers import ClassListSerializer, ClassDetailSerializer
 
 
@@ -24,6 +29,15 @@ class ClassViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "code", "head_teacher_name"]
     filterset_class = ClassFilter
     ordering = ["-created_at"]
+    pagination_class = CachedCountPagination
+
+    def get_count_queryset(self, queryset):
+        """分页计数不需要人数注解：在未注解的查询集上重新套用筛选，避免 JOIN students + GROUP BY。"""
+        base = Class.objects.filter(deleted_at__isnull=True)
+        for backend in self.filter_backends:
+            if backend is not filters.OrderingFilter:
+                base = backend().filter_queryset(self.request, base, self)
+        return base
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -116,9 +130,7 @@ class ClassViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
     def import_classes(self, request):
         file_obj = request.FILES.get("file")
-        records = []
-        created = 0
-        updated = 0
+        params = dry_run_params(request)
 
         if file_obj is None:
             # 支持直接传 JSON 数组 { items: [...] }
@@ -133,102 +145,38 @@ class ClassViewSet(viewsets.ModelViewSet):
                     },
                     "timestamp": timezone.now().isoformat(),
                 }, status=400)
-            for row in items:
-                code = row.get("code")
-                name = row.get("name")
-                grade_name = row.get("grade") or row.get("grade_name")
-                head_teacher_name = row.get("head_teacher_name") or row.get("headTeacherName")
-                capacity = row.get("capacity") or 50
-                status_value = row.get("status") or "在读"
-                remark = row.get("remark") or ""
-                if not code or not name:
-                    continue
-                grade = None
-                if grade_name:
-                    grade, _ = Grade.objects.get_or_create(name=grade_name)
-                obj, is_created = Class.objects.update_or_create(
-                    code=code,
-                    defaults={
-                        "name": name,
-                        "grade": grade or Grade.objects.get_or_create(name="一年级")[0],
-                        "head_teacher_name": head_teacher_name,
-                        "capacity": capacity,
-                        "status": status_value,
-                        "remark": remark,
-                    },
-                )
-                created += 1 if is_created else 0
-                updated += 0 if is_created else 1
+            if params:
+                errors = []
+                records = importers.parse_items(items, errors)
+                outcome = importers.preview_classes(records, errors, max_errors=params["max_errors"])
+            else:
+                outcome = importers.import_classes(importers.parse_items(items))
+                outcome["data"].pop("ids", None)
             return Response({
                 "success": True,
-                "data": {"created": created, "updated": updated},
-                "message": "导入完成",
+                "data": outcome["data"],
+                "message": "预检完成" if params else "导入完成",
                 "timestamp": timezone.now().isoformat(),
             })
 
-        # CSV 解析，自动编码回退，支持中文表头
-        import csv, io
+        if wants_async(request) and not params:
+            job = submit_import_job(request, ImportJob.Kind.CLASSES, file_obj)
+            return job_accepted_response(job)
 
-        raw = file_obj.read()
-        text_str = None
-        for enc in ("utf-8-sig", "utf-8", "gbk", "gb18030", "cp936"):
-            try:
-                text_str = raw.decode(enc)
-                break
-            except Exception:
-                continue
-        if text_str is None:  # pragma: no cover
+        # CSV 解析，自动编码回退，支持中文表头
+        try:
+            outcome = importers.run_import(file_obj.read(), file_obj.name, params)
+        except ImportFailed as exc:  # pragma: no cover
             return Response({
                 "success": False,
-                "error": {"code": "INVALID_FILE", "message": "文件解码失败，建议使用 UTF-8 或 GBK 保存"},
+                "error": {"code": exc.code, "message": exc.message},
                 "timestamp": timezone.now().isoformat(),
-            }, status=400)
-
-        reader = csv.DictReader(io.StringIO(text_str))
-
-        def first_val(row, keys, default=""):
-            for k in keys:
-                v = row.get(k)
-                if v is not None and str(v).strip() != "":
-                    return str(v).strip()
-            return default
-
-        for row in reader:
-            code = first_val(row, ["code", "编码"]) 
-            name = first_val(row, ["name", "名称"]) 
-            grade_name = first_val(row, ["grade", "grade_name", "年级"]) 
-            head_teacher_name = first_val(row, ["head_teacher_name", "headTeacherName", "班主任", "班主任名称"]) 
-            capacity_str = first_val(row, ["capacity", "容量"], "50")
-            try:
-                capacity = int(capacity_str)
-            except Exception:
-                capacity = 50
-            status_value = first_val(row, ["status", "状态"], "在读")
-            remark = first_val(row, ["remark", "备注"], "")
-            if not code or not name:
-                continue
-            grade = None
-            if grade_name:
-                grade, _ = Grade.objects.get_or_create(name=grade_name)
-            obj, is_created = Class.objects.update_or_create(
-                code=code,
-                defaults={
-                    "name": name,
-                    "grade": grade or Grade.objects.get_or_create(name="一年级")[0],
-                    "head_teacher_name": head_teacher_name or None,
-                    "capacity": capacity,
-                    "status": status_value,
-                    "remark": remark,
-                },
-            )
-            created += 1 if is_created else 0
-            updated += 0 if is_created else 1
-            records.append(obj.id)
+            }, status=exc.status)
 
         return Response({
             "success": True,
-            "data": {"created": created, "updated": updated, "ids": records},
-            "message": "导入完成",
+            "data": outcome["data"],
+            "message": "预检完成" if params else "导入完成",
             "timestamp": timezone.now().isoformat(),
         })
 
@@ -275,11 +223,8 @@ class ClassViewSet(viewsets.ModelViewSet):
     def export_classes(self, request):
         # 使用筛选后的数据导出
         queryset = self.filter_queryset(self.get_queryset())
-        import csv, io
-        output = io.StringIO()
-        writer = csv.writer(output)
         # 中文表头
-        writer.writerow([
+        header = [
             "ID",
             "编码",
             "名称",
@@ -291,26 +236,16 @@ class ClassViewSet(viewsets.ModelViewSet):
             "备注",
             "创建时间",
             "更新时间",
-        ])
-        for c in queryset:
-            writer.writerow([
-                str(c.id),
-                c.code,
-                c.name,
-                c.grade.name if c.grade else "",
-                c.head_teacher_name or "",
-                c.capacity,
-                getattr(c, "student_count", 0),
-                c.status,
-                c.remark or "",
-                c.created_at.isoformat(),
-                c.updated_at.isoformat(),
-            ])
-        content = output.getvalue()
-        # 为兼容 Excel，可选择在开头添加 BOM："\ufeff" + content
-        response = HttpResponse(content, content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = 'attachment; filename="班级导出.csv"'
-        return response
+        ]
+        fields = [
+            "id", "code", "name", "grade__name", "head_teacher_name", "capacity",
+            "student_count", "status", "remark", "created_at", "updated_at",
+        ]
+        rows = (
+            (str(r[0]), *r[1:6], r[6] or 0, *r[7:9], r[9].isoformat(), r[10].isoformat())
+            for r in iter_values(queryset, fields)
+        )
+        return stream_csv("班级导出.csv", header, rows, bom=wants_bom(request))
 
     @action(detail=False, methods=["post"], url_path="bulk-update-status")
     def bulk_update_status(self, request):
@@ -0,0 +1,321 @@
+"""学生批量导入引擎（新学期分班名单等，通常 3~5 千行）。
+
+与成绩导入相同，按三个阶段处理并分别计时：
+- parse：解析 CSV，逐行校验，错误行记入 error_rows（行号与原逐行导入一致）
+- resolve：一次性加载涉及的年级、班级（按编码、年级+名称、名称建立索引）和已存在的学号，
+  在内存中按行顺序匹配班级，缺失的年级/班级只登记待建对象
+- write：批量补建年级/班级，学生按新增/更新分组分块写入（新增 bulk_create，更新按学号 upsert）
+"""
+
+import csv
+import time
+from contextlib import contextmanager
+from datetime import date
+from io import StringIO
+
+from django.db import DatabaseError, connection, transaction
+
+from apps.common.imports import DRY_RUN_MAX_ERRORS, decode_upload, dry_run_result, report_progress
+from apps.schools.models import Class, Grade
+from apps.students.models import Student
+from apps.timetable.identity import PROFILE_FIELDS, invalidate_identities, profile_users
+
+
+DEFAULT_GRADE = "未分级"
+WRITE_BATCH_SIZE = 1000
+
+# 导入时写入/覆盖的学生字段
+STUDENT_FIELDS = [
+    "name", "gender", "current_class", "status", "id_card",
+    "guangzhou_student_id", "national_student_id", "birth_date", "address", "deleted_at",
+]
+
+
+def _pick(d: dict, keys: list[str]) -> str:
+    for k in keys:
+        v = d.get(k)
+        if isinstance(v, str) and v.strip():
+            return v.strip()
+    return ""
+
+
+def _max_lengths(model, names) -> dict[str, int]:
+    return {name: model._meta.get_field(name).max_length for name in names}
+
+
+class StudentImportEngine:
+    """导入学生 CSV，返回 {"data": {"created", "updated", "timings"}, "errors": [...], "rows": n}。"""
+
+    def __init__(self, batch_size: int = WRITE_BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.timings: dict[str, float] = {}
+        self.error_rows: list[dict] = []
+        self.rows = 0
+
+    @contextmanager
+    def _phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def run(self, content: str) -> dict:
+        with self._phase("parse"):
+            records = self.parse(content)
+        report_progress(self.progress, self.rows, self.rows, force=True)
+        with self._phase("resolve"):
+            plan = self.resolve(records)
+        with self._phase("write"):
+            self.write(plan)
+        self.error_rows.sort(key=lambda e: e["row"])
+        return {
+            "data": {"created": plan["created"], "updated": plan["updated"], "timings": self.timings},
+            "errors": self.error_rows,
+            "rows": self.rows,
+        }
+
+    def preview(self, content: str, max_errors: int = DRY_RUN_MAX_ERRORS) -> dict:
+        """预检：只执行 parse 与 resolve，不写库。"""
+        with self._phase("parse"):
+            records = self.parse(content)
+        with self._phase("resolve"):
+            plan = self.resolve(records)
+        self.error_rows.sort(key=lambda e: e["row"])
+        return dry_run_result(
+            rows=self.rows,
+            created=plan["created"],
+            updated=plan["updated"],
+            rejected=self.rows - plan["accepted"],
+            errors=self.error_rows,
+            max_errors=max_errors,
+            new_grades=len(plan["new_grades"]),
+            new_classes=len(plan["new_classes"]),
+            timings=self.timings,
+        )
+
+    # ---- parse ----
+    def parse(self, content: str) -> list[dict]:
+        """导入学生 CSV，中文/英文表头混用。
+
+        推荐中文表头：学号,姓名,性别,班级,状态,身份证号,市学籍号,国学籍号,出生日期,家庭住址
+        """
+        limits = _max_lengths(Student, [
+            "student_id", "name", "status", "id_card", "guangzhou_student_id", "national_student_id", "address",
+        ])
+        limits.update({"class_code": Class._meta.get_field("code").max_length,
+                       "class_name": Class._meta.get_field("name").max_length,
+                       "grade_name": Grade._meta.get_field("name").max_length})
+
+        records = []
+        reader = csv.DictReader(StringIO(content))
+        for idx, row in enumerate(reader, start=2):  # 数据行自第2行起
+            self.rows += 1
+            report_progress(self.progress, self.rows)
+            if not row:
+                continue
+            rec = {
+                "row": idx,
+                "student_id": _pick(row, ["student_id", "学号"]),
+                "name": _pick(row, ["name", "姓名"]),
+                "class_code": _pick(row, ["class_code", "班级编码", "code"]),
+                "class_name": _pick(row, ["class", "class_name", "班级"]),
+                "grade_name": _pick(row, ["grade", "grade_name", "年级"]),
+                "gender": _pick(row, ["gender", "性别"]) or "男",
+                "status": _pick(row, ["status", "状态"]) or "在校",
+                "id_card": _pick(row, ["id_card", "身份证号"]),
+                "guangzhou_student_id": _pick(row, ["guangzhou_student_id", "市学籍号"]),
+                "national_student_id": _pick(row, ["national_student_id", "国学籍号"]),
+                "address": _pick(row, ["address", "家庭住址", "homeAddress", "home_address"]),
+                "birth_date": None,
+            }
+
+            if not rec["student_id"] or not rec["name"] or not rec["class_name"]:
+                self.error_rows.append({"row": idx, "message": "学号/姓名/班级不能为空"})
+                continue
+
+            # 批量写入时单行超长会导致整批失败，提前按字段长度逐行拦截
+            too_long = [k for k, n in limits.items() if n and len(rec[k]) > n]
+            if too_long:
+                self.error_rows.append({"row": idx, "message": f"字段超长: {', '.join(too_long)}"})
+                continue
+
+            if rec["gender"] not in {"男", "女"}:
+                rec["gender"] = "男"
+
+            birth_date_str = _pick(row, ["birth_date", "出生日期"])
+            if birth_date_str:
+                try:
+                    rec["birth_date"] = date.fromisoformat(birth_date_str)
+                except Exception:
+                    # 与原逐行导入一致：记录错误，但该行仍以空出生日期导入
+                    self.error_rows.append({"row": idx, "message": f"出生日期格式无效: {birth_date_str}"})
+            records.append(rec)
+        return records
+
+    # ---- resolve ----
+    def resolve(self, records: list[dict]) -> dict:
+        codes = {r["class_code"] for r in records if r["class_code"]}
+        names = {r["class_name"] for r in records if not r["class_code"]}
+        grade_names = {r["grade_name"] or DEFAULT_GRADE for r in records}
+
+        grades = {g.name: g for g in Grade.objects.filter(name__in=grade_names)} if grade_names else {}
+
+        by_code: dict[str, Class] = {}
+        by_grade_name: dict[tuple[str, str], Class] = {}
+        by_name: dict[str, Class] = {}
+        # 按名称匹配的班级在新建时以名称作编码，一并加载以检测编码冲突
+        lookup = codes | names
+        if lookup:
+            qs = (
+                Class.objects.filter(code__in=lookup)
+                | Class.objects.filter(name__in=names)
+            ).select_related("grade").order_by("created_at").only("id", "code", "name", "grade__name")
+            for c in qs:
+                by_code[c.code] = c
+                if c.name in names:
+                    # 允许存在同名班级：与原 .order_by("created_at").first() 一致，取最早创建的一条
+                    by_grade_name.setdefault((c.grade.name, c.name), c)
+                    by_name.setdefault(c.name, c)
+
+        new_grades: list[Grade] = []
+        new_classes: list[Class] = []
+
+        def grade_for(name: str) -> Grade:
+            grade = grades.get(name)
+            if grade is None:
+                grade = grades[name] = Grade(name=name)
+                new_grades.append(grade)
+            return grade
+
+        # 按行顺序匹配，前面行新建的班级对后续行可见，与逐行 get_or_create 的结果一致
+        matched: list[tuple[dict, Class]] = []
+        for rec in records:
+            code, name, grade_name = rec["class_code"], rec["class_name"], rec["grade_name"]
+            if code:
+                cls = by_code.get(code)
+            elif grade_name:
+                cls = by_grade_name.get((grade_name, name))
+            else:
+                cls = by_name.get(name)
+
+            if cls is None:
+                # 未找到则按年级名新建，默认归入“未分级”；按名称新建的班级以名称作编码
+                new_code = code or name
+                if new_code in by_code:
+                    self.error_rows.append({"row": rec["row"], "message": f"班级编码已存在: {new_code}"})
+                    continue
+                grade = grade_for(grade_name or DEFAULT_GRADE)
+                cls = Class(code=new_code, name=name or code, grade=grade)
+                new_classes.append(cls)
+                by_code[cls.code] = cls
+                by_grade_name.setdefault((grade.name, cls.name), cls)
+                by_name.setdefault(cls.name, cls)
+            matched.append((rec, cls))
+
+        student_ids = {rec["student_id"] for rec, _ in matched}
+        existing = set(
+            Student.objects.filter(student_id__in=student_ids).values_list("student_id", flat=True)
+        ) if student_ids else set()
+
+        # 同一学号多次出现以最后一行为准；计数与逐行 update_or_create 一致（首次为新增，其余为更新）
+        to_create: dict[str, Student] = {}
+        to_update: dict[str, Student] = {}
+        rows: dict[str, int] = {}
+        created = updated = 0
+        for rec, cls in matched:
+            sid = rec["student_id"]
+            rows[sid] = rec["row"]
+            values = {f: rec[f] for f in STUDENT_FIELDS if f in rec}
+            values.update(current_class=cls, deleted_at=None)
+            if sid in existing:
+                to_update[sid] = Student(student_id=sid, **values)
+                updated += 1
+            elif sid in to_create:
+                to_create[sid] = Student(student_id=sid, **values)
+                updated += 1
+            else:
+                to_create[sid] = Student(student_id=sid, **values)
+                created += 1
+
+        return {
+            "new_grades": new_grades,
+            "new_classes": new_classes,
+            "to_create": list(to_create.values()),
+            "to_update": list(to_update.values()),
+            "rows": rows,
+            "created": created,
+            "updated": updated,
+            "accepted": len(matched),
+        }
+
+    # ---- write ----
+    def write(self, plan: dict) -> None:
+        total = len(plan["to_create"]) + len(plan["to_update"])
+        done = 0
+        with transaction.atomic():
+            if plan["new_grades"]:
+                Grade.objects.bulk_create(plan["new_grades"], batch_size=self.batch_size)
+            if plan["new_classes"]:
+                Class.objects.bulk_create(plan["new_classes"], batch_size=self.batch_size)
+
+            to_create = plan["to_create"]
+            for start in range(0, len(to_create), self.batch_size):
+                chunk = to_create[start:start + self.batch_size]
+                self._write_chunk(plan, "created", chunk, {})
+                done += len(chunk)
+                report_progress(self.progress, done, total, force=True)
+
+            # 已存在的学号走 upsert：逐字段 CASE WHEN 的 bulk_update 在数千行时构造 SQL 的开销远大于执行；
+            # 这里的实例不带主键，冲突键为唯一的 student_id，updated_at 由 auto_now 在插入值中生成
+            to_update = plan["to_update"]
+            for start in range(0, len(to_update), self.batch_size):
+                chunk = to_update[start:start + self.batch_size]
+                self._write_chunk(plan, "updated", chunk, self._upsert_options())
+                done += len(chunk)
+                report_progress(self.progress, done, total, force=True)
+
+            # 批量写入不触发 post_save，按导入的学号找出受影响的用户，作废其课表身份缓存
+            student_ids = [s.student_id for s in to_create] + [s.student_id for s in to_update]
+            if student_ids:
+                rows = Student.objects.filter(student_id__in=student_ids).values("id", *PROFILE_FIELDS["student"])
+                invalidate_identities(profile_users("student", rows))
+
+    def _write_chunk(self, plan: dict, counter: str, chunk: list[Student], options: dict) -> None:
+        """整块写入；数据库报错时回滚该块，改为逐行保存，失败的行记入 error_rows（与原逐行导入一致）。"""
+        try:
+            with transaction.atomic():
+                Student.objects.bulk_create(chunk, **options)
+            return
+        except DatabaseError:
+            pass
+        for student in chunk:
+            try:
+                with transaction.atomic():
+                    Student.objects.update_or_create(
+                        student_id=student.student_id,
+                        defaults={f: getattr(student, f) for f in STUDENT_FIELDS},
+                    )
+            except DatabaseError as exc:
+                self.error_rows.append({"row": plan["rows"][student.student_id], "message": str(exc)})
+                plan[counter] -= 1
+
+    def _upsert_options(self) -> dict:
+        options = {"update_conflicts": True, "update_fields": STUDENT_FIELDS + ["updated_at"]}
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不支持指定冲突列，依赖 student_id 唯一约束即可
+        if connection.features.supports_update_conflicts_with_target:
+            options["unique_fields"] = ["student_id"]
+        return options
+
+
+def import_students(content: str, progress=None) -> dict:
+    return StudentImportEngine(progress=progress).run(content)
+
+
+def run_import(raw: bytes, filename: str = "", params: dict | None = None, progress=None) -> dict:
+    params = params or {}
+    content = decode_upload(raw, "文件解码失败，应为UTF-8/GBK")
+    if params.get("dry_run"):
+        return StudentImportEngine().preview(content, max_errors=params.get("max_errors") or DRY_RUN_MAX_ERRORS)
+    return import_students(content, progress=progress)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_rename_student_student_id_idx_students_student_1ff8ed_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at', 'id'], name='students_created_1b3cf3_idx'),
+        ),
+    ]
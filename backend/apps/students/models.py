@@ -34,6 +34,8 @@ class Student(BaseModel):
         indexes = [
             models.Index(fields=["student_id"]),
             models.Index(fields=["name"]),
+            # 键集分页：ORDER BY created_at, id
+            models.Index(fields=["created_at", "id"]),
         ]
         verbose_name = "学生"
         verbose_name_plural = "学生"
@@ -1,5 +1,4 @@
 from django.db.models import Q
-from django.http import HttpResponse
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
@@ -7,6 +6,12 @@ from rest_framework.response import Response
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from apps.common.exports import iter_values, stream_csv, wants_bom
+from apps.common.imports import ImportFailed, dry_run_params
+from apps.common.pagination import CachedCountKeysetPagination
+from apps.imports.jobs import job_accepted_response, submit_import_job, wants_async
+from apps.imports.models import ImportJob
+from apps.students import importers
 from apps.students.models import Student
 from apps.students.serializers import StudentListSerializer, StudentDetailSerializer
 from apps.students.filters import StudentFilter
@@ -23,6 +28,7 @@ class StudentViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "student_id", "phone"]
     filterset_class = StudentFilter
     ordering = ["-created_at"]
+    pagination_class = CachedCountKeysetPagination
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -93,130 +99,23 @@ class StudentViewSet(viewsets.ModelViewSet):
                 {"success": False, "error": {"code": "INVALID_FILE", "message": "未上传文件"}},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        content = None
-        for encoding in ["utf-8-sig", "utf-8", "gbk", "gb18030", "cp936"]:
-            try:
-                content = file.read().decode(encoding)
-                break
-            except Exception:
-                file.seek(0)
-        if content is None:
+        params = dry_run_params(request)
+        if wants_async(request) and not params:
+            job = submit_import_job(request, ImportJob.Kind.STUDENTS, file)
+            return job_accepted_response(job)
+
+        try:
+            outcome = importers.run_import(file.read(), file.name, params)
+        except ImportFailed as exc:
             return Response(
-                {
-                    "success": False,
-                    "error": {"code": "INVALID_FILE", "message": "文件解码失败，应为UTF-8/GBK"},
-                },
-                status=status.HTTP_400_BAD_REQUEST,
+                {"success": False, "error": {"code": exc.code, "message": exc.message}},
+                status=exc.status,
             )
+        if params:
+            # 预检结果（含错误明细）始终以成功返回，由前端决定是否继续导入
+            return Response({"success": True, "data": outcome["data"]})
 
-        import csv
-        from io import StringIO
-        from django.db import transaction
-        from datetime import date
-        from apps.schools.models import Class, Grade
-
-        reader = csv.DictReader(StringIO(content))
-        created_count = 0
-        updated_count = 0
-        error_rows = []
-
-        def pick(d: dict, keys: list[str]) -> str:
-            for k in keys:
-                v = d.get(k)
-                if isinstance(v, str) and v.strip():
-                    return v.strip()
-            return ""
-
-        with transaction.atomic():
-            for idx, row in enumerate(reader, start=2):  # 数据行自第2行起
-                try:
-                    if not row:
-                        continue
-                    student_id = pick(row, ["student_id", "学号"]) or ""
-                    name = pick(row, ["name", "姓名"]) or ""
-                    class_code = pick(row, ["class_code", "班级编码", "code"]) or ""
-                    class_name = pick(row, ["class", "class_name", "班级"]) or ""
-                    grade_name = pick(row, ["grade", "grade_name", "年级"]) or ""
-                    gender = pick(row, ["gender", "性别"]) or "男"
-                    status_val = pick(row, ["status", "状态"]) or "在校"
-
-                    id_card = pick(row, ["id_card", "身份证号"]) or ""
-                    gz_id = pick(row, ["guangzhou_student_id", "市学籍号"]) or ""
-                    national_id = pick(row, ["national_student_id", "国学籍号"]) or ""
-                    birth_date_str = pick(row, ["birth_date", "出生日期"]) or ""
-                    address = pick(row, ["address", "家庭住址", "homeAddress", "home_address"]) or ""
-
-                    if not student_id or not name or not class_name:
-                        error_rows.append({"row": idx, "message": "学号/姓名/班级不能为空"})
-                        continue
-
-                    gender = gender.strip()
-                    if gender not in {"男", "女"}:
-                        gender = "男"
-
-                    birth_d = None
-                    if birth_date_str:
-                        try:
-                            birth_d = date.fromisoformat(birth_date_str)
-                        except Exception:
-                            error_rows.append({"row": idx, "message": f"出生日期格式无效: {birth_date_str}"})
-                            birth_d = None
-
-                    # 允许存在同名班级：优先按编码匹配，其次按年级+名称
-                    class_qs = Class.objects.all()
-                    if class_code:
-                        class_qs = class_qs.filter(code=class_code)
-                    else:
-                        class_qs = class_qs.filter(name=class_name)
-                        if grade_name:
-                            class_qs = class_qs.filter(grade__name=grade_name)
-
-                    current_class = class_qs.order_by("created_at").first()
-
-                    if current_class is None:
-                        # 若未找到，按年级名创建，默认归入“未分级”
-                        if grade_name:
-                            grade, _ = Grade.objects.get_or_create(name=grade_name)
-                        else:
-                            grade, _ = Grade.objects.get_or_create(name="未分级")
-
-                        if class_code:
-                            current_class, _ = Class.objects.get_or_create(
-                                code=class_code,
-                                defaults={
-                                    "name": class_name or class_code,
-                                    "grade": grade,
-                                },
-                            )
-                        else:
-                            current_class, _ = Class.objects.get_or_create(
-                                name=class_name,
-                                grade=grade,
-                                defaults={"code": class_name or grade.name},
-                            )
-
-                    obj, created = Student.objects.update_or_create(
-                        student_id=student_id,
-                        defaults={
-                            "name": name,
-                            "gender": gender,
-                            "current_class": current_class,
-                            "status": status_val,
-                            "id_card": id_card,
-                            "guangzhou_student_id": gz_id,
-                            "national_student_id": national_id,
-                            "birth_date": birth_d,
-                            "address": address,
-                            "deleted_at": None,
-                        },
-                    )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                except Exception as exc:
-                    error_rows.append({"row": idx, "message": str(exc)})
-
+        error_rows = outcome["errors"]
         if error_rows:
             return Response(
                 {
@@ -230,20 +129,17 @@ class StudentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return Response({"success": True, "data": {"created": created_count, "updated": updated_count}})
+        return Response({"success": True, "data": outcome["data"]})
 
     @action(detail=False, methods=["GET"], url_path="export")
     def export_students(self, request):
         # 中文表头导出，增加证件与学籍号等字段
         qs = self.filter_queryset(self.get_queryset())
-        
+
         # 默认不导出已转出的学生，除非明确指定
         if not request.query_params.get("include_transferred"):
             qs = qs.exclude(status="转学")
-        import csv, io
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
+        header = [
             "学号",
             "姓名",
             "性别",
@@ -257,27 +153,17 @@ class StudentViewSet(viewsets.ModelViewSet):
             "家庭住址",
             "创建时间",
             "更新时间",
-        ])
-        for s in qs[:10000]:
-            writer.writerow([
-                s.student_id,
-                s.name,
-                s.gender,
-                s.current_class.name if s.current_class_id else "",
-                s.current_class.code if s.current_class_id else "",
-                s.status,
-                s.id_card or "",
-                s.guangzhou_student_id or "",
-                s.national_student_id or "",
-                s.birth_date.isoformat() if s.birth_date else "",
-                s.address or "",
-                s.created_at.isoformat(),
-                s.updated_at.isoformat(),
-            ])
-        content = output.getvalue()
-        resp = HttpResponse(content, content_type="text/csv; charset=utf-8")
-        resp["Content-Disposition"] = 'attachment; filename="学生导出.csv"'
-        return resp
+        ]
+        fields = [
+            "student_id", "name", "gender", "current_class__name", "current_class__code", "status",
+            "id_card", "guangzhou_student_id", "national_student_id", "birth_date", "address",
+            "created_at", "updated_at",
+        ]
+        rows = (
+            (*r[:9], r[9].isoformat() if r[9] else "", r[10], r[11].isoformat(), r[12].isoformat())
+            for r in iter_values(qs, fields)
+        )
+        return stream_csv("学生导出.csv", header, rows, bom=wants_bom(request))
 
     @action(detail=False, methods=["POST"], url_path="bulk-delete")
     def bulk_delete(self, request):
@@ -0,0 +1,113 @@
+import csv
+import io
+
+from apps.common.imports import DRY_RUN_MAX_ERRORS, decode_upload, dry_run_result, report_progress
+from .models import Teacher
+
+
+def _first_val(row, keys, default=""):
+    for k in keys:
+        v = row.get(k)
+        if v is not None and str(v).strip() != "":
+            return str(v).strip()
+    return default
+
+
+def parse_items(items: list, errors: list | None = None) -> list[dict]:
+    """JSON 数组 { items: [...] } 转为标准化记录；传入 errors 时记录被跳过的项（row 从 1 起）。"""
+    records = []
+    for idx, row in enumerate(items, start=1):
+        teacher_id = row.get("teacher_id") or row.get("teacherId")
+        name = row.get("name")
+        if not teacher_id or not name:
+            if errors is not None:
+                errors.append({"row": idx, "message": "工号/姓名不能为空"})
+            continue
+        records.append({
+            "teacher_id": teacher_id,
+            "defaults": {
+                "name": name,
+                "gender": row.get("gender") or "男",
+                "phone": row.get("phone") or "",
+                "email": row.get("email") or "",
+                "id_card": row.get("id_card") or row.get("idCard") or "",
+                "employment_status": row.get("employment_status") or row.get("employmentStatus") or "在职",
+                "employment_type": row.get("employment_type") or row.get("employmentType") or "全职",
+                "remark": row.get("remark") or "",
+            },
+        })
+    return records
+
+
+def parse_csv(content: str, errors: list | None = None) -> list[dict]:
+    """CSV 转为标准化记录，支持中文表头；传入 errors 时记录被跳过的行。"""
+    records = []
+    for idx, row in enumerate(csv.DictReader(io.StringIO(content)), start=2):  # 数据行自第2行起
+        teacher_id = _first_val(row, ["teacher_id", "工号"])
+        name = _first_val(row, ["name", "姓名"])
+        if not teacher_id or not name:
+            if errors is not None:
+                errors.append({"row": idx, "message": "工号/姓名不能为空"})
+            continue
+        records.append({
+            "teacher_id": teacher_id,
+            "defaults": {
+                "name": name,
+                "gender": _first_val(row, ["gender", "性别"], "男"),
+                "phone": _first_val(row, ["phone", "手机号", "电话"], ""),
+                "email": _first_val(row, ["email", "邮箱"], ""),
+                "id_card": _first_val(row, ["id_card", "身份证", "身份证号"], ""),
+                "employment_status": _first_val(row, ["employment_status", "在职状态"], "在职"),
+                "employment_type": _first_val(row, ["employment_type", "用工类型"], "全职"),
+                "remark": _first_val(row, ["remark", "备注"], ""),
+            },
+        })
+    return records
+
+
+def import_teachers(records: list[dict], progress=None) -> dict:
+    created = 0
+    updated = 0
+    for i, rec in enumerate(records, start=1):
+        report_progress(progress, i, len(records))
+        obj, is_created = Teacher.objects.update_or_create(
+            teacher_id=rec["teacher_id"],
+            defaults=rec["defaults"],
+        )
+        created += 1 if is_created else 0
+        updated += 0 if is_created else 1
+    report_progress(progress, len(records), len(records), force=True)
+    return {"data": {"created": created, "updated": updated}, "errors": [], "rows": len(records)}
+
+
+def preview_teachers(records: list[dict], errors: list | None = None, max_errors: int = DRY_RUN_MAX_ERRORS) -> dict:
+    """预检：一次 IN 查询区分新增/更新，不写库。同一工号多次出现时首次计为新增，其余计为更新。"""
+    errors = errors or []
+    teacher_ids = {str(r["teacher_id"]) for r in records}
+    seen = set(
+        Teacher.objects.filter(teacher_id__in=teacher_ids).values_list("teacher_id", flat=True)
+    ) if teacher_ids else set()
+    created = 0
+    for rec in records:
+        key = str(rec["teacher_id"])
+        if key not in seen:
+            seen.add(key)
+            created += 1
+    return dry_run_result(
+        rows=len(records) + len(errors),
+        created=created,
+        updated=len(records) - created,
+        rejected=len(errors),
+        errors=errors,
+        max_errors=max_errors,
+    )
+
+
+def run_import(raw: bytes, filename: str = "", params: dict | None = None, progress=None) -> dict:
+    params = params or {}
+    content = decode_upload(raw)
+    if params.get("dry_run"):
+        errors: list[dict] = []
+        records = parse_csv(content, errors)
+        return preview_teachers(records, errors, max_errors=params.get("max_errors") or DRY_RUN_MAX_ERRORS)
+    return import_teachers(parse_csv(content), progress=progress)
@@ -4,8 +4,12 @@ from rest_framework import viewsets, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
-from django.http import HttpResponse
 
+from apps.common.exports import iter_values, stream_csv, wants_bom
+from apps.common.imports import ImportFailed, dry_run_params
+from apps.imports.jobs import job_accepted_response, submit_import_job, wants_async
+from apps.imports.models import ImportJob
+from . import importers
 from .models import Teacher
 from .serializers import TeacherListSerializer, TeacherDetailSerializer
 from .filters import TeacherFilter
@@ -76,8 +80,7 @@ class TeacherViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
     def import_teachers(self, request):
         file_obj = request.FILES.get("file")
-        created = 0
-        updated = 0
+        params = dry_run_params(request)
 
         if file_obj is None:
             # 支持直接传 JSON 数组 { items: [...] }
@@ -88,107 +91,38 @@ class TeacherViewSet(viewsets.ModelViewSet):
                     "error": {"code": "VALIDATION_ERROR", "message": "缺少文件或 items", "details": {"file": ["请上传CSV文件或提供items数组"]}},
                     "timestamp": timezone.now().isoformat(),
                 }, status=400)
-
-            for row in items:
-                teacher_id = row.get("teacher_id") or row.get("teacherId")
-                name = row.get("name")
-                if not teacher_id or not name:
-                    continue
-                defaults = {
-                    "name": name,
-                    "gender": row.get("gender") or "男",
-                    "phone": row.get("phone") or "",
-                    "email": row.get("email") or "",
-                    "id_card": row.get("id_card") or row.get("idCard") or "",
-                    "employment_status": row.get("employment_status") or row.get("employmentStatus") or "在职",
-                    "employment_type": row.get("employment_type") or row.get("employmentType") or "全职",
-                    "remark": row.get("remark") or "",
-                }
-                obj, is_created = Teacher.objects.update_or_create(
-                    teacher_id=teacher_id,
-                    defaults=defaults,
-                )
-                created += 1 if is_created else 0
-                updated += 0 if is_created else 1
-
-            return Response({
-                "success": True,
-                "data": {"created": created, "updated": updated},
-                "message": "导入完成",
-                "timestamp": timezone.now().isoformat(),
-            })
-
-        # CSV 解析，自动编码回退，支持中文表头
-        import csv, io
-
-        raw = file_obj.read()
-        text_str = None
-        for enc in ("utf-8-sig", "utf-8", "gbk", "gb18030", "cp936"):
+            if params:
+                errors = []
+                records = importers.parse_items(items, errors)
+                outcome = importers.preview_teachers(records, errors, max_errors=params["max_errors"])
+            else:
+                outcome = importers.import_teachers(importers.parse_items(items))
+        elif wants_async(request) and not params:
+            job = submit_import_job(request, ImportJob.Kind.TEACHERS, file_obj)
+            return job_accepted_response(job)
+        else:
+            # CSV 解析，自动编码回退，支持中文表头
             try:
-                text_str = raw.decode(enc)
-                break
-            except Exception:
-                continue
-        if text_str is None:  # pragma: no cover
-            return Response({
-                "success": False,
-                "error": {"code": "INVALID_FILE", "message": "文件解码失败，建议使用 UTF-8 或 GBK 保存"},
-                "timestamp": timezone.now().isoformat(),
-            }, status=400)
-
-        reader = csv.DictReader(io.StringIO(text_str))
-
-        def first_val(row, keys, default=""):
-            for k in keys:
-                v = row.get(k)
-                if v is not None and str(v).strip() != "":
-                    return str(v).strip()
-            return default
-
-        for row in reader:
-            teacher_id = first_val(row, ["teacher_id", "工号"]) 
-            name = first_val(row, ["name", "姓名"]) 
-            if not teacher_id or not name:
-                continue
-            gender = first_val(row, ["gender", "性别"], "男")
-            phone = first_val(row, ["phone", "手机号", "电话"], "")
-            email = first_val(row, ["email", "邮箱"], "")
-            id_card = first_val(row, ["id_card", "身份证", "身份证号"], "")
-            employment_status = first_val(row, ["employment_status", "在职状态"], "在职")
-            employment_type = first_val(row, ["employment_type", "用工类型"], "全职")
-            remark = first_val(row, ["remark", "备注"], "")
-
-            obj, is_created = Teacher.objects.update_or_create(
-                teacher_id=teacher_id,
-                defaults={
-                    "name": name,
-                    "gender": gender,
-                    "phone": phone,
-                    "email": email,
-                    "id_card": id_card,
-                    "employment_status": employment_status,
-                    "employment_type": employment_type,
-                    "remark": remark,
-                },
-            )
-            created += 1 if is_created else 0
-            updated += 0 if is_created else 1
+                outcome = importers.run_import(file_obj.read(), file_obj.name, params)
+            except ImportFailed as exc:  # pragma: no cover
+                return Response({
+                    "success": False,
+                    "error": {"code": exc.code, "message": exc.message},
+                    "timestamp": timezone.now().isoformat(),
+                }, status=exc.status)
 
         return Response({
             "success": True,
-            "data": {"created": created, "updated": updated},
-            "message": "导入完成",
+            "data": outcome["data"],
+            "message": "预检完成" if params else "导入完成",
             "timestamp": timezone.now().isoformat(),
         })
 
     @action(detail=False, methods=["get"], url_path="export")
     def export_teachers(self, request):
         queryset = self.filter_queryset(self.get_queryset())
-        import csv, io
-        output = io.StringIO()
-        writer = csv.writer(output)
         # 中文表头
-        writer.writerow([
+        header = [
             "ID",
             "工号",
             "姓名",
@@ -201,26 +135,16 @@ class TeacherViewSet(viewsets.ModelViewSet):
             "备注",
             "创建时间",
             "更新时间",
-        ])
-        for t in queryset:
-            writer.writerow([
-                str(t.id),
-                t.teacher_id,
-                t.name,
-                t.gender,
-                t.phone,
-                t.email or "",
-                t.id_card or "",
-                t.employment_type,
-                t.employment_status,
-                t.remark or "",
-                t.created_at.isoformat(),
-                t.updated_at.isoformat(),
-            ])
-        content = output.getvalue()
-        response = HttpResponse(content, content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = 'attachment; filename="教师导出.csv"'
-        return response
+        ]
+        fields = [
+            "id", "teacher_id", "name", "gender", "phone", "email", "id_card",
+            "employment_type", "employment_status", "remark", "created_at", "updated_at",
+        ]
+        rows = (
+            (str(r[0]), *r[1:10], r[10].isoformat(), r[11].isoformat())
+            for r in iter_values(queryset, fields)
+        )
+        return stream_csv("教师导出.csv", header, rows, bom=wants_bom(request))
 
     @action(detail=False, methods=["post"], url_path="bulk-update-status")
     def bulk_update_status(self, request):
@@ -5,4 +5,5 @@ class TimetableConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.timetable'
 
-
+    def ready(self):
+        from apps.timetable import signals  # noqa: F401
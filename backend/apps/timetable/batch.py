@@ -0,0 +1,325 @@
+"""课次批量编辑（课表拖拽调整）：一次请求提交多条 create / update / delete 操作。
+
+- 解析：所有操作引用的课程/教师/班级/教室一次性加载，每类一条查询（按ID或名称），不存在的教室批量创建
+- 校验：每条操作按 LessonSerializer 校验，任一失败则整批不写入（400，逐条返回结果）
+- 写入：一个事务内 bulk_create / bulk_update / 一条 DELETE，随后只重写这批课次的占用索引
+- 冲突：按写入后的最终状态检查（两节课互换位置不算冲突）；有冲突且未 force 时整批回滚（409）
+"""
+
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.courses.models import Course
+from apps.schools.models import Class as SchoolClass
+from apps.teachers.models import Teacher
+
+from .conflicts import occupancy_rows, slot_conflicts
+from .models import Lesson, LessonOccupancy, Room
+from .serializers import LessonSerializer
+from .snapshots import schedule_bump
+from .weeks import weeks_to_mask
+
+
+OPS = ('create', 'update', 'delete')
+
+# 单次请求的操作上限，拖拽调整一周课表远低于此值
+MAX_OPERATIONS = 500
+
+BATCH_SIZE = 1000
+
+# (实体, ID 入参别名, 名称入参别名, 序列化器ID字段, 序列化器名称字段)
+REFS = (
+    ('course', ('courseId', 'course_id'), ('courseName', 'course_name'), 'courseId', 'courseName'),
+    ('teacher', ('teacherId', 'teacher_id'), ('teacherName', 'teacher_name'), 'teacherId', 'teacherName'),
+    ('class', ('classId', 'class_id', 'class_ref_id'), ('className', 'class_name'), 'classId', 'className'),
+    ('room', ('roomId', 'room_id'), ('roomName', 'room_name'), 'roomId', 'roomName'),
+)
+
+# 其余字段：(入参别名, 序列化器字段)
+PLAIN_FIELDS = (
+    (('term',), 'term'),
+    (('dayOfWeek', 'day_of_week'), 'dayOfWeek'),
+    (('startTime', 'start_time'), 'startTime'),
+    (('endTime', 'end_time'), 'endTime'),
+    (('startPeriod', 'start_period'), 'startPeriod'),
+    (('endPeriod', 'end_period'), 'endPeriod'),
+    (('weeks',), 'weeks'),
+    (('weekType', 'week_type'), 'weekType'),
+    (('remark',), 'remark'),
+)
+
+
+class LessonBatchError(Exception):
+    """整批无法执行（校验失败或存在冲突），由视图转换为错误响应。"""
+
+    def __init__(self, code: str, message: str, status: int = 400, details=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+        self.details = details
+
+
+QUERYSETS = {
+    'course': Course.objects.all(),
+    'teacher': Teacher.objects.all(),
+    'class': SchoolClass.objects.all(),
+    'room': Room.objects.all(),
+}
+
+
+def _pick(data: dict, keys) -> tuple[bool, object]:
+    """(是否传入, 值)：按别名顺序取第一个出现的键。"""
+    for key in keys:
+        if key in data:
+            return True, data[key]
+    return False, None
+
+
+def _text(value) -> str:
+    return str(value).strip() if value is not None else ''
+
+
+def _uuid(value) -> str | None:
+    try:
+        return str(uuid.UUID(str(value)))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _week_type(value) -> str:
+    value = _text(value)
+    if value in ('单', 'odd'):
+        return 'odd'
+    if value in ('双', 'even'):
+        return 'even'
+    return 'all'
+
+
+def _weeks(value) -> str:
+    if isinstance(value, list):
+        return ','.join(str(int(x)) for x in value if str(x).strip())
+    return _text(value)
+
+
+def _load(queryset, ids: set, names: set) -> tuple[dict, dict]:
+    """按ID与名称一条查询加载；同名取主键最小的一条（与逐条 .filter(name=...).first() 一致）。"""
+    if not ids and not names:
+        return {}, {}
+    by_id, by_name = {}, {}
+    cond = Q(pk__in=ids) | Q(name__in=names)
+    for obj in queryset.filter(cond).order_by('pk').only('id', 'name'):
+        by_id[str(obj.pk)] = obj
+        if obj.name in names:
+            by_name.setdefault(obj.name, obj)
+    return by_id, by_name
+
+
+class LessonBatch:
+    """批量编辑课次。operations 为 [{op, id?, data?}]，data 字段与单条创建/更新接口一致。
+
+    run() 返回 {"results": [...], "conflicts": [...], "summary": {...}}；
+    整批无法执行时抛出 LessonBatchError（code 为 VALIDATION_ERROR / LESSON_CONFLICT，details 为逐条结果或冲突）。
+    """
+
+    def __init__(self, operations, force: bool = False):
+        self.operations = operations
+        self.force = force
+
+    def run(self) -> dict:
+        ops = self._parse()
+        existing = self._existing(ops)
+        refs = self._collect_refs(ops)
+        index = {kind: _load(QUERYSETS[kind], refs[kind]['ids'], refs[kind]['names']) for kind in QUERYSETS}
+        missing_rooms = sorted(refs['room']['names'] - index['room'][1].keys())
+
+        results = [self._validate(op, existing, index) for op in ops]
+        if any(not r['success'] for r in results):
+            raise LessonBatchError('VALIDATION_ERROR', '批量操作校验失败，未做任何修改', details=results)
+
+        with transaction.atomic():
+            if missing_rooms:
+                new_rooms = [Room(name=name) for name in missing_rooms]
+                Room.objects.bulk_create(new_rooms)
+                by_name = {room.name: room for room in new_rooms}
+                for op in ops:
+                    name = op.get('values', {}).get('room_name')
+                    if name in by_name and not op['values'].get('room_id'):
+                        op['values']['room_id'] = op['lesson'].room_id = by_name[name].pk
+            touched = self._write(ops)
+            conflicts = slot_conflicts(touched)
+            if conflicts and not self.force:
+                transaction.set_rollback(True)
+                raise LessonBatchError(
+                    'LESSON_CONFLICT', '批量操作后存在冲突（教师/教室/班级同一时段重复安排），未做任何修改',
+                    status=409, details=conflicts,
+                )
+
+        for op, result in zip(ops, results):
+            if op['op'] == 'delete':
+                result['data'] = {'deleted': True}
+            else:
+                result['id'] = str(op['lesson'].pk)
+                result['data'] = LessonSerializer(op['lesson']).data
+        summary = {kind: sum(1 for op in ops if op['op'] == kind) for kind in OPS}
+        return {'results': results, 'conflicts': conflicts, 'summary': summary}
+
+    # ---- parse ----
+    def _parse(self) -> list[dict]:
+        if not isinstance(self.operations, list) or not self.operations:
+            raise LessonBatchError('VALIDATION_ERROR', 'operations 须为非空数组')
+        if len(self.operations) > MAX_OPERATIONS:
+            raise LessonBatchError('VALIDATION_ERROR', f'单次最多 {MAX_OPERATIONS} 条操作')
+        ops = []
+        for index, raw in enumerate(self.operations):
+            raw = raw if isinstance(raw, dict) else {}
+            op = _text(raw.get('op')).lower()
+            data = raw.get('data')
+            if not isinstance(data, dict):
+                # 也接受字段直接平铺在操作对象上
+                data = {k: v for k, v in raw.items() if k not in ('op', 'id', 'data')}
+            ops.append({'index': index, 'op': op, 'id': _uuid(raw.get('id')), 'raw_id': raw.get('id'), 'data': data})
+        return ops
+
+    def _existing(self, ops) -> dict:
+        ids = {op['id'] for op in ops if op['op'] in ('update', 'delete') and op['id']}
+        return {str(pk): obj for pk, obj in Lesson.objects.in_bulk(ids).items()} if ids else {}
+
+    def _collect_refs(self, ops) -> dict:
+        refs = {kind: {'ids': set(), 'names': set()} for kind in QUERYSETS}
+        for op in ops:
+            if op['op'] not in ('create', 'update'):
+                continue
+            for kind, id_keys, name_keys, _, _ in REFS:
+                _, ref_id = _pick(op['data'], id_keys)
+                ref_id = _uuid(ref_id) if ref_id else None
+                name = _text(_pick(op['data'], name_keys)[1])
+                if ref_id:
+                    refs[kind]['ids'].add(ref_id)
+                elif name:
+                    refs[kind]['names'].add(name)
+        return refs
+
+    # ---- validate ----
+    def _payload(self, data: dict, index: dict) -> dict:
+        """入参 → LessonSerializer 数据；只包含传入的字段（更新时按部分更新处理）。"""
+        payload = {}
+        for keys, field in PLAIN_FIELDS:
+            given, value = _pick(data, keys)
+            if not given:
+                continue
+            if field == 'weekType':
+                payload[field] = _week_type(value)
+            elif field == 'weeks':
+                payload[field] = _weeks(value)
+            elif field in ('startTime', 'endTime', 'startPeriod', 'endPeriod') and _text(value) == '':
+                payload[field] = None
+            else:
+                payload[field] = _text(value) if isinstance(value, str) else value
+
+        for kind, id_keys, name_keys, id_field, name_field in REFS:
+            id_given, ref_id = _pick(data, id_keys)
+            name_given, name = _pick(data, name_keys)
+            name = _text(name)
+            by_id, by_name = index[kind]
+            if id_given and ref_id:
+                # 传入 *_id：原样交给序列化器校验格式，名称缺省时用对象名称补齐
+                payload[id_field] = ref_id
+                obj = by_id.get(_uuid(ref_id) or '')
+                if obj is not None and not name:
+                    payload[name_field] = obj.name
+            elif id_given:
+                payload[id_field] = None
+            elif name:
+                # 只传名称：按名称关联，不存在则只存名称（教室在写入时自动创建）
+                obj = by_name.get(name)
+                payload[id_field] = str(obj.pk) if obj is not None else None
+            elif name_given:
+                payload[id_field] = None
+            if name_given and name:
+                payload[name_field] = name
+            elif name_given and kind != 'course':
+                payload[name_field] = ''
+        return payload
+
+    def _validate(self, op: dict, existing: dict, index: dict) -> dict:
+        result = {'index': op['index'], 'op': op['op'], 'id': op['id'] or op['raw_id'], 'success': True}
+
+        def fail(code, message, details=None):
+            result['success'] = False
+            result['error'] = {'code': code, 'message': message, 'details': details}
+            return result
+
+        if op['op'] not in OPS:
+            return fail('VALIDATION_ERROR', 'op 须为 create、update 或 delete')
+        lesson = None
+        if op['op'] in ('update', 'delete'):
+            lesson = existing.get(op['id'] or '')
+            if lesson is None:
+                return fail('NOT_FOUND', '课程不存在')
+        if op['op'] == 'delete':
+            op['lesson'] = lesson
+            return result
+
+        payload = self._payload(op['data'], index)
+        if op['op'] == 'create':
+            missing = {
+                key: ['必填'] for key in ('term', 'dayOfWeek', 'courseName')
+                if payload.get(key) is None or _text(payload.get(key)) == ''
+            }
+            if missing:
+                return fail('VALIDATION_ERROR', 'term、dayOfWeek、courseName 为必填', missing)
+            ser = LessonSerializer(data=payload)
+        else:
+            ser = LessonSerializer(lesson, data=payload, partial=True)
+        if not ser.is_valid():
+            return fail('VALIDATION_ERROR', '数据验证失败', ser.errors)
+
+        values = dict(ser.validated_data)
+        if op['op'] == 'create':
+            lesson = Lesson(**values)
+        else:
+            for attr, value in values.items():
+                setattr(lesson, attr, value)
+        op['values'] = values
+        op['lesson'] = lesson
+        return result
+
+    # ---- write ----
+    def _write(self, ops) -> list:
+        """写入全部操作，返回新建/修改的课次ID（用于冲突检查）。"""
+        created = [op['lesson'] for op in ops if op['op'] == 'create']
+        deleted = {op['lesson'].pk for op in ops if op['op'] == 'delete'}
+        # 同一课次的多条修改已依次作用在同一对象上；既修改又删除时以删除为准
+        updated = {op['lesson'].pk: op['lesson'] for op in ops if op['op'] == 'update' and op['lesson'].pk not in deleted}
+        fields = {'week_mask', 'updated_at'}
+        for op in ops:
+            if op['op'] == 'update':
+                fields.update(op['values'].keys())
+
+        now = timezone.now()
+        for lesson in updated.values():
+            lesson.updated_at = now
+        for lesson in [*created, *updated.values()]:
+            lesson.week_mask = weeks_to_mask(lesson.weeks, lesson.week_type)
+
+        Lesson.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        if updated:
+            Lesson.objects.bulk_update(list(updated.values()), sorted(fields), batch_size=BATCH_SIZE)
+        if deleted:
+            Lesson.objects.filter(pk__in=deleted).delete()
+
+        # bulk 写入不触发 post_save，占用索引在此按这批课次重写
+        touched = [lesson.pk for lesson in created] + list(updated)
+        LessonOccupancy.objects.filter(lesson_id__in=list(updated)).delete()
+        rows = [row for lesson in [*created, *updated.values()] for row in occupancy_rows(lesson)]
+        LessonOccupancy.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        # 删除经 post_delete 信号作废快照；改学期的课次原学期也需作废
+        schedule_bump(
+            *{lesson.term for lesson in created},
+            *{term for lesson in updated.values() for term in (lesson.term, lesson._loaded_term)},
+        )
+        return touched
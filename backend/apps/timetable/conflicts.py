@@ -0,0 +1,219 @@
+"""课表冲突检测：同一教师/教室/班级在同一学期、同一天、同一节次且周次重叠即为冲突。
+
+占用索引 LessonOccupancy 以 (学期, 资源类型, 资源, 星期, 节次) 建索引，周次重叠用 week_mask 位与判断：
+- 单条课次：lesson_conflicts() 一条按索引的查询，创建/修改课次前调用
+- 整个学期：term_conflicts() 一条带 EXISTS 的查询取出所有冲突的占用行，再按时段分组
+- 一批课次：slot_conflicts() 同上，只看这批课次占用的时段（批量编辑写入后按最终状态检查）
+"""
+
+from django.db.models import BigIntegerField, Exists, ExpressionWrapper, F, OuterRef, Q
+
+from .models import Lesson, LessonOccupancy
+from .weeks import weeks_to_mask
+
+
+KINDS = ('teacher', 'room', 'class')
+
+# 每条课次最多展开的节次数，防止异常数据（如 1-99 节）撑大索引
+MAX_PERIODS = 16
+
+BATCH_SIZE = 2000
+
+# 占用按节次展开，只有上课时间、没有节次的课次无法检测冲突，保存/导入时提示
+UNCHECKED_WARNING = '课次未填写节次，未做冲突检查（冲突按节次检测）'
+
+OCCUPANCY_FIELDS = ['id', 'term', 'day_of_week', 'start_period', 'end_period', 'weeks', 'week_type',
+                    'teacher_id', 'teacher_name', 'room_id', 'room_name', 'class_ref_id', 'class_name']
+
+
+def _resources(lesson) -> list[tuple[str, str, str]]:
+    """[(kind, resource, 名称)]：有关联对象时按ID，否则按名称。"""
+    items = []
+    for kind, fk, name in (
+        ('teacher', lesson.teacher_id, lesson.teacher_name),
+        ('room', lesson.room_id, lesson.room_name),
+        ('class', lesson.class_ref_id, lesson.class_name),
+    ):
+        if fk:
+            items.append((kind, str(fk), name or ''))
+        elif name:
+            items.append((kind, f'name:{name}', name))
+    return items
+
+
+def _periods(lesson) -> list[int]:
+    if not lesson.start_period:
+        return []
+    end = lesson.end_period if lesson.end_period and lesson.end_period >= lesson.start_period else lesson.start_period
+    return list(range(lesson.start_period, min(end, lesson.start_period + MAX_PERIODS - 1) + 1))
+
+
+def is_unchecked(lesson) -> bool:
+    """有教师/教室/班级但未填写节次的课次：没有占用行，不参与冲突检测。"""
+    return not _periods(lesson) and bool(_resources(lesson))
+
+
+def unchecked_count(term: str) -> int:
+    """学期内未参与冲突检测的课次数（同 is_unchecked，在库中计数）。"""
+    has_resource = (
+        Q(teacher__isnull=False) | ~Q(teacher_name='') | Q(room__isnull=False) | ~Q(room_name='')
+        | Q(class_ref__isnull=False) | ~Q(class_name='')
+    )
+    no_period = Q(start_period__isnull=True) | Q(start_period=0)
+    return Lesson.objects.filter(no_period, has_resource, term=term).count()
+
+
+def occupancy_values(lesson) -> list[dict]:
+    mask = weeks_to_mask(lesson.weeks, lesson.week_type)
+    return [
+        {
+            'lesson_id': lesson.pk, 'term': lesson.term, 'day_of_week': lesson.day_of_week,
+            'period': period, 'week_mask': mask, 'kind': kind, 'resource': resource,
+        }
+        for period in _periods(lesson)
+        for kind, resource, _ in _resources(lesson)
+    ]
+
+
+def occupancy_rows(lesson) -> list[LessonOccupancy]:
+    return [LessonOccupancy(**values) for values in occupancy_values(lesson)]
+
+
+def sync_lesson(lesson) -> None:
+    LessonOccupancy.objects.filter(lesson_id=lesson.pk).delete()
+    LessonOccupancy.objects.bulk_create(occupancy_rows(lesson))
+
+
+def rebuild_term(term: str) -> int:
+    """重建一个学期的占用索引（批量导入等绕过 save() 的写入后调用）。返回写入行数。"""
+    LessonOccupancy.objects.filter(term=term).delete()
+    return _write_rows(Lesson.objects.filter(term=term))
+
+
+def sync_lessons(lesson_ids) -> int:
+    """按当前数据重写一批课次的占用行（外键被置空等不触发 Lesson 信号的修改后调用）。返回写入行数。"""
+    lesson_ids = list(lesson_ids)
+    total = 0
+    for i in range(0, len(lesson_ids), BATCH_SIZE):
+        chunk = lesson_ids[i:i + BATCH_SIZE]
+        LessonOccupancy.objects.filter(lesson_id__in=chunk).delete()
+        total += _write_rows(Lesson.objects.filter(id__in=chunk))
+    return total
+
+
+def _write_rows(lessons) -> int:
+    rows = []
+    total = 0
+    for lesson in lessons.only(*OCCUPANCY_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        rows.extend(occupancy_rows(lesson))
+        if len(rows) >= BATCH_SIZE:
+            LessonOccupancy.objects.bulk_create(rows)
+            total += len(rows)
+            rows = []
+    LessonOccupancy.objects.bulk_create(rows)
+    return total + len(rows)
+
+
+def _lesson_brief(lesson) -> dict:
+    return {
+        'id': str(lesson.id),
+        'courseName': lesson.course_name,
+        'teacherName': lesson.teacher_name,
+        'className': lesson.class_name,
+        'roomName': lesson.room_name,
+        'weeks': lesson.weeks,
+        'weekType': lesson.week_type,
+        'startPeriod': lesson.start_period,
+        'endPeriod': lesson.end_period,
+    }
+
+
+def lesson_conflicts(lesson) -> list[dict]:
+    """检查一条（可未保存的）课次与同学期其他课次的冲突。"""
+    periods = _periods(lesson)
+    resources = _resources(lesson)
+    if not periods or not resources:
+        return []
+    names = {(kind, resource): name for kind, resource, name in resources}
+    match = Q()
+    for kind, resource, _ in resources:
+        match |= Q(kind=kind, resource=resource)
+    mask = weeks_to_mask(lesson.weeks, lesson.week_type)
+    hits = (
+        LessonOccupancy.objects.filter(match, term=lesson.term, day_of_week=lesson.day_of_week, period__in=periods)
+        .exclude(lesson_id=lesson.pk)
+        .alias(overlap=F('week_mask').bitand(mask))
+        .filter(overlap__gt=0)
+        .select_related('lesson')
+        .order_by('period', 'kind')
+    )
+    return [
+        {
+            'kind': hit.kind,
+            'name': names[(hit.kind, hit.resource)],
+            'dayOfWeek': hit.day_of_week,
+            'period': hit.period,
+            'lesson': _lesson_brief(hit.lesson),
+        }
+        for hit in hits
+    ]
+
+
+def _clashing():
+    """与外层占用行同一学期、资源、星期、节次且周次重叠的其他占用行。"""
+    return LessonOccupancy.objects.filter(
+        term=OuterRef('term'),
+        kind=OuterRef('kind'),
+        resource=OuterRef('resource'),
+        day_of_week=OuterRef('day_of_week'),
+        period=OuterRef('period'),
+    ).exclude(lesson_id=OuterRef('lesson_id')).alias(
+        overlap=ExpressionWrapper(F('week_mask').bitand(OuterRef('week_mask')), output_field=BigIntegerField())
+    ).filter(overlap__gt=0)
+
+
+def _group_conflicts(qs) -> list[dict]:
+    rows = (
+        qs.filter(Exists(_clashing()))
+        .select_related('lesson')
+        .order_by('kind', 'resource', 'day_of_week', 'period', 'lesson__created_at')
+    )
+    groups: dict[tuple, dict] = {}
+    for row in rows:
+        key = (row.kind, row.resource, row.day_of_week, row.period)
+        group = groups.get(key)
+        if group is None:
+            lesson = row.lesson
+            name = {'teacher': lesson.teacher_name, 'room': lesson.room_name, 'class': lesson.class_name}[row.kind]
+            group = groups[key] = {
+                'kind': row.kind,
+                'name': name,
+                'dayOfWeek': row.day_of_week,
+                'period': row.period,
+                'lessons': [],
+            }
+        group['lessons'].append(_lesson_brief(row.lesson))
+    return list(groups.values())
+
+
+def term_conflicts(term: str, kind: str | None = None) -> list[dict]:
+    """列出学期内全部冲突，按 (资源类型, 资源, 星期, 节次) 分组。"""
+    qs = LessonOccupancy.objects.filter(term=term)
+    if kind in KINDS:
+        qs = qs.filter(kind=kind)
+    return _group_conflicts(qs)
+
+
+def slot_conflicts(lesson_ids) -> list[dict]:
+    """列出给定课次所占时段内的冲突（含与之冲突的其他课次），分组同 term_conflicts。"""
+    if not lesson_ids:
+        return []
+    touched = LessonOccupancy.objects.filter(
+        lesson_id__in=lesson_ids,
+        term=OuterRef('term'),
+        kind=OuterRef('kind'),
+        resource=OuterRef('resource'),
+        day_of_week=OuterRef('day_of_week'),
+        period=OuterRef('period'),
+    )
+    return _group_conflicts(LessonOccupancy.objects.filter(Exists(touched)))
@@ -0,0 +1,265 @@
+"""课表 iCalendar（.ics）导出与日历订阅。
+
+每条课次生成一个按周重复的 VEVENT：教学周（weeks + week_type，截至学期教学周数）取首末周写成
+RRULE，单双周用 INTERVAL=2，中间缺的周写入 EXDATE，文件大小与课次数成正比，而不是与上课次数成正比。
+第 1 周周一由 start 参数或 TIMETABLE_TERM_STARTS[学期] 指定；没有上课时间的课次导出为全天事件。
+
+内容逐行生成交给 StreamingHttpResponse，生成完后写入按课表版本号失效的快照（见 snapshots），
+日历客户端带 If-None-Match 轮询时返回 304。日历客户端无法携带 JWT，订阅地址中带签名令牌（feed_token）。
+"""
+
+import datetime as dt
+import itertools
+import json
+import zoneinfo
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.http import StreamingHttpResponse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+
+from .snapshots import cache_headers, cached_body, enabled, not_modified, snapshot_digest, store_body
+from .weeks import MAX_WEEK
+
+
+TOKEN_SALT = 'timetable.ics'
+
+# 缺少结束时间或结束不晚于开始时，按一节课时长补齐
+LESSON_MINUTES = 45
+
+# 建议订阅客户端的刷新间隔
+REFRESH_INTERVAL = 'PT6H'
+
+FIELDS = ['id', 'updated_at', 'day_of_week', 'start_time', 'end_time', 'start_period', 'end_period',
+          'week_mask', 'course_name', 'teacher_name', 'class_name', 'room_name', 'remark']
+
+SCOPE_LABELS = {'class': 'class_name', 'teacher': 'teacher_name', 'room': 'room_name'}
+
+
+class CalendarRenderer(BaseRenderer):
+    """让只接受 text/calendar 的日历客户端通过内容协商；.ics 本身为流式响应，错误响应输出 JSON 文本。"""
+
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b'' if data is None else json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def _term_weeks() -> int:
+    return getattr(settings, 'TIMETABLE_TERM_WEEKS', 20)
+
+
+def calendar_params(query_params) -> dict:
+    """解析 term / start / weeks；start 归一为所在周的周一。参数不合法时抛出 ValueError。"""
+    term = (query_params.get('term') or '').strip()
+    if not term:
+        raise ValueError('term 必填')
+    start = query_params.get('start') or getattr(settings, 'TIMETABLE_TERM_STARTS', {}).get(term)
+    if not start:
+        raise ValueError('缺少学期开始日期：请传 start（第 1 周周一，YYYY-MM-DD）')
+    try:
+        start = start if isinstance(start, dt.date) else dt.date.fromisoformat(str(start).strip())
+    except ValueError:
+        raise ValueError('start 须为 YYYY-MM-DD')
+    try:
+        weeks = int(query_params.get('weeks') or _term_weeks())
+    except (TypeError, ValueError):
+        raise ValueError('weeks 须为整数')
+    if not 1 <= weeks <= MAX_WEEK:
+        raise ValueError(f'weeks 须在 1~{MAX_WEEK} 之间')
+    return {'term': term, 'start': start - dt.timedelta(days=start.weekday()), 'weeks': weeks}
+
+
+def _password_hash(user) -> str:
+    return salted_hmac(TOKEN_SALT, user.password or '').hexdigest()[:16]
+
+
+def feed_token(user) -> str:
+    """订阅令牌：签名的用户ID + 密码摘要，用户修改密码后旧订阅地址失效。"""
+    return signing.dumps({'u': str(user.pk), 'h': _password_hash(user)}, salt=TOKEN_SALT, compress=True)
+
+
+def feed_user(token: str):
+    try:
+        value = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    user = get_user_model().objects.filter(pk=value.get('u'), is_active=True).first()
+    if user is None or not constant_time_compare(value.get('h', ''), _password_hash(user)):
+        return None
+    return user
+
+
+def _escape(text) -> str:
+    return (
+        str(text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line: str) -> str:
+    """按 RFC 5545 每行不超过 75 字节折行（不拆开 UTF-8 字符）。"""
+    out, size, parts = [], 0, []
+    for ch in line:
+        width = len(ch.encode('utf-8'))
+        if size + width > 75:
+            parts.append(''.join(out))
+            out, size = [' '], 1
+        out.append(ch)
+        size += width
+    parts.append(''.join(out))
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def _clock(value) -> dt.time | None:
+    try:
+        hour, minute = str(value or '').strip().split(':')
+        return dt.time(int(hour), int(minute))
+    except (TypeError, ValueError):
+        return None
+
+
+def lesson_weeks(week_mask: int, total: int) -> list[int]:
+    return [w for w in range(1, total + 1) if week_mask & (1 << (w - 1))]
+
+
+def _recurrence(weeks: list[int]) -> tuple[int, int, list[int]]:
+    """(INTERVAL, COUNT, 缺的周)：同奇偶的周按两周一次重复，其余按每周重复。"""
+    first, last = weeks[0], weeks[-1]
+    interval = 2 if len(weeks) > 1 and all((w - first) % 2 == 0 for w in weeks) else 1
+    present = set(weeks)
+    missing = [w for w in range(first, last + 1, interval) if w not in present]
+    return interval, (last - first) // interval + 1, missing
+
+
+def event_lines(lesson, params: dict, tzid: str):
+    weeks = lesson_weeks(lesson.week_mask, params['weeks'])
+    if not weeks or not 1 <= (lesson.day_of_week or 0) <= 7:
+        return
+    interval, count, missing = _recurrence(weeks)
+
+    def day(week):
+        return params['start'] + dt.timedelta(weeks=week - 1, days=lesson.day_of_week - 1)
+
+    begin, end = _clock(lesson.start_time), _clock(lesson.end_time)
+    if begin is not None:
+        if end is None or end <= begin:
+            end = (dt.datetime.combine(dt.date.min, begin) + dt.timedelta(minutes=LESSON_MINUTES)).time()
+        first = day(weeks[0])
+        start_value = f';TZID={tzid}:{dt.datetime.combine(first, begin):%Y%m%dT%H%M%S}'
+        end_value = f';TZID={tzid}:{dt.datetime.combine(first, end):%Y%m%dT%H%M%S}'
+        exdates = [f'{dt.datetime.combine(day(w), begin):%Y%m%dT%H%M%S}' for w in missing]
+        exdate_prefix = f'EXDATE;TZID={tzid}:'
+    else:
+        first = day(weeks[0])
+        start_value = f';VALUE=DATE:{first:%Y%m%d}'
+        end_value = f';VALUE=DATE:{first + dt.timedelta(days=1):%Y%m%d}'
+        exdates = [f'{day(w):%Y%m%d}' for w in missing]
+        exdate_prefix = 'EXDATE;VALUE=DATE:'
+
+    periods = ''
+    if lesson.start_period:
+        periods = f'第{lesson.start_period}节'
+        if lesson.end_period and lesson.end_period > lesson.start_period:
+            periods = f'第{lesson.start_period}-{lesson.end_period}节'
+    description = [
+        f'教师：{lesson.teacher_name}' if lesson.teacher_name else '',
+        f'班级：{lesson.class_name}' if lesson.class_name else '',
+        periods,
+        lesson.remark or '',
+    ]
+    stamp = lesson.updated_at.astimezone(dt.timezone.utc) if lesson.updated_at else dt.datetime(1970, 1, 1)
+
+    yield 'BEGIN:VEVENT'
+    yield f'UID:{lesson.id}@byss-timetable'
+    yield f'DTSTAMP:{stamp:%Y%m%dT%H%M%S}Z'
+    yield 'DTSTART' + start_value
+    yield 'DTEND' + end_value
+    if count > 1:
+        yield f'RRULE:FREQ=WEEKLY;INTERVAL={interval};COUNT={count}'
+    if exdates:
+        yield exdate_prefix + ','.join(exdates)
+    summary = lesson.course_name if not periods or begin is not None else f'{lesson.course_name}（{periods}）'
+    yield f'SUMMARY:{_escape(summary)}'
+    if lesson.room_name:
+        yield f'LOCATION:{_escape(lesson.room_name)}'
+    description = '\n'.join(part for part in description if part)
+    if description:
+        yield f'DESCRIPTION:{_escape(description)}'
+    yield 'END:VEVENT'
+
+
+def _timezone_lines(tzid: str, on: dt.date):
+    # 按学期开始日的 UTC 偏移声明时区（国内无夏令时，单一 STANDARD 分量即可）
+    moment = dt.datetime.combine(on, dt.time(12), tzinfo=zoneinfo.ZoneInfo(tzid))
+    minutes = int(moment.utcoffset().total_seconds() // 60)
+    offset = f"{'+' if minutes >= 0 else '-'}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}"
+    yield 'BEGIN:VTIMEZONE'
+    yield f'TZID:{tzid}'
+    yield 'BEGIN:STANDARD'
+    yield 'DTSTART:19700101T000000'
+    yield f'TZOFFSETFROM:{offset}'
+    yield f'TZOFFSETTO:{offset}'
+    yield f'TZNAME:{moment.tzname()}'
+    yield 'END:STANDARD'
+    yield 'END:VTIMEZONE'
+
+
+def calendar_chunks(queryset, scope: str, params: dict, chunk_size: int = 500):
+    """逐条课次生成 .ics 文本块。"""
+    tzid = settings.TIME_ZONE
+    lessons = queryset.only(*FIELDS).iterator(chunk_size=chunk_size)
+    first = next(lessons, None)
+    label = getattr(first, SCOPE_LABELS[scope], '') if first is not None and scope in SCOPE_LABELS else ''
+    name = f"课表 {params['term']}" + (f' {label}' if label else '')
+
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//BYSS//Timetable//ZH',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+        f'X-WR-TIMEZONE:{tzid}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}',
+        f'X-PUBLISHED-TTL:{REFRESH_INTERVAL}',
+        *_timezone_lines(tzid, params['start']),
+    ]
+    yield ''.join(_fold(line) for line in header)
+    for lesson in itertools.chain([first] if first is not None else [], lessons):
+        yield ''.join(_fold(line) for line in event_lines(lesson, params, tzid))
+    yield _fold('END:VCALENDAR')
+
+
+def _store_after(digest: str, chunks):
+    """边输出边收集，完整生成后写入快照；客户端中途断开则不缓存。"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    store_body(digest, ''.join(parts))
+
+
+def ics_response(request, scope: str, pk, identity: dict | None, params: dict, queryset):
+    """返回 .ics 流式响应；If-None-Match 命中时 304，快照命中时不查询课次。"""
+    filename = f'timetable-{scope}.ics'
+    if not enabled():
+        chunks = calendar_chunks(queryset(), scope, params)
+        etag = None
+    else:
+        digest = snapshot_digest(request, scope, pk, identity, 'ics', params['start'].isoformat(), params['weeks'])
+        etag = f'"{digest}"'
+        if not_modified(request, etag):
+            return cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        body = cached_body(digest)
+        chunks = [body] if body is not None else _store_after(digest, calendar_chunks(queryset(), scope, params))
+
+    response = StreamingHttpResponse(chunks, content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return cache_headers(response, etag) if etag else response
@@ -0,0 +1,245 @@
+"""登录用户 → 课表身份 的解析与缓存。
+
+已在 UserProfile 中绑定教师/学生档案的用户（见 apps.users，link_user_profiles 命令回填）直接使用绑定：
+教师按 teacher_id、学生按所在班级过滤，不再按姓名匹配。未绑定的用户按以下规则推断，身份包含：
+- display_name / name_teacher_id：按显示名匹配的教师档案（学校/班级/教师课表的可见范围，见 views._apply_user_scope）
+- contact_teacher：按手机号（用户名）或邮箱匹配的教师（id, 姓名）
+- class_id：按学号/邮箱/手机号匹配的学生所在班级
+
+解析一次后按用户缓存（TIMETABLE_IDENTITY_TIMEOUT 秒）。用户、档案绑定变更时删除该用户的缓存；
+教师、学生变更时按变更前后的姓名/联系方式与档案绑定找出受影响的用户（profile_users），只删除这些用户的缓存。
+批量导入等绕过 save() 的写入需自行调用 invalidate_identities；批量改绑档案等无法确定范围的写入调用
+bump_identity_version，所有用户的旧身份在下次读取时作废。
+"""
+
+from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+VERSION_KEY = 'timetable:identity:version'
+
+# 参与身份匹配的档案字段（教师按姓名/手机号/邮箱，学生按学号/手机号/邮箱）及影响身份内容的字段
+PROFILE_FIELDS = {
+    'teacher': ('name', 'phone', 'email'),
+    'student': ('student_id', 'phone', 'email', 'current_class_id'),
+}
+
+
+def _timeout() -> int:
+    return getattr(settings, 'TIMETABLE_IDENTITY_TIMEOUT', 600)
+
+
+def _user_key(user_id) -> str:
+    return f'timetable:identity:user:{user_id}'
+
+
+def user_display_name(user) -> str:
+    try:
+        name = (getattr(user, 'get_full_name', lambda: '')() or '').strip()
+    except Exception:
+        name = ''
+    if not name:
+        # 退化为 first_name + last_name 或 username
+        first = (getattr(user, 'first_name', '') or '').strip()
+        last = (getattr(user, 'last_name', '') or '').strip()
+        if first or last:
+            name = f"{first}{last}".strip()
+    if not name:
+        name = (getattr(user, 'username', '') or '').strip()
+    return name
+
+
+def bump_identity_version() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def invalidate_identities(user_ids) -> None:
+    """当前事务提交后删除这些用户的身份缓存（无事务时立即执行）。"""
+    keys = [_user_key(pk) for pk in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _users_matching(names, contacts, emails) -> set:
+    """显示名、用户名（手机号/学号）或邮箱与给定值相同的用户ID。"""
+    from django.contrib.auth import get_user_model
+
+    names, contacts, emails = ({v for v in values if v} for values in (names, contacts, emails))
+    cond = Q()
+    if names:
+        # 显示名为 "first last"：先按名字段粗筛，再逐个比对 user_display_name
+        firsts = names | {n.split(' ', 1)[0] for n in names}
+        cond |= Q(first_name__in=firsts) | Q(last_name__in=names) | Q(username__in=names)
+    if contacts:
+        cond |= Q(username__in=contacts)
+    if emails:
+        cond |= Q(email__in=emails)
+    if not cond:
+        return set()
+    users = get_user_model().objects.filter(cond).only('id', 'username', 'first_name', 'last_name', 'email')
+    return {
+        user.pk for user in users
+        if user.username in contacts or user.email in emails or user_display_name(user) in names
+    }
+
+
+def profile_users(kind: str, rows) -> set:
+    """身份可能引用这些教师/学生档案的用户ID：按档案绑定，或按姓名/联系方式匹配。
+
+    rows 为含 id 与 PROFILE_FIELDS[kind] 的字典；改名、换号时同时传入变更前后的值。
+    """
+    from apps.users.models import UserProfile
+
+    rows = list(rows)
+    if not rows:
+        return set()
+    phones = {r['phone'] for r in rows}
+    emails = {r['email'] for r in rows}
+    if kind == 'teacher':
+        users = _users_matching({r['name'] for r in rows}, phones, emails)
+    else:
+        users = _users_matching((), phones | {r['student_id'] for r in rows}, emails)
+    linked = UserProfile.objects.filter(**{f'{kind}_id__in': {r['id'] for r in rows}})
+    return users | set(linked.values_list('user_id', flat=True))
+
+
+def _priority(*conds):
+    """按条件先后排序：命中第一个条件的行排最前，与逐个 .first() 回退的结果一致。"""
+    whens = [When(cond, then=Value(i)) for i, cond in enumerate(conds) if cond is not None]
+    if not whens:
+        return Value(0)
+    return Case(*whens, default=Value(len(whens)), output_field=IntegerField())
+
+
+def _compute_identity(user) -> dict:
+    from apps.students.models import Student
+    from apps.teachers.models import Teacher
+    from apps.users.models import UserProfile
+
+    display_name = user_display_name(user)
+    profile = (
+        UserProfile.objects.filter(user_id=user.pk)
+        .values_list('teacher_id', 'student_id', 'student__current_class_id')
+        .first()
+    )
+    if profile and profile[0]:
+        return {'display_name': display_name, 'linked': 'teacher', 'name_teacher_id': str(profile[0]),
+                'contact_teacher': None, 'class_id': None}
+    if profile and profile[1]:
+        return {'display_name': display_name, 'linked': 'student', 'name_teacher_id': None,
+                'contact_teacher': None, 'class_id': str(profile[2]) if profile[2] else None}
+
+    username = (getattr(user, 'username', '') or '').strip()
+    email = (getattr(user, 'email', '') or '').strip()
+
+    name_teacher_id = None
+    if display_name:
+        name_teacher_id = Teacher.objects.filter(name=display_name).values_list('id', flat=True).first()
+
+    # 手机号（用户名）或邮箱匹配教师，手机号优先；空值不参与匹配
+    contact_teacher = None
+    contact = Q(phone=username) if username else Q()
+    if email:
+        contact |= Q(email=email)
+    if contact:
+        row = (
+            Teacher.objects.filter(contact)
+            .order_by(_priority(Q(phone=username) if username else None), 'pk')
+            .values_list('id', 'name')
+            .first()
+        )
+        if row:
+            contact_teacher = [str(row[0]), row[1]]
+
+    # 学号 > 邮箱 > 手机号
+    class_id = None
+    if contact_teacher is None and (username or email):
+        conds = []
+        if username:
+            conds.append(Q(student_id=username))
+        if email:
+            conds.append(Q(email=email))
+        if username:
+            conds.append(Q(phone=username))
+        any_cond = Q()
+        for cond in conds:
+            any_cond |= cond
+        class_id = (
+            Student.objects.filter(any_cond)
+            .order_by(_priority(*conds), 'pk')
+            .values_list('current_class_id', flat=True)
+            .first()
+        )
+        class_id = str(class_id) if class_id else None
+
+    return {
+        'display_name': display_name,
+        'linked': None,
+        'name_teacher_id': str(name_teacher_id) if name_teacher_id else None,
+        'contact_teacher': contact_teacher,
+        'class_id': class_id,
+    }
+
+
+def resolve_identity(user) -> dict | None:
+    """返回用户的课表身份；未登录返回 None。"""
+    if not user or not getattr(user, 'is_authenticated', False):
+        return None
+    key = _user_key(user.pk)
+    cached = cache.get_many([VERSION_KEY, key])
+    version = cached.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY) or 1
+    entry = cached.get(key)
+    if entry and entry.get('version') == version:
+        return entry['identity']
+    identity = _compute_identity(user)
+    cache.set(key, {'version': version, 'identity': identity}, _timeout())
+    return identity
+
+
+def linked_scope(identity: dict | None) -> Q | None:
+    """已绑定档案的用户：教师本人的课次或学生所在班级的课次；未绑定返回 None。"""
+    linked = identity.get('linked') if identity else None
+    if linked == 'teacher':
+        return Q(teacher_id=identity['name_teacher_id'])
+    if linked == 'student' and identity['class_id']:
+        return Q(class_ref_id=identity['class_id'])
+    return None
+
+
+def name_scope(identity: dict | None) -> Q | None:
+    """学校/班级/教师课表的可见范围。
+
+    已绑定教师档案时为单一的 teacher_id 条件；未绑定时按显示名匹配教师档案的 teacher_id，
+    或仅存储 teacher_name 的课次。学生不参与匹配。
+    """
+    if not identity or not identity['display_name']:
+        return None
+    linked = identity.get('linked')
+    if linked == 'teacher':
+        return Q(teacher_id=identity['name_teacher_id'])
+    if linked == 'student':
+        return None
+    scope = Q(teacher_name=identity['display_name'])
+    if identity['name_teacher_id']:
+        scope |= Q(teacher_id=identity['name_teacher_id'])
+    return scope
+
+
+def fallback_scope(identity: dict | None) -> Q | None:
+    """显示名无课次时的范围：教师本人或学生所在班级；None 表示学校课表。"""
+    if not identity:
+        return None
+    if identity['contact_teacher']:
+        teacher_id, teacher_name = identity['contact_teacher']
+        return Q(teacher_id=teacher_id) | Q(teacher_name=teacher_name)
+    if identity['class_id']:
+        return Q(class_ref_id=identity['class_id'])
+    return None
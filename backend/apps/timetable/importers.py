@@ -0,0 +1,386 @@
+import csv
+import io
+import itertools
+import time
+from contextlib import contextmanager
+from typing import List
+
+from django.db import transaction
+
+from apps.common.imports import DRY_RUN_MAX_ERRORS, ImportFailed, decode_upload, dry_run_result, report_progress
+from apps.courses.models import Course
+from apps.schools.models import Class as SchoolClass
+from apps.teachers.models import Teacher
+from .conflicts import UNCHECKED_WARNING, is_unchecked, rebuild_term, term_conflicts
+from .snapshots import schedule_bump
+from .models import Lesson, Room
+from .weeks import weeks_to_mask
+
+
+DAY_ALIAS = {'周一':1,'星期一':1,'一':1,'周二':2,'星期二':2,'二':2,'周三':3,'星期三':3,'三':3,'周四':4,'星期四':4,'四':4,'周五':5,'星期五':5,'五':5,'周六':6,'星期六':6,'六':6,'周日':7,'星期日':7,'日':7}
+
+
+def _text(value) -> str:
+    return str(value or '').strip()
+
+
+def _cell_at(row: tuple, idx: int):
+    return row[idx] if idx < len(row) else None
+
+
+def _split_lesson_cell(text: str) -> tuple[str, str, str]:
+    """单元格内容：第一行课程名，第二行“教师@教室”。"""
+    course_name = text.split('\n')[0].strip()
+    rest = text.split('\n')[1].strip() if '\n' in text else ''
+    teacher_name = ''
+    room_name = ''
+    if rest:
+        parts = [p.strip() for p in rest.replace('＠','@').split('@')]
+        teacher_name = parts[0] if parts else ''
+        room_name = parts[1] if len(parts) > 1 else ''
+    return course_name, teacher_name, room_name
+
+
+def parse_excel(file, all_sheets: bool = False) -> List[dict]:
+    """解析 Excel 表格课表样式，返回原始行记录。
+
+    以只读模式逐行读取（read_only + iter_rows(values_only=True)），不加载样式，也不做随机单元格访问。
+    默认只解析活动工作表（工作簿中常有备份、上周课表等工作表）；all_sheets=True 时依次解析所有工作表，
+    无法确定星期的工作表不会产生记录。
+    """
+    import openpyxl  # type: ignore
+
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = []
+        for ws in (wb.worksheets if all_sheets else [wb.active]):
+            rows.extend(_parse_sheet(ws))
+        return rows
+    finally:
+        wb.close()
+
+
+def _parse_sheet(ws) -> List[dict]:
+    # 支持两种 Excel 样式：
+    # A) 第一列是“班级”，第一行是“星期*”合并，第二行“上午/下午”，第三行 1..9 节；第4行开始为各班级
+    # B) 第一列是“节次/时间”，第一行是“星期*”，第二行可选“上午/下午”，后续为时间行
+    it = ws.iter_rows(values_only=True)
+    head = []
+    for row in it:
+        head.append(row)
+        if len(head) == 3:
+            break
+    if not head:
+        return []
+
+    headers = [_text(v) for v in head[0]]
+    A1 = headers[0] if headers else ''
+    # 合并单元格只有左上角有值：向右填充最后出现的星期
+    day_cols = []
+    last_d = None
+    for h in headers:
+        d = DAY_ALIAS.get(h, None)
+        if d:
+            last_d = d
+        day_cols.append(d or last_d)
+    # 若整行为空，尝试用工作表标题判断
+    day_from_ws_title = DAY_ALIAS.get(ws.title, None)
+
+    def day_at(idx):
+        day = day_cols[idx] if idx < len(day_cols) else None
+        return day or day_from_ws_title
+
+    rows = []
+    if '班级' in A1:
+        # 样式A：按班级为行
+        # 第三行应为节次数字；若不是，使用第二行
+        period_idx = 2
+        period_values = [_text(v) for v in head[2]] if len(head) >= 3 else []
+        if not any(v == '1' for v in period_values):
+            period_idx = 1
+            period_values = [_text(v) for v in head[1]] if len(head) >= 2 else []
+        # 表头之后的数据行：样式A-2 时第三行已是数据
+        body = itertools.chain(head[period_idx + 1:], it)
+        for row in body:
+            class_name = _text(_cell_at(row, 0))
+            if not class_name:
+                continue
+            for idx in range(1, len(row)):
+                day = day_at(idx)
+                if not day:
+                    continue
+                p_val = period_values[idx] if idx < len(period_values) else ''
+                if not p_val.isdigit():
+                    continue
+                cell_val = row[idx]
+                if not cell_val:
+                    continue
+                text = str(cell_val).strip()
+                if not text:
+                    continue
+                course_name, teacher_name, room_name = _split_lesson_cell(text)
+                rows.append({
+                    'day': day,
+                    'course_name': course_name,
+                    'teacher_name': teacher_name,
+                    'room': room_name,
+                    'class_name': class_name,
+                    'start_period': int(p_val),
+                    'end_period': int(p_val),
+                })
+    else:
+        # 样式B：按时间为行（旧方案）
+        second_row_values = [_text(v) for v in head[1]] if len(head) >= 2 else []
+        has_ampm = any(v in ['上午','下午'] for v in second_row_values)
+        body = itertools.chain(head[2 if has_ampm else 1:], it)
+        for row in body:
+            time_label = _text(_cell_at(row, 0))
+            for idx in range(1, len(row)):
+                day = day_at(idx)
+                if not day:
+                    continue
+                cell = row[idx]
+                if not cell:
+                    continue
+                text = str(cell).strip()
+                if not text:
+                    continue
+                course_name, teacher_name, room_name = _split_lesson_cell(text)
+                rows.append({
+                    'day': day,
+                    'course_name': course_name,
+                    'teacher_name': teacher_name,
+                    'room': room_name,
+                    'time_label': time_label,
+                })
+    return rows
+
+
+def parse_csv(raw: bytes) -> List[dict]:
+    text = decode_upload(raw, '无法解码文件，请使用 UTF-8 或 GBK')
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def parse_file(file, filename: str, all_sheets: bool = False) -> List[dict]:
+    # 若为 Excel，优先按 Excel 表格课表样式解析；否则回退 CSV
+    name = (filename or '').lower()
+    if name.endswith('.xlsx') or name.endswith('.xls'):
+        try:
+            return parse_excel(file, all_sheets)
+        except Exception as e:
+            raise ImportFailed('INVALID_FILE', f'Excel 解析失败: {e}')
+    return parse_csv(file.read())
+
+
+# 表头同义映射
+ALIAS = {
+    'term':['term','学期'],
+    'weeks':['weeks','周次'],
+    'day':['day','星期','星期几'],
+    'start_time':['start_time','开始时间'],
+    'end_time':['end_time','结束时间'],
+    'start_period':['start_period','开始节次'],
+    'end_period':['end_period','结束节次'],
+    'course_name':['course_name','课程名称','课程'],
+    'teacher_name':['teacher_name','教师名称','老师','授课老师'],
+    'class_name':['class_name','班级名称','班级'],
+    'room':['room','教室','教室名称'],
+    'week_type':['week_type','单双周'],
+    'remark':['remark','备注'],
+}
+
+DAY_MAP = {'一':1,'二':2,'三':3,'四':4,'五':5,'六':6,'日':7,'天':7,'周一':1,'周二':2,'周三':3,'周四':4,'周五':5,'周六':6,'周日':7,'Mon':1,'Tue':2,'Wed':3,'Thu':4,'Fri':5,'Sat':6,'Sun':7}
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _get_val(row, key):
+    for k in ALIAS.get(key, [key]):
+        if k in row and row[k] is not None:
+            return str(row[k]).strip()
+    return ''
+
+
+def _first_by_name(queryset, names) -> dict:
+    """按名称批量加载；同名取主键最小的一条，与逐条 .filter(name=...).first()（模型无默认排序时按主键）一致。"""
+    if not names:
+        return {}
+    result = {}
+    for obj in queryset.filter(name__in=names).order_by('pk').only('id', 'name'):
+        result.setdefault(obj.name, obj)
+    return result
+
+
+class TimetableImportEngine:
+    """课表导入：parse（解析文件为课次记录）→ resolve（一次性加载课程/教师/班级/教室）→ write（批量写入）。
+
+    返回 {"created": n, "skipped": 缺课程名跳过的行数, "unresolved": {...}, "timings": {...}}。
+    """
+
+    def __init__(
+        self, term: str, mode: str = 'append', batch_size: int = WRITE_BATCH_SIZE, progress=None,
+        all_sheets: bool = False,
+    ):
+        self.term = term
+        self.mode = mode
+        self.all_sheets = all_sheets
+        self.batch_size = batch_size
+        self.progress = progress
+        self.timings: dict[str, float] = {}
+        self.skipped = 0
+        self.unchecked = 0
+
+    @contextmanager
+    def _phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def run(self, file, filename: str = '') -> dict:
+        with self._phase('parse'):
+            records = self.parse(parse_file(file, filename, self.all_sheets))
+        report_progress(self.progress, 0, len(records), force=True)
+        with self._phase('resolve'):
+            index = self.resolve(records)
+        with self._phase('write'):
+            created, unresolved = self.write(records, index)
+        with self._phase('conflicts'):
+            conflicts = len(term_conflicts(self.term))
+        report_progress(self.progress, len(records), len(records), force=True)
+        result = {
+            'created': created, 'skipped': self.skipped, 'unresolved': unresolved,
+            'conflicts': conflicts, 'unchecked': self.unchecked, 'timings': self.timings,
+        }
+        if self.unchecked:
+            result['warnings'] = [f'{self.unchecked} 条{UNCHECKED_WARNING}']
+        return result
+
+    def preview(self, file, filename: str = '', max_errors: int = DRY_RUN_MAX_ERRORS) -> dict:
+        """预检：parse + resolve，不写库。未匹配的课程/教师/班级名称按名称去重列入 errors（课次仍会导入，关联为空）。"""
+        with self._phase('parse'):
+            records = self.parse(parse_file(file, filename, self.all_sheets))
+        with self._phase('resolve'):
+            index = self.resolve(records)
+            unresolved = {'course': 0, 'teacher': 0, 'class': 0}
+            missing: dict[tuple[str, str], None] = {}
+            for kind, key, lookup in (
+                ('course', 'course_name', index['courses']),
+                ('teacher', 'teacher_name', index['teachers']),
+                ('class', 'class_name', index['classes']),
+            ):
+                for r in records:
+                    if r[key] and r[key] not in lookup:
+                        unresolved[kind] += 1
+                        missing.setdefault((kind, r[key]), None)
+            deleted = Lesson.objects.filter(term=self.term).count() if self.mode == 'overwrite' else 0
+        labels = {'course': '课程', 'teacher': '教师', 'class': '班级'}
+        errors = [{'row': None, 'message': f'{labels[kind]}不存在: {name}'} for kind, name in missing]
+        return dry_run_result(
+            rows=len(records) + self.skipped,
+            created=len(records),
+            updated=0,
+            rejected=self.skipped,
+            errors=errors,
+            max_errors=max_errors,
+            skipped=self.skipped,
+            unresolved=unresolved,
+            deleted=deleted,
+            new_rooms=len(index['missing_rooms']),
+            timings=self.timings,
+        )
+
+    # ---- parse ----
+    def parse(self, rows: List[dict]) -> List[dict]:
+        records = []
+        for row in rows:
+            course_name = _get_val(row, 'course_name')
+            if not course_name:
+                self.skipped += 1
+                continue
+            d = str(_get_val(row, 'day'))
+            # Excel 课表样式下可用 time_label 推断时间/节次；这里先直接落时间为空，由前端按节次渲染
+            start_period = _get_val(row, 'start_period')
+            end_period = _get_val(row, 'end_period')
+            week_type = _get_val(row, 'week_type')
+            records.append({
+                'day_of_week': int(d) if d.isdigit() else DAY_MAP.get(d, 1),
+                'start_time': _get_val(row, 'start_time') or None,
+                'end_time': _get_val(row, 'end_time') or None,
+                'start_period': int(start_period) if start_period.isdigit() else None,
+                'end_period': int(end_period) if end_period.isdigit() else None,
+                'week_type': 'odd' if week_type == '单' else ('even' if week_type == '双' else 'all'),
+                'weeks': _get_val(row, 'weeks'),
+                'course_name': course_name,
+                'teacher_name': _get_val(row, 'teacher_name'),
+                'class_name': _get_val(row, 'class_name'),
+                'room_name': _get_val(row, 'room'),
+                'remark': _get_val(row, 'remark'),
+            })
+        return records
+
+    # ---- resolve ----
+    def resolve(self, records: List[dict]) -> dict:
+        def names(key):
+            return {r[key] for r in records if r[key]}
+
+        rooms = _first_by_name(Room.objects.all(), names('room_name'))
+        return {
+            'courses': _first_by_name(Course.objects.all(), names('course_name')),
+            'teachers': _first_by_name(Teacher.objects.all(), names('teacher_name')),
+            'classes': _first_by_name(SchoolClass.objects.all(), names('class_name')),
+            'rooms': rooms,
+            'missing_rooms': sorted(names('room_name') - rooms.keys()),
+        }
+
+    # ---- write ----
+    def write(self, records: List[dict], index: dict) -> tuple[int, dict]:
+        courses, teachers, classes, rooms = index['courses'], index['teachers'], index['classes'], index['rooms']
+        unresolved = {'course': 0, 'teacher': 0, 'class': 0}
+        with transaction.atomic():
+            if self.mode == 'overwrite':
+                Lesson.objects.filter(term=self.term).delete()
+
+            if index['missing_rooms']:
+                new_rooms = [Room(name=name) for name in index['missing_rooms']]
+                Room.objects.bulk_create(new_rooms, batch_size=self.batch_size)
+                rooms.update({room.name: room for room in new_rooms})
+
+            lessons = []
+            for idx, r in enumerate(records, start=1):
+                report_progress(self.progress, idx, len(records))
+                course = courses.get(r['course_name'])
+                teacher = teachers.get(r['teacher_name']) if r['teacher_name'] else None
+                class_obj = classes.get(r['class_name']) if r['class_name'] else None
+                unresolved['course'] += course is None
+                unresolved['teacher'] += bool(r['teacher_name']) and teacher is None
+                unresolved['class'] += bool(r['class_name']) and class_obj is None
+                lessons.append(Lesson(
+                    term=self.term,
+                    course=course,
+                    teacher=teacher,
+                    class_ref=class_obj,
+                    room=rooms.get(r['room_name']) if r['room_name'] else None,
+                    # bulk_create 不经过 save()，需手动计算周次位图
+                    week_mask=weeks_to_mask(r['weeks'], r['week_type']),
+                    **r,
+                ))
+            Lesson.objects.bulk_create(lessons, batch_size=self.batch_size)
+            self.unchecked = sum(map(is_unchecked, lessons))
+            # bulk_create 不触发 post_save，按学期重建冲突检测用的占用索引
+            rebuild_term(self.term)
+            schedule_bump(self.term)
+        return len(lessons), unresolved
+
+
+def run_import(raw: bytes, filename: str = '', params: dict | None = None, progress=None) -> dict:
+    params = params or {}
+    engine = TimetableImportEngine(
+        params.get('term') or '', params.get('mode') or 'append', progress=progress,
+        all_sheets=bool(params.get('all_sheets')),
+    )
+    if params.get('dry_run'):
+        return engine.preview(io.BytesIO(raw), filename, max_errors=params.get('max_errors') or DRY_RUN_MAX_ERRORS)
+    result = engine.run(io.BytesIO(raw), filename)
+    return {'data': result, 'errors': [], 'rows': result['created'] + result['skipped']}
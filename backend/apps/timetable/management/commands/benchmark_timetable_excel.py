@@ -0,0 +1,137 @@
+import functools
+import gc
+import io
+import json
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from apps.timetable.importers import DAY_ALIAS, _split_lesson_cell, parse_excel
+
+
+DAYS = ['周一', '周二', '周三', '周四', '周五']
+COURSES = ['语文', '数学', '英语', '物理', '化学', '历史', '地理', '生物', '体育', '音乐']
+
+
+def build_workbook(classes: int, sheets: int, periods: int, seed: int = 42) -> bytes:
+    """生成样式A（按班级为行）的多工作表课表：每个工作表一个年级段，第一行为合并的星期表头。"""
+    import openpyxl  # type: ignore
+
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    per_sheet = max(1, classes // sheets)
+    for s in range(sheets):
+        ws = wb.create_sheet(f'年级{s + 1}')
+        ws.cell(row=1, column=1, value='班级')
+        ws.cell(row=2, column=1, value='')
+        col = 2
+        for day in DAYS:
+            ws.cell(row=1, column=col, value=day)
+            ws.merge_cells(start_row=1, start_column=col, end_row=1, end_column=col + periods - 1)
+            for p in range(periods):
+                ws.cell(row=2, column=col + p, value='上午' if p < periods // 2 else '下午')
+                ws.cell(row=3, column=col + p, value=str(p + 1))
+            col += periods
+        for c in range(per_sheet):
+            r = 4 + c
+            ws.cell(row=r, column=1, value=f'{s + 1}年级{c + 1}班')
+            for j in range(2, col):
+                course = rnd.choice(COURSES)
+                ws.cell(row=r, column=j, value=f'{course}\n{course}老师{rnd.randint(1, 20)}@{rnd.randint(101, 130)}')
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def legacy_parse_excel(file) -> list:
+    """原全量模式实现（load_workbook + ws.cell 随机访问，样式A），逐个工作表执行以便对比结果。"""
+    import openpyxl  # type: ignore
+
+    rows = []
+    wb = openpyxl.load_workbook(file, data_only=True)
+    for ws in wb.worksheets:
+        headers = [str(col[0].value or '').strip() for col in ws.iter_cols(min_row=1, max_row=1)]
+        day_cols, last_d = [], None
+        for h in headers:
+            d = DAY_ALIAS.get(h, None)
+            if d:
+                last_d = d
+            day_cols.append(d or last_d)
+        day_from_ws_title = DAY_ALIAS.get(ws.title, None)
+        period_row = 3
+        period_values = [str(c.value or '').strip() for c in ws[period_row]] if ws.max_row >= 3 else []
+        if not any(v == '1' for v in period_values):
+            period_row = 2
+        start_row = 4 if period_row == 3 else 3
+        for r in range(start_row, ws.max_row + 1):
+            class_name = str(ws.cell(row=r, column=1).value or '').strip()
+            if not class_name:
+                continue
+            for c_idx in range(2, ws.max_column + 1):
+                day = (day_cols[c_idx - 1] if c_idx - 1 < len(day_cols) else None) or day_from_ws_title
+                if not day:
+                    continue
+                p_val = str(ws.cell(row=period_row, column=c_idx).value or '').strip()
+                if not p_val.isdigit():
+                    continue
+                cell_val = ws.cell(row=r, column=c_idx).value
+                if not cell_val or not str(cell_val).strip():
+                    continue
+                course_name, teacher_name, room_name = _split_lesson_cell(str(cell_val).strip())
+                rows.append({
+                    'day': day,
+                    'course_name': course_name,
+                    'teacher_name': teacher_name,
+                    'room': room_name,
+                    'class_name': class_name,
+                    'start_period': int(p_val),
+                    'end_period': int(p_val),
+                })
+    return rows
+
+
+class Command(BaseCommand):
+    help = '课表 Excel 解析基准：对比全量加载与只读流式解析的耗时和内存峰值'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=100, help='班级数（默认 100）')
+        parser.add_argument('--sheets', type=int, default=4, help='工作表数（默认 4）')
+        parser.add_argument('--periods', type=int, default=9, help='每天节次（默认 9）')
+        parser.add_argument('--file', help='改为使用已有的 .xlsx 文件')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], 'rb') as fh:
+                data = fh.read()
+        else:
+            t0 = time.perf_counter()
+            data = build_workbook(options['classes'], options['sheets'], options['periods'])
+            self.stdout.write(
+                f"生成工作簿：{options['classes']} 个班级，{options['sheets']} 个工作表，"
+                f'{len(data) / 1024:.0f} KB，{time.perf_counter() - t0:.1f} s'
+            )
+
+        results = {}
+        # 生成的工作簿每个年级一个工作表，只读解析同样读取全部工作表
+        readers = (('full', legacy_parse_excel), ('read_only', functools.partial(parse_excel, all_sheets=True)))
+        for label, fn in readers:
+            gc.collect()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            rows = fn(io.BytesIO(data))
+            elapsed = (time.perf_counter() - t0) * 1000
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[label] = rows
+            self.stdout.write(f'{label:>9}: {elapsed:9.1f} ms，峰值内存 {peak / 1024 / 1024:7.1f} MB，{len(rows)} 条课次')
+
+        if options['file']:
+            return
+        same = json.dumps(results['full'], ensure_ascii=False) == json.dumps(results['read_only'], ensure_ascii=False)
+        if same:
+            self.stdout.write(self.style.SUCCESS('两种解析结果一致'))
+        else:
+            self.stdout.write(self.style.ERROR('两种解析结果不一致'))
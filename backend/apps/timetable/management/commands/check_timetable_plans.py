@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from apps.common.management.commands.generate_school import add_spec_arguments, spec_from_options
+from apps.common.synthetic import generate_school
+from apps.timetable.models import Lesson
+from apps.timetable.plans import endpoint_urls, explain, lesson_queries
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '对课表接口（学校/班级/教师/教室/我的课表）实际执行的课次查询做 EXPLAIN，出现全表扫描时以非零状态退出；数据始终回滚'
+
+    def add_arguments(self, parser):
+        add_spec_arguments(parser)
+        parser.add_argument('--existing', action='store_true', help='不生成数据，直接使用库中 --term 学期的数据')
+        parser.add_argument('--fail-on-sort', action='store_true', help='计划需要额外排序（filesort）时也视为失败')
+        parser.add_argument('--verbose-plan', action='store_true', help='输出完整执行计划')
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                if not options['existing']:
+                    data = generate_school(spec_from_options(options))
+                    self.stdout.write(f'已生成临时数据（{data.elapsed_s} s）：{data.counts}')
+                failures = self._check(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        if failures:
+            raise CommandError(f'以下查询出现全表扫描或额外排序：{", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('课表接口的课次查询均使用索引'))
+
+    def _client(self, lesson) -> APIClient:
+        # 课表接口按用户显示名匹配教师，检查账号与一名任课教师同名（同 conftest.teacher_user）
+        user, _ = User.objects.get_or_create(
+            username=f'plan-{lesson.teacher.teacher_id}',
+            defaults={'first_name': lesson.teacher.name, 'is_staff': True, 'is_superuser': True},
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _check(self, options) -> list:
+        term = options['term']
+        lesson = (
+            Lesson.objects.filter(term=term, teacher__isnull=False, class_ref__isnull=False, room__isnull=False)
+            .select_related('teacher')
+            .first()
+        )
+        if lesson is None:
+            raise CommandError(f'学期 {term} 下缺少关联了教师/班级/教室的课次')
+        client = self._client(lesson)
+
+        failures = []
+        for label, url in endpoint_urls(lesson):
+            try:
+                queries = lesson_queries(client, url)
+                results = [explain(sql, params) for sql, params in queries]
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            for result in results:
+                bad = result['full_scan'] or (options['fail_on_sort'] and result['sort'])
+                flags = ['全表扫描' if result['full_scan'] else '索引', '额外排序' if result['sort'] else '索引有序']
+                line = f'{label:<14} {" / ".join(flags)}'
+                self.stdout.write(self.style.ERROR(line) if bad else line)
+                if bad or options['verbose_plan']:
+                    for step in result['plan']:
+                        self.stdout.write(f'    {step}')
+                if bad:
+                    failures.append(label)
+        return failures
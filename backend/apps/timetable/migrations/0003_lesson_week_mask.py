@@ -0,0 +1,78 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:13
+
+import re
+
+from django.db import migrations, models
+
+
+# 以下为迁移时 apps.timetable.weeks 的冻结副本，之后对该模块的修改不影响本迁移
+MAX_WEEK = 62
+ALL_WEEKS = (1 << MAX_WEEK) - 1
+ODD_WEEKS = sum(1 << (w - 1) for w in range(1, MAX_WEEK + 1, 2))
+EVEN_WEEKS = ALL_WEEKS & ~ODD_WEEKS
+
+_SEPARATORS = re.compile(r"[,，、;；\s]+")
+
+
+def parse_weeks(weeks):
+    s = (weeks or "").strip().replace("周", "")
+    if not s:
+        return None
+    result = set()
+    for part in _SEPARATORS.split(s):
+        if not part:
+            continue
+        a, sep, b = part.partition("-")
+        try:
+            start = int(a)
+            end = int(b) if sep else start
+        except ValueError:
+            continue
+        if start > end:
+            start, end = end, start
+        result.update(w for w in range(max(start, 1), min(end, MAX_WEEK) + 1))
+    return result
+
+
+def weeks_to_mask(weeks, week_type="all"):
+    parsed = parse_weeks(weeks)
+    if parsed is None:
+        mask = ALL_WEEKS
+    else:
+        mask = 0
+        for w in parsed:
+            mask |= 1 << (w - 1)
+    if week_type == "odd":
+        mask &= ODD_WEEKS
+    elif week_type == "even":
+        mask &= EVEN_WEEKS
+    return mask
+
+
+def backfill_week_mask(apps, schema_editor):
+    Lesson = apps.get_model('timetable', 'Lesson')
+    batch = []
+    for lesson in Lesson.objects.only('id', 'weeks', 'week_type').iterator(chunk_size=2000):
+        lesson.week_mask = weeks_to_mask(lesson.weeks, lesson.week_type)
+        batch.append(lesson)
+        if len(batch) >= 2000:
+            Lesson.objects.bulk_update(batch, ['week_mask'])
+            batch = []
+    if batch:
+        Lesson.objects.bulk_update(batch, ['week_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0002_alter_lesson_end_time_alter_lesson_start_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='week_mask',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_week_mask, migrations.RunPython.noop),
+    ]
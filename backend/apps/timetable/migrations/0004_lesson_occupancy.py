@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# 以下为迁移时 apps.timetable.conflicts 占用展开逻辑的冻结副本，之后对该模块的修改不影响本迁移；
+# week_mask 已由 0003 回填，直接使用
+MAX_PERIODS = 16
+
+
+def _resources(lesson):
+    items = []
+    for kind, fk, name in (
+        ('teacher', lesson.teacher_id, lesson.teacher_name),
+        ('room', lesson.room_id, lesson.room_name),
+        ('class', lesson.class_ref_id, lesson.class_name),
+    ):
+        if fk:
+            items.append((kind, str(fk)))
+        elif name:
+            items.append((kind, f'name:{name}'))
+    return items
+
+
+def _periods(lesson):
+    if not lesson.start_period:
+        return []
+    end = lesson.end_period if lesson.end_period and lesson.end_period >= lesson.start_period else lesson.start_period
+    return list(range(lesson.start_period, min(end, lesson.start_period + MAX_PERIODS - 1) + 1))
+
+
+def occupancy_values(lesson):
+    return [
+        {
+            'lesson_id': lesson.pk, 'term': lesson.term, 'day_of_week': lesson.day_of_week,
+            'period': period, 'week_mask': lesson.week_mask, 'kind': kind, 'resource': resource,
+        }
+        for period in _periods(lesson)
+        for kind, resource in _resources(lesson)
+    ]
+
+
+def build_occupancy(apps, schema_editor):
+    Lesson = apps.get_model('timetable', 'Lesson')
+    LessonOccupancy = apps.get_model('timetable', 'LessonOccupancy')
+    batch = []
+    for lesson in Lesson.objects.iterator(chunk_size=2000):
+        batch.extend(LessonOccupancy(**values) for values in occupancy_values(lesson))
+        if len(batch) >= 2000:
+            LessonOccupancy.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        LessonOccupancy.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0003_lesson_week_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=16)),
+                ('day_of_week', models.PositiveSmallIntegerField()),
+                ('period', models.PositiveSmallIntegerField()),
+                ('week_mask', models.BigIntegerField(default=0)),
+                ('kind', models.CharField(choices=[('teacher', 'teacher'), ('room', 'room'), ('class', 'class')], max_length=8)),
+                ('resource', models.CharField(max_length=80)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='timetable.lesson')),
+            ],
+            options={
+                'verbose_name': '课次占用索引',
+                'verbose_name_plural': '课次占用索引',
+                'db_table': 'lesson_occupancy',
+                'indexes': [models.Index(fields=['term', 'kind', 'resource', 'day_of_week', 'period'], name='occ_slot_idx')],
+            },
+        ),
+        migrations.RunPython(build_occupancy, migrations.RunPython.noop),
+    ]
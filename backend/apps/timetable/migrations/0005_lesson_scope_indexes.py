@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0004_lesson_occupancy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['term', 'day_of_week', 'start_time', 'start_period'], name='lesson_term_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['term', 'class_ref', 'day_of_week', 'start_time', 'start_period'], name='lesson_class_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['term', 'teacher', 'day_of_week', 'start_time', 'start_period'], name='lesson_teacher_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['term', 'room', 'day_of_week', 'start_time', 'start_period'], name='lesson_room_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['term', 'teacher_name', 'day_of_week', 'start_time', 'start_period'], name='lesson_tname_order_idx'),
+        ),
+        # 新索引以 (term, day_of_week) 开头，原索引为其前缀，建好新索引后删除
+        migrations.RemoveIndex(
+            model_name='lesson',
+            name='lessons_term_fa20c4_idx',
+        ),
+    ]
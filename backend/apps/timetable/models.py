@@ -1,5 +1,6 @@
 from django.db import models
 from apps.common.models import BaseModel
+from apps.timetable.weeks import weeks_to_mask
 
 
 class Room(BaseModel):
@@ -23,6 +24,9 @@ class Lesson(BaseModel):
     end_period = models.PositiveSmallIntegerField(null=True, blank=True)
     week_type = models.CharField(max_length=8, choices=[('odd','odd'),('even','even'),('all','all')], default='all')
     weeks = models.CharField(max_length=64, blank=True, default='')  # 如 1-16 或 1,3,5
+    # 由 weeks + week_type 计算的周次位图（见 apps.timetable.weeks），save() 时自动维护；
+    # bulk_create/update 等绕过 save() 的写入需自行调用 weeks_to_mask
+    week_mask = models.BigIntegerField(default=0)
 
     course = models.ForeignKey('courses.Course', on_delete=models.SET_NULL, null=True, blank=True)
     teacher = models.ForeignKey('teachers.Teacher', on_delete=models.SET_NULL, null=True, blank=True)
@@ -38,10 +42,61 @@ class Lesson(BaseModel):
 
     class Meta:
         db_table = 'lessons'
+        # 课表查询均为 学期 + 范围 过滤、按 (星期, 开始时间, 开始节次) 排序：
+        # 每种范围一条复合索引，排序列紧跟等值列，索引顺序即结果顺序，无需额外排序（apps/timetable/tests.py 以 EXPLAIN 断言）。
+        # 这些索引有意不做覆盖索引，各范围都需回表：
+        # - 学校（term_order）：整学期课次全部返回，覆盖索引等于把整张表按索引顺序再存一份
+        # - 班级/教师/教室（class/teacher/room_order）：一个范围一学期只有几十条课次，回表次数同结果行数；
+        #   接口返回全部列（含 remark 这类 TEXT 列，MySQL 无法放入索引），覆盖后每条索引与行本身一样宽
+        # - 我的课表（tname_order 及 term_order）：过滤为 教师ID/姓名/回退范围 的 OR 条件，无法按单一索引定位，
+        #   由学期前缀取范围后逐行判断
+        # - 带周次时：week_mask 位运算无法在索引中定位，在上述索引范围内回表后过滤，单周最多排除约一半行
         indexes = [
-            models.Index(fields=['term','day_of_week']),
+            models.Index(fields=['term', 'day_of_week', 'start_time', 'start_period'], name='lesson_term_order_idx'),
+            models.Index(fields=['term', 'class_ref', 'day_of_week', 'start_time', 'start_period'], name='lesson_class_order_idx'),
+            models.Index(fields=['term', 'teacher', 'day_of_week', 'start_time', 'start_period'], name='lesson_teacher_order_idx'),
+            models.Index(fields=['term', 'room', 'day_of_week', 'start_time', 'start_period'], name='lesson_room_order_idx'),
+            models.Index(fields=['term', 'teacher_name', 'day_of_week', 'start_time', 'start_period'], name='lesson_tname_order_idx'),
         ]
         verbose_name = '课程表-课次'
         verbose_name_plural = '课程表-课次'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 加载时的学期：课次改到其他学期时，原学期的课表快照也需作废（见 apps.timetable.snapshots）
+        instance._loaded_term = instance.__dict__.get('term')
+        return instance
 
+    def save(self, *args, **kwargs):
+        self.week_mask = weeks_to_mask(self.weeks, self.week_type)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'weeks', 'week_type'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'week_mask'}
+        super().save(*args, **kwargs)
+
+
+class LessonOccupancy(models.Model):
+    """课次占用索引：每条课次按 节次 × 资源（教师/教室/班级）展开一行，用于冲突检测（见 apps.timetable.conflicts）。
+
+    由 Lesson 的 post_save 与批量写入后的 rebuild_term 维护；resource 为关联对象ID，
+    仅存名称的课次为 'name:<名称>'。未填写节次的课次不参与索引。
+    """
+
+    KIND_CHOICES = [('teacher', 'teacher'), ('room', 'room'), ('class', 'class')]
+
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='occupancy')
+    term = models.CharField(max_length=16)
+    day_of_week = models.PositiveSmallIntegerField()
+    period = models.PositiveSmallIntegerField()
+    week_mask = models.BigIntegerField(default=0)
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    resource = models.CharField(max_length=80)
+
+    class Meta:
+        db_table = 'lesson_occupancy'
+        indexes = [
+            models.Index(fields=['term', 'kind', 'resource', 'day_of_week', 'period'], name='occ_slot_idx'),
+        ]
+        verbose_name = '课次占用索引'
+        verbose_name_plural = '课次占用索引'
@@ -0,0 +1,98 @@
+"""课表接口（学校/班级/教师/教室/我的课表）实际执行的课次查询的执行计划（EXPLAIN）。
+
+apps/timetable/tests.py 以合成学校数据断言这些查询不做全表扫描、不额外排序；
+check_timetable_plans 命令对现有库或临时数据输出同样的检查结果。
+"""
+
+import re
+
+from django.db import connection
+from django.test.utils import override_settings
+
+from .models import Lesson
+
+
+ENDPOINTS = {
+    'school': '/api/v1/timetable/school/?term={term}',
+    'class': '/api/v1/timetable/classes/{class_id}/?term={term}',
+    'teacher': '/api/v1/timetable/teachers/{teacher_id}/?term={term}',
+    'room': '/api/v1/timetable/rooms/{room_id}/?term={term}',
+    'me': '/api/v1/timetable/me/?term={term}',
+}
+
+WEEK_SUFFIX = '&week=1'
+
+TABLE = Lesson._meta.db_table
+
+
+def _aliases(sql: str) -> set:
+    """SQL 中课次表的名称与别名（子查询中 Django 使用 U0 等别名）。"""
+    names = {TABLE}
+    pattern = rf'[`"]{TABLE}[`"](?:\s+(?:AS\s+)?[`"]?(\w+)[`"]?)?'
+    for match in re.finditer(pattern, sql, re.IGNORECASE):
+        if match.group(1) and match.group(1).upper() not in {'WHERE', 'INNER', 'LEFT', 'ON', 'ORDER', 'GROUP', 'LIMIT'}:
+            names.add(match.group(1))
+    return names
+
+
+def explain(sql: str, params) -> dict:
+    """返回 {'plan': [计划行], 'full_scan': bool, 'sort': bool}，仅判断课次表的访问方式。"""
+    names = _aliases(sql)
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            cols = [c[0] for c in cursor.description]
+            rows = [dict(zip(cols, row)) for row in cursor.fetchall()]
+            plan = [f"{r.get('table')} type={r.get('type')} key={r.get('key')} {r.get('Extra') or ''}".strip() for r in rows]
+            full_scan = any(r.get('table') in names and r.get('type') == 'ALL' for r in rows)
+            sort = any('filesort' in (r.get('Extra') or '') for r in rows)
+        elif vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+            scans = [re.match(r'SCAN (\w+)', line) for line in plan]
+            full_scan = any(m and m.group(1) in names and 'INDEX' not in line for m, line in zip(scans, plan))
+            # 含 "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY"（索引只满足排序的前缀）
+            sort = any('TEMP B-TREE' in line and 'ORDER BY' in line for line in plan)
+        elif vendor == 'postgresql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = [row[0] for row in cursor.fetchall()]
+            full_scan = any(re.search(rf'Seq Scan on {TABLE}\b', line) for line in plan)
+            sort = any(re.search(r'->\s+Sort\b|^Sort\b', line.strip()) for line in plan)
+        else:
+            raise ValueError(f'不支持的数据库：{vendor}')
+    return {'plan': plan, 'full_scan': full_scan, 'sort': sort}
+
+
+def endpoint_url(lesson, scope: str, week: bool = False) -> str:
+    """scope 课表接口的请求地址，学期与范围ID取自给定课次；week=True 时带周次过滤。"""
+    ids = {'term': lesson.term, 'class_id': lesson.class_ref_id, 'teacher_id': lesson.teacher_id, 'room_id': lesson.room_id}
+    return ENDPOINTS[scope].format(**ids) + (WEEK_SUFFIX if week else '')
+
+
+def endpoint_urls(lesson) -> list:
+    """[(标签, URL)]：每个课表接口各一条不带周次、一条带周次的请求。"""
+    return [
+        (f'{scope}{" (week)" if week else ""}', endpoint_url(lesson, scope, week))
+        for scope in ENDPOINTS
+        for week in (False, True)
+    ]
+
+
+def lesson_queries(client, url: str) -> list:
+    """请求 url，返回其中读取课次表的 [(sql, params)]。接口出错或未查询课次时抛出 ValueError。"""
+    captured = []
+
+    def capture(execute, sql, params, many, context):
+        captured.append((sql, params))
+        return execute(sql, params, many, context)
+
+    # 关闭快照缓存，确保每次都执行课次查询
+    with override_settings(TIMETABLE_SNAPSHOT_ENABLED=False), connection.execute_wrapper(capture):
+        response = client.get(url)
+    if response.status_code != 200:
+        raise ValueError(f'{url} 返回 {response.status_code}')
+    queries = [(sql, params) for sql, params in captured if sql.lstrip().upper().startswith('SELECT') and TABLE in sql]
+    if not queries:
+        raise ValueError(f'{url} 未执行课次查询')
+    return queries
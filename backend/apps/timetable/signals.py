@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.courses.models import Course
+from apps.schools.models import Class
+from apps.students.models import Student
+from apps.teachers.models import Teacher
+from apps.users.models import UserProfile
+from .conflicts import sync_lesson, sync_lessons
+from .identity import PROFILE_FIELDS, invalidate_identities, profile_users
+from .models import Lesson, Room
+from .snapshots import ALL_TERMS, schedule_bump
+
+
+# 课表身份引用的档案类型
+IDENTITY_PROFILES = {Teacher: 'teacher', Student: 'student'}
+
+
+def _identity_row(kind: str, instance) -> dict:
+    return {'id': instance.pk, **{field: getattr(instance, field) for field in PROFILE_FIELDS[kind]}}
+
+
+@receiver(pre_save, sender=Teacher)
+@receiver(pre_save, sender=Student)
+def remember_identity_fields(sender, instance, **kwargs):
+    # 改名、换手机号后，按旧值匹配到该档案的用户同样需要作废，先记下保存前的值
+    kind = IDENTITY_PROFILES[sender]
+    instance._identity_before = None if instance._state.adding else (
+        sender._base_manager.filter(pk=instance.pk).values('id', *PROFILE_FIELDS[kind]).first()
+    )
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Student)
+def invalidate_profile_identities(sender, instance, created, **kwargs):
+    kind = IDENTITY_PROFILES[sender]
+    row = _identity_row(kind, instance)
+    before = getattr(instance, '_identity_before', None)
+    if not created and before == row:
+        # 姓名、联系方式、班级均未变化（如只改职称/地址），身份不受影响
+        return
+    invalidate_identities(profile_users(kind, [row, before] if before else [row]))
+
+
+@receiver(pre_delete, sender=Teacher)
+@receiver(pre_delete, sender=Student)
+def collect_profile_identities(sender, instance, **kwargs):
+    # 删除后档案绑定被置空，需在删除前按绑定找出用户
+    kind = IDENTITY_PROFILES[sender]
+    instance._identity_users = profile_users(kind, [_identity_row(kind, instance)])
+
+
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Student)
+def invalidate_deleted_profile_identities(sender, instance, **kwargs):
+    invalidate_identities(getattr(instance, '_identity_users', ()))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_linked_identity(sender, instance: UserProfile, **kwargs):
+    invalidate_identities([instance.user_id])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_identity(sender, instance, **kwargs):
+    # 姓名、用户名、邮箱变化只影响该用户自己的身份
+    invalidate_identities([instance.pk])
+
+
+@receiver(post_save, sender=Lesson)
+def sync_lesson_occupancy(sender, instance: Lesson, **kwargs):
+    # 单条课次保存后同步占用索引；删除由外键级联清理
+    sync_lesson(instance)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_snapshots(sender, instance: Lesson, **kwargs):
+    schedule_bump(instance.term, getattr(instance, '_loaded_term', None))
+
+
+# 删除后课次外键被置空的资源 → 课次上的外键字段
+OCCUPANCY_FKS = {Teacher: 'teacher', Room: 'room', Class: 'class_ref'}
+
+
+@receiver(pre_delete, sender=Teacher)
+@receiver(pre_delete, sender=Room)
+@receiver(pre_delete, sender=Class)
+def collect_occupied_lessons(sender, instance, **kwargs):
+    # 外键置空发生在 pre_delete 与 post_delete 之间且不触发 Lesson 信号，先记下受影响的课次
+    field = OCCUPANCY_FKS[sender]
+    instance._occupied_lesson_ids = list(Lesson.objects.filter(**{field: instance}).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Class)
+def resync_occupied_lessons(sender, instance, **kwargs):
+    # 占用行仍以已删除对象的ID为资源键：按置空后的课次重写，改为按名称占用，冲突检测继续生效
+    lesson_ids = getattr(instance, '_occupied_lesson_ids', None)
+    if lesson_ids:
+        sync_lessons(lesson_ids)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Class)
+@receiver(post_delete, sender=Room)
+def invalidate_all_snapshots(sender, **kwargs):
+    # 删除后课次的外键被置空（不触发 Lesson 信号），所有学期的课表快照作废
+    schedule_bump(ALL_TERMS)
@@ -0,0 +1,134 @@
+"""课表接口（学校/班级/教师/教室/我的课表）的按学期版本快照与 ETag。
+
+快照键与 ETag 由 (学期, 范围, 范围ID, 周次, 查看者, 学期版本号, 全局版本号) 的摘要组成：
+- 学期版本号：该学期课次增删改时递增（Lesson 信号、批量编辑、课表导入，事务提交后统一递增）
+- 全局版本号：课程/教师/班级/教室删除时递增（外键置空不触发 Lesson 信号，所有学期一并作废）
+- 查看者：课表按当前用户的课表身份收敛范围（见 identity），同一范围的用户共用快照
+
+请求携带的 If-None-Match 与当前 ETag 相同时直接返回 304：身份与版本号均从缓存读取，不查询课次。
+TIMETABLE_SNAPSHOT_ENABLED=False 时每次查询，不返回 ETag。
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.common.transactions import merge_on_commit
+
+
+GLOBAL_KEY = 'timetable:snapshot:version'
+
+# schedule_bump 的特殊学期：令所有学期的快照失效
+ALL_TERMS = object()
+
+
+def enabled() -> bool:
+    return getattr(settings, 'TIMETABLE_SNAPSHOT_ENABLED', True)
+
+
+def _timeout() -> int:
+    return getattr(settings, 'TIMETABLE_SNAPSHOT_TIMEOUT', 24 * 3600)
+
+
+def _term_key(term) -> str:
+    digest = hashlib.md5(str(term).encode('utf-8')).hexdigest()
+    return f'timetable:snapshot:term:{digest}:version'
+
+
+def _bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # 键不存在（从未读取或已被淘汰）：任意新值都能让旧快照失效
+        cache.set(key, 2, None)
+
+
+def _versions(term) -> tuple:
+    keys = [_term_key(term), GLOBAL_KEY]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            cache.add(key, 1, None)
+            version = cache.get(key) or 1
+        versions.append(version)
+    return tuple(versions)
+
+
+def schedule_bump(*terms) -> None:
+    """登记需要作废快照的学期，当前事务提交后统一递增版本号（无事务时立即执行）；事务回滚时登记一并丢弃。"""
+    terms = {term for term in terms if term is not None}
+    merge_on_commit('timetable.snapshots', lambda pending: pending.update(terms), flush_pending, factory=set)
+
+
+def flush_pending(pending: set) -> None:
+    if ALL_TERMS in pending:
+        _bump(GLOBAL_KEY)
+        return
+    for term in pending:
+        _bump(_term_key(term))
+
+
+def viewer_key(identity: dict | None, scope: str) -> str:
+    """决定课表可见范围的身份字段；同一范围的不同用户得到相同的键。"""
+    if scope == 'me':
+        return json.dumps(identity, sort_keys=True, ensure_ascii=False)
+    if not identity or not identity['display_name'] or identity.get('linked') == 'student':
+        return 'none'
+    if identity.get('linked') == 'teacher':
+        return f"teacher:{identity['name_teacher_id']}"
+    return f"name:{identity['display_name']}:{identity['name_teacher_id'] or ''}"
+
+
+def snapshot_digest(request, scope: str, scope_id, identity: dict | None, *extra) -> str:
+    """快照键与 ETag 的摘要；extra 为影响输出的其他参数（如导出格式）。"""
+    term = request.query_params.get('term')
+    week = request.query_params.get('week') or ''
+    term_version, global_version = _versions(term)
+    return hashlib.md5(json.dumps(
+        [term, scope, str(scope_id or ''), week, viewer_key(identity, scope), term_version, global_version, *extra],
+        ensure_ascii=False,
+    ).encode('utf-8')).hexdigest()
+
+
+def not_modified(request, etag: str) -> bool:
+    return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+
+def cache_headers(response, etag: str):
+    response['ETag'] = etag
+    # 内容随登录用户变化：只允许浏览器缓存，且每次使用前向服务端校验
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def cached_body(digest: str):
+    return cache.get(f'timetable:snapshot:{digest}')
+
+
+def store_body(digest: str, body) -> None:
+    cache.set(f'timetable:snapshot:{digest}', body, _timeout())
+
+
+def timetable_response(request, scope: str, scope_id, identity: dict | None, compute) -> Response:
+    """返回 {'lessons': compute()}；命中快照时不查询课次，If-None-Match 命中时返回 304。"""
+    if not enabled():
+        return Response({'success': True, 'data': {'lessons': compute()}})
+
+    digest = snapshot_digest(request, scope, scope_id, identity)
+    etag = f'"{digest}"'
+    if not_modified(request, etag):
+        return cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+    lessons = cached_body(digest)
+    if lessons is None:
+        lessons = compute()
+        store_body(digest, lessons)
+    return cache_headers(Response({'success': True, 'data': {'lessons': lessons}}), etag)
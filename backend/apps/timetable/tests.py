@@ -0,0 +1,131 @@
+import pytest
+
+from apps.timetable.conflicts import UNCHECKED_WARNING
+from apps.timetable.importers import run_import
+from apps.timetable.models import Lesson, LessonOccupancy, Room
+from apps.timetable.plans import ENDPOINTS, endpoint_url, explain, lesson_queries
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def plan_lesson(school, school_teacher) -> Lesson:
+    """school_teacher 的一条课次（班级、教室均已关联），各范围接口的ID取自它。"""
+    return Lesson.objects.filter(
+        term=school.term, teacher=school_teacher, class_ref__isnull=False, room__isnull=False
+    ).first()
+
+
+@pytest.mark.parametrize('week', [False, True], ids=['all-weeks', 'week'])
+@pytest.mark.parametrize('scope', list(ENDPOINTS))
+def test_timetable_queries_use_indexes(scope, week, plan_lesson, teacher_client):
+    # 每条课次查询都应走范围对应的复合索引：无全表扫描，索引顺序即结果顺序（无额外排序）
+    for sql, params in lesson_queries(teacher_client, endpoint_url(plan_lesson, scope, week)):
+        result = explain(sql, params)
+        plan = '\n'.join(result['plan'])
+        assert not result['full_scan'], f'{scope} 全表扫描：\n{plan}'
+        assert not result['sort'], f'{scope} 需要额外排序：\n{plan}'
+
+
+def _create(client, **data):
+    payload = {'term': 'T', 'dayOfWeek': 1, 'courseName': '数学', 'teacherName': '张三', **data}
+    return client.post('/api/v1/timetable/lessons/', payload, format='json')
+
+
+def test_lesson_without_period_is_reported_unchecked(admin_api_client):
+    checked = _create(admin_api_client, startPeriod=1, endPeriod=1)
+    assert checked.status_code == 201
+    assert 'warnings' not in checked.json()
+
+    response = _create(admin_api_client, startTime='08:00', endTime='08:45')
+    assert response.status_code == 201
+    assert response.json()['warnings'] == [UNCHECKED_WARNING]
+    # 同一教师同一时间的课次也不会 409
+    assert _create(admin_api_client, startTime='08:00', endTime='08:45').status_code == 201
+
+    data = admin_api_client.get('/api/v1/timetable/conflicts/?term=T').json()['data']
+    assert data['total'] == 0
+    assert data['unchecked'] == 2
+
+
+def test_import_reports_unchecked_lessons():
+    csv = '星期,开始时间,结束时间,开始节次,课程,老师\n1,08:00,08:45,,数学,张三\n1,,,1,语文,李四\n'.encode('utf-8')
+    data = run_import(csv, 'lessons.csv', {'term': 'T'})['data']
+    assert data['created'] == 2
+    assert data['unchecked'] == 1
+    assert data['warnings'] == [f'1 条{UNCHECKED_WARNING}']
+
+
+BATCH_URL = '/api/v1/timetable/lessons/batch/'
+
+
+@pytest.fixture
+def pair():
+    """同一教师周一第 1、2 节的两节课。"""
+    return [
+        Lesson.objects.create(
+            term='B', day_of_week=1, start_period=period, end_period=period, course_name=name, teacher_name='张三'
+        )
+        for period, name in ((1, '数学'), (2, '语文'))
+    ]
+
+
+def _batch(client, operations, **extra):
+    return client.post(BATCH_URL, {'operations': operations, **extra}, format='json')
+
+
+def test_batch_invalid_op_writes_nothing(admin_api_client, pair):
+    response = _batch(admin_api_client, [
+        {'op': 'create', 'data': {'term': 'B', 'dayOfWeek': 3, 'courseName': '英语', 'roomName': '新教室'}},
+        {'op': 'update', 'id': str(pair[0].pk), 'data': {'startPeriod': 5, 'endPeriod': 5}},
+        {'op': 'delete', 'id': '00000000-0000-0000-0000-000000000000'},
+    ])
+    assert response.status_code == 400
+    details = response.json()['error']['details']
+    assert [r['success'] for r in details] == [True, True, False]
+    assert Lesson.objects.filter(term='B').count() == 2
+    assert Lesson.objects.get(pk=pair[0].pk).start_period == 1
+    assert not Room.objects.filter(name='新教室').exists()
+
+
+def _conflicting_create():
+    # 与第 1 节同一教师同一时段，并引用一个尚不存在的教室
+    return [{'op': 'create', 'data': {
+        'term': 'B', 'dayOfWeek': 1, 'startPeriod': 1, 'endPeriod': 1,
+        'courseName': '英语', 'teacherName': '张三', 'roomName': '新教室',
+    }}]
+
+
+def test_batch_conflict_rolls_back(admin_api_client, pair):
+    response = _batch(admin_api_client, _conflicting_create())
+    assert response.status_code == 409
+    assert response.json()['error']['code'] == 'LESSON_CONFLICT'
+    assert Lesson.objects.filter(term='B').count() == 2
+    assert not Room.objects.filter(name='新教室').exists()
+    assert LessonOccupancy.objects.filter(term='B').count() == 2
+
+
+def test_batch_force_commits_conflicts(admin_api_client, pair):
+    response = _batch(admin_api_client, _conflicting_create(), force=True)
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert data['conflicts']
+    assert Lesson.objects.filter(term='B').count() == 3
+    room = Room.objects.get(name='新教室')
+    assert Lesson.objects.get(pk=data['results'][0]['id']).room_id == room.pk
+
+
+def test_batch_swap_is_not_a_conflict(admin_api_client, pair):
+    first, second = pair
+    response = _batch(admin_api_client, [
+        {'op': 'update', 'id': str(first.pk), 'data': {'startPeriod': 2, 'endPeriod': 2}},
+        {'op': 'update', 'id': str(second.pk), 'data': {'startPeriod': 1, 'endPeriod': 1}},
+    ])
+    assert response.status_code == 200
+    assert response.json()['data']['conflicts'] == []
+    assert Lesson.objects.get(pk=first.pk).start_period == 2
+    assert Lesson.objects.get(pk=second.pk).start_period == 1
+    assert set(LessonOccupancy.objects.filter(term='B').values_list('lesson_id', 'period')) == {
+        (first.pk, 2), (second.pk, 1),
+    }
@@ -1,11 +1,19 @@
 from django.urls import path
 from .views import (
+    TimetableImportView,
     school_timetable,
     class_timetable,
     teacher_timetable,
     room_timetable,
     me_timetable,
+    class_timetable_ics,
+    teacher_timetable_ics,
+    room_timetable_ics,
+    me_timetable_ics,
+    timetable_ics_subscribe,
+    timetable_conflicts,
     create_lesson,
+    batch_lessons,
     get_lesson,
     update_lesson,
     delete_lesson,
@@ -13,11 +21,19 @@ from .views import (
 
 urlpatterns = [
     path('timetable/me/', me_timetable),
+    path('timetable/me/ics/', me_timetable_ics),  # GET 我的课表 .ics（可带 token 订阅）
+    path('timetable/ics/subscribe/', timetable_ics_subscribe),  # GET 日历订阅地址
+    path('timetable/import/', TimetableImportView.as_view()),  # POST 导入课表（默认返回任务ID，async=false 时同步导入）
     path('timetable/school/', school_timetable),
+    path('timetable/conflicts/', timetable_conflicts),  # GET 学期内冲突列表
     path('timetable/classes/<uuid:pk>/', class_timetable),
     path('timetable/teachers/<uuid:pk>/', teacher_timetable),
     path('timetable/rooms/<uuid:pk>/', room_timetable),
+    path('timetable/classes/<uuid:pk>/ics/', class_timetable_ics),
+    path('timetable/teachers/<uuid:pk>/ics/', teacher_timetable_ics),
+    path('timetable/rooms/<uuid:pk>/ics/', room_timetable_ics),
     path('timetable/lessons/', create_lesson),  # POST 创建课次
+    path('timetable/lessons/batch/', batch_lessons),  # POST 批量创建/修改/删除课次
     path('timetable/lessons/<uuid:pk>/', get_lesson),     # GET 单条课次
     path('timetable/lessons/<uuid:pk>/update/', update_lesson),  # PATCH 更新课次
     path('timetable/lessons/<uuid:pk>/delete/', delete_lesson),  # DELETE 删除课次
@@ -1,33 +1,33 @@
-import csv
 import io
-from typing import List, Optional
+from typing import Optional
+from urllib.parse import urlencode
 
-from django.db import transaction
 from django.http import HttpResponse
-from django.db.models import Q
+from django.db.models import Exists, Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 
+from .importers import TimetableImportEngine
 from .models import Lesson, Room
+from apps.common.imports import ImportFailed, dry_run_params, request_flag
+from apps.imports.jobs import job_accepted_response, submit_import_job, wants_async
+from apps.imports.models import ImportJob
 from apps.courses.models import Course
 from apps.teachers.models import Teacher
 from apps.schools.models import Class as SchoolClass
+from .batch import LessonBatch, LessonBatchError
+from .conflicts import UNCHECKED_WARNING, is_unchecked, lesson_conflicts, term_conflicts, unchecked_count
+from .identity import fallback_scope, linked_scope, name_scope, resolve_identity
 from .serializers import LessonSerializer
-
-
-def try_decode(data: bytes) -> str:
-    for enc in ['utf-8-sig','utf-8','gbk','gb18030','cp936']:
-        try:
-            return data.decode(enc)
-        except Exception:
-            continue
-    raise UnicodeDecodeError('unknown','',0,1,'无法解码文件，请使用 UTF-8 或 GBK')
+from .ics import CalendarRenderer, calendar_params, feed_token, feed_user, ics_response
+from .snapshots import timetable_response
+from .weeks import filter_by_week
 
 
 class TimetableImportView(APIView):
-    @transaction.atomic
     def post(self, request):
         file = request.FILES.get('file')
         term = request.POST.get('term')
@@ -38,206 +38,24 @@ class TimetableImportView(APIView):
                 'error': {'code':'VALIDATION_ERROR','message':'文件与学期必填','details':{'file':['必填'],'term':['必填']}},
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        if mode == 'overwrite':
-            Lesson.objects.filter(term=term).delete()
-
-        # 若为 Excel，优先按 Excel 表格课表样式解析；否则回退 CSV
-        name = getattr(file, 'name', '').lower()
-        rows = []
-        if name.endswith('.xlsx') or name.endswith('.xls'):
-            try:
-                import openpyxl  # type: ignore
-                wb = openpyxl.load_workbook(file, data_only=True)
-                ws = wb.active
-                # 支持两种 Excel 样式：
-                # A) 第一列是“班级”，第一行是“星期*”合并，第二行“上午/下午”，第三行 1..9 节；第4行开始为各班级
-                # B) 第一列是“节次/时间”，第一行是“星期*”，第二行可选“上午/下午”，后续为时间行
-
-                A1 = str(ws.cell(row=1, column=1).value or '').strip()
-                # 通用：解析第一行的星期列映射
-                headers = []
-                for col in ws.iter_cols(min_row=1, max_row=1):
-                    headers.append(str(col[0].value or '').strip())
-                day_alias = {'周一':1,'星期一':1,'一':1,'周二':2,'星期二':2,'二':2,'周三':3,'星期三':3,'三':3,'周四':4,'星期四':4,'四':4,'周五':5,'星期五':5,'五':5,'周六':6,'星期六':6,'六':6,'周日':7,'星期日':7,'日':7}
-                # 处理合并单元格：向右填充最后出现的星期
-                day_cols = []
-                last_d = None
-                for h in headers:
-                    d = day_alias.get(h, None)
-                    if d:
-                        last_d = d
-                    day_cols.append(d or last_d)
-                # 若整行为空，尝试用工作表标题判断
-                day_from_ws_title = day_alias.get(ws.title, None)
-
-                if '班级' in A1:
-                    # 样式A：按班级为行
-                    # 第三行应为节次数字；若不是，尝试从第二行读取
-                    period_row = 3
-                    period_values = [str(c.value or '').strip() for c in ws[period_row]] if ws.max_row >= 3 else []
-                    if not any(v == '1' for v in period_values):
-                        period_row = 2
-                        period_values = [str(c.value or '').strip() for c in ws[period_row]]
-                    start_row = 4 if period_row == 3 else 3
-                    max_cols = ws.max_column
-                    # 遍历每个班级行
-                    for r in range(start_row, ws.max_row + 1):
-                        class_name = str(ws.cell(row=r, column=1).value or '').strip()
-                        if not class_name:
-                            continue
-                        for c_idx in range(2, max_cols + 1):
-                            day = day_cols[c_idx - 1] if c_idx - 1 < len(day_cols) else None
-                            if not day:
-                                day = day_from_ws_title
-                            if not day:
-                                continue
-                            p_val = str(ws.cell(row=period_row, column=c_idx).value or '').strip()
-                            if not p_val.isdigit():
-                                continue
-                            start_period = int(p_val)
-                            cell_val = ws.cell(row=r, column=c_idx).value
-                            if not cell_val:
-                                continue
-                            text = str(cell_val).strip()
-                            if not text:
-                                continue
-                            course_name = text.split('\n')[0].strip()
-                            rest = text.split('\n')[1].strip() if '\n' in text else ''
-                            teacher_name = ''
-                            room_name = ''
-                            if rest:
-                                parts = [p.strip() for p in rest.replace('＠','@').split('@')]
-                                teacher_name = parts[0] if parts else ''
-                                room_name = parts[1] if len(parts) > 1 else ''
-                            rows.append({
-                                'day': day,
-                                'course_name': course_name,
-                                'teacher_name': teacher_name,
-                                'room': room_name,
-                                'class_name': class_name,
-                                'start_period': start_period,
-                                'end_period': start_period,
-                            })
-                else:
-                    # 样式B：按时间为行（旧方案）
-                    second_row_values = [str(c.value or '').strip() for c in ws[2]] if ws.max_row >= 2 else []
-                    has_ampm = any(v in ['上午','下午'] for v in second_row_values)
-                    start_row = 3 if has_ampm else 2
-                    for r in ws.iter_rows(min_row=start_row):
-                        time_label = str(r[0].value or '').strip()
-                        for c_idx in range(1, len(r)):
-                            day = day_cols[c_idx] if c_idx < len(day_cols) else None
-                            if not day:
-                                day = day_from_ws_title
-                            if not day:
-                                continue
-                            cell = r[c_idx].value
-                            if not cell:
-                                continue
-                            text = str(cell).strip()
-                            if not text:
-                                continue
-                            course_name = text.split('\n')[0].strip()
-                            rest = text.split('\n')[1].strip() if '\n' in text else ''
-                            teacher_name = ''
-                            room_name = ''
-                            if rest:
-                                parts = [p.strip() for p in rest.replace('＠','@').split('@')]
-                                teacher_name = parts[0] if parts else ''
-                                room_name = parts[1] if len(parts) > 1 else ''
-                            rows.append({
-                                'day': day,
-                                'course_name': course_name,
-                                'teacher_name': teacher_name,
-                                'room': room_name,
-                                'time_label': time_label,
-                            })
-            except Exception as e:
-                return Response({'success': False, 'error': {'code':'INVALID_FILE', 'message': f'Excel 解析失败: {e}'}}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            content = file.read()
-            text = try_decode(content)
-            f = io.StringIO(text)
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        normalized_rows: List[dict] = []
-
-        # 表头同义映射
-        alias = {
-            'term':['term','学期'],
-            'weeks':['weeks','周次'],
-            'day':['day','星期','星期几'],
-            'start_time':['start_time','开始时间'],
-            'end_time':['end_time','结束时间'],
-            'start_period':['start_period','开始节次'],
-            'end_period':['end_period','结束节次'],
-            'course_name':['course_name','课程名称','课程'],
-            'teacher_name':['teacher_name','教师名称','老师','授课老师'],
-            'class_name':['class_name','班级名称','班级'],
-            'room':['room','教室','教室名称'],
-            'week_type':['week_type','单双周'],
-            'remark':['remark','备注'],
-        }
-
-        def get_val(row, key):
-            for k in alias.get(key, [key]):
-                if k in row and row[k] is not None:
-                    return str(row[k]).strip()
-            return ''
-
-        day_map = {'一':1,'二':2,'三':3,'四':4,'五':5,'六':6,'日':7,'天':7,'周一':1,'周二':2,'周三':3,'周四':4,'周五':5,'周六':6,'周日':7,'Mon':1,'Tue':2,'Wed':3,'Thu':4,'Fri':5,'Sat':6,'Sun':7}
-
-        created = 0
-        for row in rows:
-            course_name = get_val(row,'course_name')
-            if not course_name:
-                continue
-            d = str(get_val(row,'day'))
-            if d.isdigit():
-                day_of_week = int(d)
-            else:
-                day_of_week = day_map.get(d, 1)
-            # Excel 课表样式下可用 time_label 推断时间/节次；这里先直接落时间为空，由前端按节次渲染
-            start_time = get_val(row,'start_time')
-            end_time = get_val(row,'end_time')
-            start_period = get_val(row,'start_period')
-            end_period = get_val(row,'end_period')
-            teacher_name = get_val(row,'teacher_name')
-            class_name = get_val(row,'class_name')
-            room_name = get_val(row,'room')
-            week_type = get_val(row,'week_type')
-            weeks = get_val(row,'weeks')
-            remark = get_val(row,'remark')
-
-            course = Course.objects.filter(name=course_name).first()
-            teacher = Teacher.objects.filter(name=teacher_name).first() if teacher_name else None
-            class_obj = SchoolClass.objects.filter(name=class_name).first() if class_name else None
-            room = Room.objects.filter(name=room_name).first() if room_name else None
-            if room_name and not room:
-                room = Room.objects.create(name=room_name)
-
-            Lesson.objects.create(
-                term=term,
-                day_of_week=day_of_week,
-                start_time=start_time or None,
-                end_time=end_time or None,
-                start_period=int(start_period) if str(start_period).isdigit() else None,
-                end_period=int(end_period) if str(end_period).isdigit() else None,
-                week_type='odd' if week_type == '单' else ('even' if week_type == '双' else 'all'),
-                weeks=weeks,
-                course=course,
-                teacher=teacher,
-                class_ref=class_obj,
-                room=room,
-                course_name=course_name,
-                teacher_name=teacher_name,
-                class_name=class_name,
-                room_name=room_name,
-                remark=remark,
+        # all_sheets=true：解析 Excel 的所有工作表（默认只解析活动工作表）
+        all_sheets = request_flag(request, 'all_sheets')
+        params = dry_run_params(request)
+        if wants_async(request) and not params:
+            job = submit_import_job(
+                request, ImportJob.Kind.TIMETABLE, file, {'term': term, 'mode': mode, 'all_sheets': all_sheets},
             )
-            created += 1
+            return job_accepted_response(job)
 
-        return Response({'success': True, 'data': {'created': created}})
+        try:
+            engine = TimetableImportEngine(term, mode, all_sheets=all_sheets)
+            if params:
+                result = engine.preview(file, getattr(file, 'name', ''), max_errors=params['max_errors'])['data']
+            else:
+                result = engine.run(file, getattr(file, 'name', ''))
+        except ImportFailed as exc:
+            return Response({'success': False, 'error': {'code': exc.code, 'message': exc.message}}, status=exc.status)
+        return Response({'success': True, 'data': result})
 
 
 @api_view(['POST'])
@@ -246,6 +64,7 @@ def create_lesson(request):
     支持两种外键入参：优先使用 *_id；若无则按 *_name 匹配（room 不存在则自动创建）。
     weeks 可为字符串（如 "1-16" 或 "1,3,5"）或 number[]（将拼接为逗号分隔）。
     weekType 支持 'odd'|'even'|'all' 或 中文 '单'|'双'。
+    与同学期其他课次存在教师/教室/班级冲突时返回 409，传 force=true 可强制保存。
     """
     data = request.data
 
@@ -372,8 +191,68 @@ def create_lesson(request):
     ser = LessonSerializer(data=payload)
     if not ser.is_valid():
         return Response({'success': False, 'error': {'code': 'VALIDATION_ERROR', 'message': '数据验证失败', 'details': ser.errors}}, status=status.HTTP_400_BAD_REQUEST)
+    conflict = _conflict_response(request, Lesson(**ser.validated_data))
+    if conflict:
+        return conflict
     instance = ser.save()
-    return Response({'success': True, 'data': LessonSerializer(instance).data}, status=status.HTTP_201_CREATED)
+    return _lesson_response(instance, status.HTTP_201_CREATED)
+
+
+def _lesson_response(lesson, status_code=status.HTTP_200_OK):
+    body = {'success': True, 'data': LessonSerializer(lesson).data}
+    if is_unchecked(lesson):
+        body['warnings'] = [UNCHECKED_WARNING]
+    return Response(body, status=status_code)
+
+
+def _conflict_response(request, lesson):
+    """课次与已有课次冲突时返回 409 响应；force=true 时跳过检查。"""
+    force = request.data.get('force') or request.query_params.get('force')
+    if str(force).lower() in {'1', 'true', 'yes'}:
+        return None
+    conflicts = lesson_conflicts(lesson)
+    if not conflicts:
+        return None
+    return Response({
+        'success': False,
+        'error': {'code': 'LESSON_CONFLICT', 'message': '与已有课次冲突（教师/教室/班级同一时段重复安排）', 'details': conflicts},
+    }, status=status.HTTP_409_CONFLICT)
+
+
+@api_view(['GET'])
+def timetable_conflicts(request):
+    """列出学期内教师/教室/班级的重复安排。
+
+    查询参数：term（必填）、kind（可选，teacher|room|class）
+    """
+    term = request.query_params.get('term')
+    if not term:
+        return Response({'success': False, 'error': {'code': 'VALIDATION_ERROR', 'message': 'term 必填'}}, status=status.HTTP_400_BAD_REQUEST)
+    conflicts = term_conflicts(term, request.query_params.get('kind'))
+    # unchecked：未填写节次、不在检测范围内的课次数
+    data = {'term': term, 'total': len(conflicts), 'conflicts': conflicts, 'unchecked': unchecked_count(term)}
+    return Response({'success': True, 'data': data})
+
+
+@api_view(['POST'])
+def batch_lessons(request):
+    """批量创建/修改/删除课次（课表拖拽调整），整批在一个事务内生效。
+
+    请求体：{"operations": [{"op": "create"|"update"|"delete", "id": 课次ID（update/delete）, "data": {...}}], "force": false}
+    data 字段同单条创建/更新接口；所有操作引用的课程/教师/班级/教室一次性解析。
+    任一操作校验失败返回 400、写入后存在冲突返回 409，均不做任何修改，details 为逐条结果或冲突列表；
+    force=true 时冲突随结果返回但不阻止保存。
+    """
+    force = request.data.get('force') or request.query_params.get('force')
+    batch = LessonBatch(request.data.get('operations'), force=str(force).lower() in {'1', 'true', 'yes'})
+    try:
+        result = batch.run()
+    except LessonBatchError as exc:
+        return Response({
+            'success': False,
+            'error': {'code': exc.code, 'message': exc.message, 'details': exc.details},
+        }, status=exc.status)
+    return Response({'success': True, 'data': result})
 
 
 @api_view(['GET'])
@@ -425,8 +304,13 @@ def update_lesson(request, pk):
     ser = LessonSerializer(obj, data=data, partial=True)
     if not ser.is_valid():
         return Response({'success': False, 'error': {'code': 'VALIDATION_ERROR', 'message': '数据验证失败', 'details': ser.errors}}, status=status.HTTP_400_BAD_REQUEST)
-    instance = ser.save()
-    return Response({'success': True, 'data': LessonSerializer(instance).data})
+    # 按修改后的值检查冲突（obj 尚未保存，save() 时会再次赋值）
+    for attr, value in ser.validated_data.items():
+        setattr(obj, attr, value)
+    conflict = _conflict_response(request, obj)
+    if conflict:
+        return conflict
+    return _lesson_response(ser.save())
 
 
 @api_view(['DELETE'])
@@ -439,68 +323,14 @@ def delete_lesson(request, pk):
 
 
 def _filter_by_week(qs, week: Optional[str]):
-    if not week:
-        return qs
-    # 支持以下几种 weeks 格式：
-    # - ""（空）：视为全周适用
-    # - "1,3,5"（逗号分隔）
-    # - "1-16"（范围，含端点）
-    # 为保证兼容性与正确性，这里在 Python 层做一次过滤。
-    try:
-        week_int = int(str(week).strip())
-    except Exception:
-        week_int = None
-
-    matched_ids: list = []
-    for _id, w in qs.values_list('id', 'weeks'):
-        s = (w or '').strip()
-        if s == '':
-            # 空 weeks 视为所有周次
-            matched_ids.append(_id)
-            continue
-        # 逗号列表
-        if ',' in s and '-' not in s:
-            try:
-                parts = [p.strip() for p in s.split(',') if p.strip()]
-                if str(week) in parts:
-                    matched_ids.append(_id)
-                    continue
-            except Exception:
-                pass
-        # 范围 a-b
-        if '-' in s and week_int is not None:
-            try:
-                a_str, b_str = s.split('-', 1)
-                a = int(a_str.strip())
-                b = int(b_str.strip())
-                if a <= week_int <= b:
-                    matched_ids.append(_id)
-                    continue
-            except Exception:
-                pass
-        # 兜底：完全相等
-        if s == str(week):
-            matched_ids.append(_id)
-
-    if not matched_ids:
-        return qs.none()
-    return qs.filter(id__in=matched_ids)
+    # weeks/week_type 已预先合并为 week_mask 位图，按周过滤为一条 SQL 位运算谓词
+    return filter_by_week(qs, week)
 
 
-def _get_user_display_name(user) -> str:
-    try:
-        name = (getattr(user, 'get_full_name', lambda: '')() or '').strip()
-    except Exception:
-        name = ''
-    if not name:
-        # 退化为 first_name + last_name 或 username
-        first = (getattr(user, 'first_name', '') or '').strip()
-        last = (getattr(user, 'last_name', '') or '').strip()
-        if first or last:
-            name = f"{first}{last}".strip()
-    if not name:
-        name = (getattr(user, 'username', '') or '').strip()
-    return name
+def _identity(request):
+    if not hasattr(request, '_timetable_identity'):
+        request._timetable_identity = resolve_identity(getattr(request, 'user', None))
+    return request._timetable_identity
 
 
 def _apply_user_scope(request, qs):
@@ -508,72 +338,72 @@ def _apply_user_scope(request, qs):
     规则：
     - 用户显示名（全名/first+last/username）与教师表的 name 完全相同 → 可见 teacher_id 或 teacher_name 等于该姓名的课次。
     - 若未匹配到教师档案 → 仍按 teacher_name 与显示名完全相同进行兜底匹配。
+    已绑定教师档案的用户直接按 teacher_id 过滤。身份按用户缓存（见 identity.resolve_identity），范围在请求内缓存。
     """
-    user = getattr(request, 'user', None)
-    if not user or not getattr(user, 'is_authenticated', False):
+    if not hasattr(request, '_timetable_scope'):
+        request._timetable_scope = name_scope(_identity(request))
+    scope = request._timetable_scope
+    if scope is None:
         return qs.none()
+    return qs.filter(scope)
+
+SCOPE_FILTERS = {'class': 'class_ref_id', 'teacher': 'teacher_id', 'room': 'room_id'}
+FEED_SEGMENTS = {'class': 'classes', 'teacher': 'teachers', 'room': 'rooms'}
+
+
+def _timetable_queryset(request, scope: str, pk=None):
+    """各课表接口的课次查询（JSON 与 .ics 共用），按 (星期, 开始时间, 开始节次) 排序。"""
+    term = request.query_params.get('term')
+    qs = _filter_by_week(Lesson.objects.filter(term=term), request.query_params.get('week'))
+    if scope != 'me':
+        if scope in SCOPE_FILTERS:
+            qs = qs.filter(**{SCOPE_FILTERS[scope]: pk})
+        return _apply_user_scope(request, qs).order_by('day_of_week','start_time','start_period')
+
+    # 回退顺序：显示名可见的课次 > 手机号/邮箱匹配的教师课表 > 学号/邮箱/手机号匹配的学生班级课表 > 学校课表。
+    # 身份已解析并缓存；回退条件写成 NOT EXISTS(显示名范围) 与课次查询合为一条 SQL
+    identity = _identity(request)
+    linked = linked_scope(identity)
+    primary = name_scope(identity)
+    fallback = fallback_scope(identity)
+    if linked is not None:
+        # 已绑定教师/学生档案：本人或所在班级的课表（可能为空），不再回退
+        qs = qs.filter(linked)
+    elif primary is not None:
+        rest = ~Exists(qs.filter(primary))
+        if fallback is not None:
+            rest = Q(rest) & fallback
+        qs = qs.filter(primary | Q(rest))
+    elif fallback is not None:
+        qs = qs.filter(fallback)
+    return qs.order_by('day_of_week','start_time','start_period')
+
+
+def _timetable_json(request, scope: str, pk=None):
+    def compute():
+        return list(LessonSerializer(_timetable_queryset(request, scope, pk), many=True).data)
+
+    return timetable_response(request, scope, pk, _identity(request), compute)
 
-    # 仅按姓名匹配教师
-    display_name = _get_user_display_name(user)
-    if not display_name:
-        return qs.none()
-    try:
-        from apps.teachers.models import Teacher as T
-        t = T.objects.filter(name=display_name).first()
-    except Exception:
-        t = None
-    if not t:
-        # 无教师档案时，按 teacher_name 精确匹配兜底，兼容仅存储姓名的课次
-        return qs.filter(teacher_name=display_name)
-    # 同时兼容按 teacher_id 关联与仅存储 teacher_name 的课次
-    return qs.filter(Q(teacher_id=t.id) | Q(teacher_name=display_name))
 
 @api_view(['GET'])
 def school_timetable(request):
-    term = request.query_params.get('term')
-    week = request.query_params.get('week')
-    qs = Lesson.objects.filter(term=term)
-    qs = _apply_user_scope(request, qs)
-    qs = _filter_by_week(qs, week)
-    qs = qs.order_by('day_of_week','start_time','start_period')
-    data = LessonSerializer(qs, many=True).data
-    return Response({'success': True, 'data': {'lessons': data}})
+    return _timetable_json(request, 'school')
 
 
 @api_view(['GET'])
 def class_timetable(request, pk):
-    term = request.query_params.get('term')
-    week = request.query_params.get('week')
-    qs = Lesson.objects.filter(term=term, class_ref_id=pk)
-    qs = _apply_user_scope(request, qs)
-    qs = _filter_by_week(qs, week)
-    qs = qs.order_by('day_of_week','start_time','start_period')
-    data = LessonSerializer(qs, many=True).data
-    return Response({'success': True, 'data': {'lessons': data}})
+    return _timetable_json(request, 'class', pk)
 
 
 @api_view(['GET'])
 def teacher_timetable(request, pk):
-    term = request.query_params.get('term')
-    week = request.query_params.get('week')
-    qs = Lesson.objects.filter(term=term, teacher_id=pk)
-    qs = _apply_user_scope(request, qs)
-    qs = _filter_by_week(qs, week)
-    qs = qs.order_by('day_of_week','start_time','start_period')
-    data = LessonSerializer(qs, many=True).data
-    return Response({'success': True, 'data': {'lessons': data}})
+    return _timetable_json(request, 'teacher', pk)
 
 
 @api_view(['GET'])
 def room_timetable(request, pk):
-    term = request.query_params.get('term')
-    week = request.query_params.get('week')
-    qs = Lesson.objects.filter(term=term, room_id=pk)
-    qs = _apply_user_scope(request, qs)
-    qs = _filter_by_week(qs, week)
-    qs = qs.order_by('day_of_week','start_time','start_period')
-    data = LessonSerializer(qs, many=True).data
-    return Response({'success': True, 'data': {'lessons': data}})
+    return _timetable_json(request, 'room', pk)
 
 
 @api_view(['GET'])
@@ -585,65 +415,74 @@ def me_timetable(request):
     需要前端携带 JWT，后端通过 request.user 判定。
     支持查询参数：term, week
     """
-    user = getattr(request, 'user', None)
-    term = request.query_params.get('term')
-    week = request.query_params.get('week')
+    return _timetable_json(request, 'me')
 
-    # 优先：按与学校视图一致的用户可见范围（教师姓名）过滤
-    qs0 = Lesson.objects.filter(term=term)
-    qs0 = _apply_user_scope(request, qs0)
-    qs0 = _filter_by_week(qs0, week)
-    qs0 = qs0.order_by('day_of_week','start_time','start_period')
-    if qs0.exists():
-        return Response({'success': True, 'data': {'lessons': LessonSerializer(qs0, many=True).data}})
 
-    # 其次：尝试定位教师（用户名为手机号或邮箱登录场景）
-    teacher = None
+def _timetable_ics(request, scope: str, pk=None):
+    """课表 .ics 导出 / 日历订阅。
+
+    查询参数：term（必填）、start（第 1 周周一，YYYY-MM-DD；缺省取 TIMETABLE_TERM_STARTS[term]）、
+    weeks（教学周数，缺省 TIMETABLE_TERM_WEEKS）、token（订阅链接中的签名令牌，日历客户端无法携带 JWT）。
+    """
+    if request.query_params.get('token'):
+        user = feed_user(request.query_params['token'])
+        if user is None:
+            return Response({'success': False, 'error': {'code': 'INVALID_TOKEN', 'message': '订阅链接无效或已失效'}}, status=status.HTTP_403_FORBIDDEN)
+        request._timetable_identity = resolve_identity(user)
     try:
-        from apps.teachers.models import Teacher as T
-        teacher = T.objects.filter(phone=getattr(user, 'username', None)).first() or T.objects.filter(email=getattr(user, 'email', None)).first()
-    except Exception:
-        teacher = None
+        params = calendar_params(request.query_params)
+    except ValueError as exc:
+        return Response({'success': False, 'error': {'code': 'VALIDATION_ERROR', 'message': str(exc)}}, status=status.HTTP_400_BAD_REQUEST)
+    return ics_response(request, scope, pk, _identity(request), params, lambda: _timetable_queryset(request, scope, pk))
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, CalendarRenderer])
+def class_timetable_ics(request, pk):
+    return _timetable_ics(request, 'class', pk)
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, CalendarRenderer])
+def teacher_timetable_ics(request, pk):
+    return _timetable_ics(request, 'teacher', pk)
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, CalendarRenderer])
+def room_timetable_ics(request, pk):
+    return _timetable_ics(request, 'room', pk)
 
-    if teacher:
-        # 与 _apply_user_scope 保持一致：兼容仅存储 teacher_name 的课次
-        qs = Lesson.objects.filter(term=term).filter(Q(teacher_id=teacher.id) | Q(teacher_name=teacher.name))
-        qs = _filter_by_week(qs, week)
-        qs = qs.order_by('day_of_week','start_time','start_period')
-        return Response({'success': True, 'data': {'lessons': LessonSerializer(qs, many=True).data}})
 
-    # 尝试定位学生（按用户名=学号 或 email/phone 匹配）
-    student = None
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, CalendarRenderer])
+def me_timetable_ics(request):
+    return _timetable_ics(request, 'me')
+
+
+@api_view(['GET'])
+def timetable_ics_subscribe(request):
+    """返回当前用户的日历订阅地址（带签名令牌，修改密码后失效）。
+
+    查询参数：scope（me|class|teacher|room，默认 me）、id（非 me 时必填）、term（必填）、start、weeks
+    """
+    if not request.user or not request.user.is_authenticated:
+        return Response({'success': False, 'error': {'code': 'UNAUTHORIZED', 'message': '请先登录'}}, status=status.HTTP_401_UNAUTHORIZED)
+    scope = request.query_params.get('scope') or 'me'
+    pk = request.query_params.get('id')
+    if scope not in ('me', *SCOPE_FILTERS) or (scope != 'me' and not pk):
+        return Response({'success': False, 'error': {'code': 'VALIDATION_ERROR', 'message': 'scope 须为 me/class/teacher/room，非 me 时 id 必填'}}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        from apps.students.models import Student as S
-        student = (
-            S.objects.filter(student_id=getattr(user, 'username', None)).first()
-            or S.objects.filter(email=getattr(user, 'email', None)).first()
-            or S.objects.filter(phone=getattr(user, 'username', None)).first()
-        )
-    except Exception:
-        student = None
-
-    if student and student.current_class_id:
-        qs = Lesson.objects.filter(term=term, class_ref_id=student.current_class_id)
-        qs = _filter_by_week(qs, week)
-        qs = qs.order_by('day_of_week','start_time','start_period')
-        return Response({'success': True, 'data': {'lessons': LessonSerializer(qs, many=True).data}})
-
-    # 教师/学生均未匹配：按显示名兜底匹配 teacher_name（便于使用姓名登录的教师）
-    display_name = _get_user_display_name(user)
-    if display_name:
-        qs = Lesson.objects.filter(term=term).filter(Q(teacher_name=display_name))
-        qs = _filter_by_week(qs, week)
-        qs = qs.order_by('day_of_week','start_time','start_period')
-        if qs.exists():
-            return Response({'success': True, 'data': {'lessons': LessonSerializer(qs, many=True).data}})
-
-    # 默认：学校课表（作为最后兜底）
-    qs = Lesson.objects.filter(term=term)
-    qs = _filter_by_week(qs, week)
-    qs = qs.order_by('day_of_week','start_time','start_period')
-    return Response({'success': True, 'data': {'lessons': LessonSerializer(qs, many=True).data}})
+        params = calendar_params(request.query_params)
+    except ValueError as exc:
+        return Response({'success': False, 'error': {'code': 'VALIDATION_ERROR', 'message': str(exc)}}, status=status.HTTP_400_BAD_REQUEST)
+    path = '/api/v1/timetable/me/ics/' if scope == 'me' else f'/api/v1/timetable/{FEED_SEGMENTS[scope]}/{pk}/ics/'
+    query = urlencode({
+        'term': params['term'], 'start': params['start'].isoformat(), 'weeks': params['weeks'],
+        'token': feed_token(request.user),
+    })
+    return Response({'success': True, 'data': {'url': request.build_absolute_uri(f'{path}?{query}')}})
+
 
 @api_view(['GET'])
 def timetable_template(request):
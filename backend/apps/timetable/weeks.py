@@ -0,0 +1,74 @@
+"""课次周次位图。
+
+Lesson.weeks 为字符串（"1-16"、"1,3,5"、"1-8,10"，空串表示全学期），
+Lesson.week_type 为 odd/even/all。两者合并为 Lesson.week_mask：第 n 周对应第 n-1 位，
+支持 1~MAX_WEEK 周。按周查询时只需 week_mask & (1 << (n-1)) > 0。
+"""
+
+import re
+
+from django.db.models import F
+
+
+MAX_WEEK = 62  # BigInteger 有符号，保留最高位
+ALL_WEEKS = (1 << MAX_WEEK) - 1
+ODD_WEEKS = sum(1 << (w - 1) for w in range(1, MAX_WEEK + 1, 2))
+EVEN_WEEKS = ALL_WEEKS & ~ODD_WEEKS
+
+_SEPARATORS = re.compile(r"[,，、;；\s]+")
+
+
+def parse_weeks(weeks: str | None) -> set[int] | None:
+    """解析周次字符串；空串返回 None（全学期），无法解析的片段忽略。"""
+    s = (weeks or "").strip().replace("周", "")
+    if not s:
+        return None
+    result: set[int] = set()
+    for part in _SEPARATORS.split(s):
+        if not part:
+            continue
+        a, sep, b = part.partition("-")
+        try:
+            start = int(a)
+            end = int(b) if sep else start
+        except ValueError:
+            continue
+        if start > end:
+            start, end = end, start
+        result.update(w for w in range(max(start, 1), min(end, MAX_WEEK) + 1))
+    return result
+
+
+def weeks_to_mask(weeks: str | None, week_type: str | None = "all") -> int:
+    parsed = parse_weeks(weeks)
+    if parsed is None:
+        mask = ALL_WEEKS
+    else:
+        mask = 0
+        for w in parsed:
+            mask |= 1 << (w - 1)
+    if week_type == "odd":
+        mask &= ODD_WEEKS
+    elif week_type == "even":
+        mask &= EVEN_WEEKS
+    return mask
+
+
+def week_bit(week: int) -> int:
+    if 1 <= week <= MAX_WEEK:
+        return 1 << (week - 1)
+    return 0
+
+
+def filter_by_week(qs, week):
+    """按教学周过滤课次：单条位运算谓词，同时考虑单双周。week 无法解析时不过滤。"""
+    if week in (None, ""):
+        return qs
+    try:
+        week_int = int(str(week).strip())
+    except (TypeError, ValueError):
+        return qs
+    bit = week_bit(week_int)
+    if not bit:
+        return qs.none()
+    return qs.alias(week_hit=F("week_mask").bitand(bit)).filter(week_hit__gt=0)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from apps.users.models import UserProfile
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ("user", "teacher", "student", "updated_at")
+    search_fields = ("user__username", "teacher__name", "student__student_id", "student__name")
+    raw_id_fields = ("user", "teacher", "student")
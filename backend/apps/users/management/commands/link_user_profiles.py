@@ -0,0 +1,114 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.students.models import Student
+from apps.teachers.models import Teacher
+from apps.timetable.conflicts import rebuild_term
+from apps.timetable.identity import bump_identity_version, user_display_name
+from apps.timetable.snapshots import schedule_bump
+from apps.timetable.models import Lesson
+from apps.users.models import UserProfile
+
+
+User = get_user_model()
+
+
+def _unique_index(rows, key_pos: int) -> dict:
+    """按某列建立索引，只保留取值唯一的行（重名/重复手机号等无法确定归属，不自动绑定）。"""
+    counts = Counter(r[key_pos] for r in rows if r[key_pos])
+    return {r[key_pos]: r for r in rows if r[key_pos] and counts[r[key_pos]] == 1}
+
+
+class Command(BaseCommand):
+    help = "回填用户与教师/学生档案的一对一绑定：按 手机号(用户名) > 邮箱 > 姓名 匹配教师，按 学号 > 邮箱 > 手机号 匹配学生"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="只输出匹配结果，不写库")
+        parser.add_argument("--relink", action="store_true", help="已绑定的用户也重新匹配")
+        parser.add_argument(
+            "--lessons", action="store_true",
+            help="同时按教师姓名（唯一）回填课次的 teacher_id，使课表范围可只按 teacher_id 过滤",
+        )
+
+    def handle(self, *args, **options):
+        teachers = list(Teacher.objects.values_list("id", "name", "phone", "email"))
+        teacher_by_phone = _unique_index(teachers, 2)
+        teacher_by_email = _unique_index(teachers, 3)
+        teacher_by_name = _unique_index(teachers, 1)
+        students = list(Student.objects.filter(deleted_at__isnull=True).values_list("id", "student_id", "email", "phone"))
+        student_by_no = _unique_index(students, 1)
+        student_by_email = _unique_index(students, 2)
+        student_by_phone = _unique_index(students, 3)
+
+        profiles = {p.user_id: p for p in UserProfile.objects.all()}
+        taken_teachers = {p.teacher_id for p in profiles.values() if p.teacher_id}
+        taken_students = {p.student_id for p in profiles.values() if p.student_id}
+
+        stats = Counter()
+        to_create, to_update = [], []
+        for user in User.objects.order_by("date_joined", "id"):
+            profile = profiles.get(user.id)
+            if profile and (profile.teacher_id or profile.student_id) and not options["relink"]:
+                stats["already_linked"] += 1
+                continue
+            username = (user.username or "").strip()
+            email = (user.email or "").strip()
+            name = user_display_name(user)
+
+            teacher = (
+                teacher_by_phone.get(username) or teacher_by_email.get(email) or teacher_by_name.get(name)
+            )
+            student = None
+            if teacher is None:
+                student = student_by_no.get(username) or student_by_email.get(email) or student_by_phone.get(username)
+
+            teacher_id = teacher[0] if teacher else None
+            student_id = student[0] if student else None
+            if profile and options["relink"]:
+                taken_teachers.discard(profile.teacher_id)
+                taken_students.discard(profile.student_id)
+            if teacher_id in taken_teachers or student_id in taken_students:
+                stats["conflict"] += 1
+                self.stdout.write(f"跳过 {username}：匹配的档案已绑定其他用户")
+                continue
+            if teacher_id is None and student_id is None:
+                stats["unmatched"] += 1
+                continue
+
+            stats["teacher" if teacher_id else "student"] += 1
+            if teacher_id:
+                taken_teachers.add(teacher_id)
+            else:
+                taken_students.add(student_id)
+            if profile:
+                profile.teacher_id, profile.student_id = teacher_id, student_id
+                to_update.append(profile)
+            else:
+                to_create.append(UserProfile(user=user, teacher_id=teacher_id, student_id=student_id))
+
+        lessons_updated = 0
+        if not options["dry_run"]:
+            with transaction.atomic():
+                UserProfile.objects.bulk_create(to_create, batch_size=1000)
+                UserProfile.objects.bulk_update(to_update, ["teacher", "student", "updated_at"], batch_size=1000)
+                if options["lessons"]:
+                    terms = set()
+                    for name, row in teacher_by_name.items():
+                        lessons = Lesson.objects.filter(teacher__isnull=True, teacher_name=name)
+                        terms.update(lessons.values_list("term", flat=True).distinct())
+                        lessons_updated += lessons.update(teacher_id=row[0])
+                    # 课次教师由名称改为ID，占用索引的资源键随之变化
+                    for term in terms:
+                        rebuild_term(term)
+                    schedule_bump(*terms)
+                transaction.on_commit(bump_identity_version)
+
+        prefix = "（预演）" if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}绑定教师 {stats['teacher']}，绑定学生 {stats['student']}，"
+            f"已绑定跳过 {stats['already_linked']}，冲突 {stats['conflict']}，未匹配 {stats['unmatched']}"
+            + (f"；回填课次 teacher_id {lessons_updated} 条" if options["lessons"] else "")
+        ))
@@ -0,0 +1,33 @@
+from django.db import models
+
+from apps.common.models import BaseModel
+
+
+class UserProfile(BaseModel):
+    """登录账号与教师/学生档案的一对一绑定（课表等按档案ID确定可见范围）。"""
+
+    user = models.OneToOneField("auth.User", on_delete=models.CASCADE, related_name="profile", verbose_name="用户")
+    teacher = models.OneToOneField(
+        "teachers.Teacher",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="user_profile",
+        verbose_name="教师档案",
+    )
+    student = models.OneToOneField(
+        "students.Student",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="user_profile",
+        verbose_name="学生档案",
+    )
+
+    class Meta:
+        db_table = "user_profiles"
+        verbose_name = "用户档案绑定"
+        verbose_name_plural = "用户档案绑定"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.user_id} -> {self.teacher_id or self.student_id}"
@@ -5,6 +5,8 @@ from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
+from apps.common.pagination import KeysetPagination
+
 from .serializers import UserListSerializer, UserDetailSerializer
 
 
@@ -18,6 +20,8 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ["username", "first_name", "last_name", "email"]
     ordering = ["-date_joined"]
     permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = KeysetPagination
+    cursor_fields = ("date_joined", "id")
 
     def get_serializer_class(self):
         if self.action == "list":
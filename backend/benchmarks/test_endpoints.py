@@ -0,0 +1,96 @@
+"""热点接口压测（pytest-benchmark），数据为会话级的合成学校（见 conftest.school）。
+
+    pytest benchmarks --benchmark-json=benchmark-$(git rev-parse --short HEAD).json
+    pytest benchmarks --benchmark-compare=<之前保存的结果> --school grades=12
+
+每个接口先请求一次（预热，并记录 SQL 条数到 extra_info.queries），再由 benchmark 计时；
+学生导入按已有学生生成 CSV，走更新路径。
+"""
+
+import csv
+import io
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.grades.models import Exam
+from apps.students.models import Student
+
+
+pytestmark = pytest.mark.django_db
+
+IMPORT_ROWS = 2000
+
+
+@pytest.fixture
+def exam_id(school) -> str:
+    return str(Exam.objects.filter(term=school.term).order_by("-created_at").values_list("id", flat=True).first())
+
+
+@pytest.fixture
+def student_csv(school) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["学号", "姓名", "性别", "班级", "班级编码", "状态"])
+    students = (
+        Student.objects.filter(deleted_at__isnull=True)
+        .select_related("current_class")
+        .order_by("-created_at")[:IMPORT_ROWS]
+    )
+    for st in students:
+        writer.writerow([st.student_id, st.name, st.gender, st.current_class.name, st.current_class.code, st.status])
+    return out.getvalue().encode("utf-8")
+
+
+def _consume(response) -> bytes:
+    # 流式响应（导出）需读完内容才算完成
+    body = b"".join(response.streaming_content) if response.streaming else response.content
+    assert response.status_code == 200, body[:500]
+    return body
+
+
+def _run(benchmark, request) -> None:
+    with CaptureQueriesContext(connection) as ctx:
+        body = _consume(request())
+    benchmark.extra_info["queries"] = len(ctx.captured_queries)
+    benchmark.extra_info["bytes"] = len(body)
+    benchmark(lambda: _consume(request()))
+
+
+def test_students_list(benchmark, teacher_client):
+    _run(benchmark, lambda: teacher_client.get("/api/v1/students/?page_size=50"))
+
+
+def test_students_export(benchmark, teacher_client):
+    _run(benchmark, lambda: teacher_client.get("/api/v1/students/export/"))
+
+
+def test_students_import(benchmark, teacher_client, student_csv):
+    def request():
+        upload = io.BytesIO(student_csv)
+        upload.name = "students.csv"
+        # 同步导入，计时包含导入本身
+        return teacher_client.post("/api/v1/students/import/", {"file": upload, "async": "false"}, format="multipart")
+
+    _run(benchmark, request)
+
+
+def test_scores_summary(benchmark, teacher_client, exam_id):
+    _run(benchmark, lambda: teacher_client.get(f"/api/v1/scores/summary/?exam={exam_id}"))
+
+
+def test_scores_analytics(benchmark, teacher_client, exam_id):
+    _run(benchmark, lambda: teacher_client.get(f"/api/v1/scores/analytics/?exam={exam_id}"))
+
+
+def test_timetable_school(benchmark, teacher_client, school):
+    _run(benchmark, lambda: teacher_client.get(f"/api/v1/timetable/school/?term={school.term}"))
+
+
+def test_timetable_me(benchmark, teacher_client, school):
+    _run(benchmark, lambda: teacher_client.get(f"/api/v1/timetable/me/?term={school.term}"))
+
+
+def test_classes_list(benchmark, teacher_client):
+    _run(benchmark, lambda: teacher_client.get("/api/v1/classes/?page_size=50"))
@@ -53,10 +53,12 @@ INSTALLED_APPS = [
     "apps.changes",
     "apps.users",
     "apps.grades",
+    "apps.imports",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.common.metrics.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -137,6 +139,50 @@ SIMPLE_JWT = {
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Celery（开发/测试环境默认在当前进程同步执行任务，无需启动 worker；生产配置见 settings_prod）
+CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# 导入任务的上传文件（含学号、手机号、身份证号、成绩）：存放在 MEDIA_ROOT 之外、不对外提供访问，任务结束即删除
+IMPORT_FILES_ROOT = BASE_DIR / "private" / "imports"
+# 导入任务执行超过该秒数仍未结束（执行进程已退出等）时视为失败
+IMPORT_JOB_TIMEOUT = 30 * 60
+
+# 成绩统计（summary/analytics）缓存，按考试数据版本失效
+GRADES_CACHE_ENABLED = True
+GRADES_CACHE_TIMEOUT = 24 * 3600
+
+# 首页仪表盘统计缓存（秒）
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# “我的课表”用户身份（匹配到的教师/学生班级）缓存秒数，教师/学生/用户变更时自动作废
+TIMETABLE_IDENTITY_TIMEOUT = 600
+
+# 课表接口快照（按学期版本号失效，响应带 ETag，If-None-Match 命中返回 304）
+TIMETABLE_SNAPSHOT_ENABLED = True
+TIMETABLE_SNAPSHOT_TIMEOUT = 24 * 3600
+
+# 课表 .ics 导出：各学期第 1 周周一（如 {"2024-2025-1": "2024-09-02"}，请求可用 start 参数覆盖）与教学周数
+TIMETABLE_TERM_STARTS = {}
+TIMETABLE_TERM_WEEKS = 20
+
+# 大表分页总数：计数缓存秒数；无筛选时行数达到该值改用 MySQL 表统计估算
+PAGINATION_COUNT_TIMEOUT = 30
+PAGINATION_ESTIMATE_MIN_ROWS = 50000
+
+# 接口性能埋点（SQL 条数/耗时、序列化耗时、响应大小），默认关闭；
+# 预算按 URL 名称配置，整数表示 SQL 条数上限，超出记警告，STRICT 时抛异常（用于测试）
+REQUEST_METRICS_ENABLED = False
+REQUEST_METRICS_STRICT = False
+REQUEST_METRICS_WINDOW = 200
+REQUEST_METRICS_BUDGETS = {
+    "student-list": 5,
+    "class-list": 5,
+    "course-list": 5,
+    "teacher-list": 5,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -45,6 +45,10 @@ CACHES = {
     }
 }
 
+GRADES_CACHE_ENABLED = os.environ.get('GRADES_CACHE_ENABLED', 'True') == 'True'
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '60'))
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'False') == 'True'
+
 # Session 配置
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -76,6 +80,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 导入任务上传文件（私有目录，backend 与 worker 共享，nginx 不提供访问）
+IMPORT_FILES_ROOT = os.environ.get('IMPORT_FILES_ROOT', os.path.join(BASE_DIR, 'private', 'imports'))
+
 # 日志配置
 LOGGING = {
     'version': 1,
@@ -136,6 +143,8 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+CELERY_TASK_EAGER_PROPAGATES = False
 
 # Sentry 监控（如果使用）
 SENTRY_DSN = os.environ.get('SENTRY_DSN', '')
@@ -0,0 +1,80 @@
+"""pytest 公共夹具。
+
+整个测试会话共用一所由 generate_school 生成的合成学校（与 generate_school 命令同一代码路径），
+只在首次用到 school 夹具时生成，写入测试库后各测试在自己的事务中运行、互不影响。
+规格默认同 SchoolSpec，可用 --school 覆盖，如 --school grades=12,students_per_class=50。
+"""
+
+import dataclasses
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from apps.common.synthetic import SchoolSpec, generate_school
+from apps.timetable.models import Lesson
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--school",
+        default="",
+        help="合成学校规格：逗号分隔的 字段=值（字段见 apps.common.synthetic.SchoolSpec）",
+    )
+
+
+def school_spec(raw: str) -> SchoolSpec:
+    defaults = SchoolSpec()
+    values = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip().replace("-", "_")
+        if not hasattr(defaults, name):
+            raise pytest.UsageError(f"--school 中未知的字段：{name}")
+        values[name] = type(getattr(defaults, name))(value.strip())
+    return dataclasses.replace(defaults, **values)
+
+
+@pytest.fixture(scope="session")
+def school(request, django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return generate_school(school_spec(request.config.getoption("school")))
+
+
+@pytest.fixture(scope="session")
+def school_teacher(school, django_db_blocker):
+    """一名有课的任课教师（教师、班级、教室均已关联）。"""
+    with django_db_blocker.unblock():
+        lesson = (
+            Lesson.objects.filter(term=school.term, teacher__isnull=False, class_ref__isnull=False, room__isnull=False)
+            .select_related("teacher")
+            .first()
+        )
+    assert lesson is not None, "合成学校中没有关联教师/班级/教室的课次"
+    return lesson.teacher
+
+
+@pytest.fixture(scope="session")
+def teacher_user(school_teacher, django_db_blocker):
+    # 课表接口按用户显示名匹配教师：账号与任课教师同名，并有管理员权限访问其他接口
+    with django_db_blocker.unblock():
+        user, _ = User.objects.get_or_create(
+            username=f"bench-{school_teacher.teacher_id}",
+            defaults={"first_name": school_teacher.name, "is_staff": True, "is_superuser": True},
+        )
+    return user
+
+
+@pytest.fixture
+def teacher_client(teacher_user) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(teacher_user)
+    return client
+
+
+@pytest.fixture
+def admin_api_client(db) -> APIClient:
+    user = User.objects.create_superuser("pytest-admin", "admin@example.com", "pytest")
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
@@ -1,6 +1,7 @@
 import { useState } from "react"
 import { X, Download } from "lucide-react"
 import { Button } from "@/components/ui/button"
+import { resolveImport } from "@/services/importJobService"
 
 interface ClassImportModalProps {
   isOpen: boolean
@@ -23,7 +24,10 @@ export function ClassImportModal({ isOpen, onClose, onImported }: ClassImportMod
     form.append("file", file)
     try {
       setSubmitting(true)
-      await fetch("/api/v1/classes/import/", { method: "POST", body: form })
+      const res = await fetch("/api/v1/classes/import/", { method: "POST", body: form })
+      const body = await res.json().catch(() => null)
+      if (!res.ok) throw new Error(body?.error?.message)
+      await resolveImport(body)
       onImported()
       onClose()
     } catch (e) {
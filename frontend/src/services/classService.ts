@@ -45,6 +45,7 @@ export const classService = {
         pageSize: pagination.page_size ?? pageSize,
         total: pagination.total_count ?? 0,
         totalPages: pagination.total_pages ?? 0,
+        totalIsEstimate: Boolean(pagination.count_is_estimate),
       },
     }
   },
@@ -1,5 +1,6 @@
 import axios from "axios"
 import type { ExamDetail, ExamListItem, PaginatedExams, PaginatedScores, ScoreAnalyticsRow, ScoreDetail, ScoreListItem, ScoreSummaryRow } from "@/types/grade"
+import { resolveImport } from "./importJobService"
 
 function mapExam(dto: any): ExamListItem {
   return {
@@ -110,6 +111,7 @@ export const gradeService = {
         pageSize: pagination.page_size ?? pageSize,
         total: pagination.total_count ?? 0,
         totalPages: pagination.total_pages ?? 0,
+        totalIsEstimate: Boolean(pagination.count_is_estimate),
       },
     }
   },
@@ -157,7 +159,7 @@ export const gradeService = {
     form.append("mode", mode)
     if (classId) form.append("class_id", classId)
     const { data } = await axios.post("/api/v1/scores/import/", form, { headers: { "Content-Type": "multipart/form-data" } })
-    return data?.data ?? data
+    return resolveImport(data)
   },
 
   async downloadScoreTemplate() {
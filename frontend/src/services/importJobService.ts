@@ -0,0 +1,51 @@
+import axios from "axios"
+
+export interface ImportJob {
+  id: string
+  kind: string
+  status: "pending" | "running" | "succeeded" | "failed"
+  rows_total: number | null
+  rows_processed: number
+  error_count: number
+  errors: Array<{ row?: number | null; message?: string }>
+  result: Record<string, any>
+  message: string
+}
+
+const POLL_INTERVAL_MS = 1000
+// 最长等待时间：任务一直排队（worker 未启动）或执行进程退出时不再无限轮询
+const MAX_WAIT_MS = 10 * 60 * 1000
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+// 导入接口默认异步：返回 { job_id } 时轮询 /import-jobs/<id>/ 直到结束，
+// 成功返回任务结果（有错误行时附带 errors），失败或等待超时时抛出与同步接口相同结构的错误（err.response.data.error）
+export async function resolveImport<T = any>(body: any, onProgress?: (job: ImportJob) => void): Promise<T> {
+  const payload = body?.data ?? body
+  const jobId = payload?.job_id
+  if (!jobId) return payload as T
+
+  const fail = (message: string, details: ImportJob["errors"] = []): never => {
+    throw Object.assign(new Error(message), {
+      response: { data: { success: false, error: { code: "IMPORT_FAILED", message, details } } },
+    })
+  }
+
+  const deadline = Date.now() + MAX_WAIT_MS
+  for (;;) {
+    const { data } = await axios.get(`/api/v1/import-jobs/${jobId}/`)
+    const job: ImportJob = data?.data ?? data
+    onProgress?.(job)
+    if (job.status === "succeeded") {
+      const errors = job.errors || []
+      return (errors.length ? { ...job.result, errors } : job.result) as T
+    }
+    if (job.status === "failed") {
+      fail(job.message || "导入失败", job.errors || [])
+    }
+    if (Date.now() >= deadline) {
+      fail("导入超时：任务仍未完成，请稍后在导入记录中查看结果")
+    }
+    await sleep(POLL_INTERVAL_MS)
+  }
+}
@@ -1,5 +1,6 @@
 import axios from "axios"
-import type { StudentDetailView, StudentQueryParams, PaginatedStudents } from "@/types/student"
+import type { StudentDetailView, StudentQueryParams, PaginatedStudents, CursorStudents } from "@/types/student"
+import { resolveImport } from "./importJobService"
 
 function mapDtoToStudent(dto: any): StudentDetailView {
   return {
@@ -45,6 +46,34 @@ export const studentService = {
         pageSize: pagination.page_size ?? pageSize,
         total: pagination.total_count ?? 0,
         totalPages: pagination.total_pages ?? 0,
+        totalIsEstimate: Boolean(pagination.count_is_estimate),
+      },
+    }
+  },
+
+  // 游标分页：cursor 为空取第一页，之后传入上次返回的 nextCursor；仅支持按创建时间排序
+  async getStudentsByCursor(params: Omit<StudentQueryParams, "page"> & { cursor?: string | null } = {}): Promise<CursorStudents> {
+    const { cursor, pageSize = 50, search = "", grade = "", className = "", status, ordering, includeTransferred } = params
+    const { data } = await axios.get("/api/v1/students/", {
+      params: {
+        cursor: cursor ?? "",
+        page_size: pageSize,
+        search: search || undefined,
+        grade: grade || undefined,
+        className: className || undefined,
+        status: status || undefined,
+        ordering: ordering === "created_at" ? ordering : undefined,
+        include_transferred: includeTransferred || undefined,
+      },
+    })
+    const payload = data?.data ?? data
+    const pagination = payload?.pagination ?? {}
+    return {
+      students: (payload?.results ?? []).map(mapDtoToStudent),
+      pagination: {
+        pageSize: pagination.page_size ?? pageSize,
+        nextCursor: pagination.next_cursor ?? null,
+        hasMore: Boolean(pagination.has_more),
       },
     }
   },
@@ -104,7 +133,7 @@ export const studentService = {
     const { data } = await axios.post("/api/v1/students/import/", form, {
       headers: { "Content-Type": "multipart/form-data" },
     })
-    return data?.data ?? data
+    return resolveImport(data)
   },
 
   async exportStudents(params: { search?: string; grade?: string; className?: string; status?: string; includeTransferred?: boolean }) {
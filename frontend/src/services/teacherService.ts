@@ -1,5 +1,6 @@
 import axios from 'axios'
 import type { TeacherItem, TeacherQueryParams, PaginatedTeachers, TeacherCreateInput, TeacherUpdateInput, TeacherAssignmentItem } from '@/types/teacher'
+import { resolveImport } from './importJobService'
 
 function mapDtoToTeacherItem(dto: any): TeacherItem {
   return {
@@ -119,7 +120,7 @@ export const teacherService = {
     const form = new FormData()
     form.append('file', file)
     const { data } = await axios.post('/api/v1/teachers/import/', form)
-    return (data?.data ?? data) as { created: number; updated: number }
+    return resolveImport<{ created: number; updated: number }>(data)
   },
 
   async exportTeachers(params: TeacherQueryParams = {}): Promise<Blob> {
@@ -1,5 +1,6 @@
 import { api } from '@/lib/api'
 import type { TimetableQuery, TimetableResponse, LessonItem } from '@/types/timetable'
+import { resolveImport } from './importJobService'
 
 function normalizeLessons(payload: any): LessonItem[] {
   const list = payload?.lessons ?? payload ?? []
@@ -132,16 +133,42 @@ export const timetableService = {
     return res?.data ?? res
   },
 
-  // 导入课表
-  async importTimetable(file: File, params: { term: string; mode: 'append' | 'overwrite' }) {
+  // 日历订阅地址（.ics，带签名令牌，可添加到手机/Outlook 日历）；start 为第 1 周周一（YYYY-MM-DD）
+  async getCalendarFeedUrl(params: {
+    term: string
+    start: string
+    weeks?: number
+    scope?: 'me' | 'class' | 'teacher' | 'room'
+    id?: string
+  }): Promise<string> {
+    const res = await api.get('/timetable/ics/subscribe/', { params })
+    return (res?.data ?? res)?.url
+  },
+
+  // 批量创建/修改/删除课次（拖拽调整），整批在一个事务内生效；冲突时返回 409，force=true 强制保存
+  async batchLessons(
+    operations: Array<
+      | { op: 'create'; data: Partial<LessonItem> & { term: string; dayOfWeek: number; courseName: string } }
+      | { op: 'update'; id: string; data: Partial<LessonItem> }
+      | { op: 'delete'; id: string }
+    >,
+    options: { force?: boolean } = {},
+  ) {
+    const res = await api.post('/timetable/lessons/batch/', { operations, force: options.force || undefined })
+    return res?.data ?? res
+  },
+
+  // 导入课表（Excel 默认只解析活动工作表，allSheets=true 时解析全部工作表）
+  async importTimetable(file: File, params: { term: string; mode: 'append' | 'overwrite'; allSheets?: boolean }) {
     const formData = new FormData()
     formData.append('file', file)
     formData.append('term', params.term)
     formData.append('mode', params.mode)
+    if (params.allSheets) formData.append('all_sheets', 'true')
     const res = await api.post('/timetable/import/', formData, {
       headers: { 'Content-Type': 'multipart/form-data' }
     })
-    return res?.data ?? res
+    return resolveImport(res)
   }
 }
 
@@ -35,6 +35,8 @@ export interface PaginatedClasses {
     pageSize: number
     total: number
     totalPages: number
+    // 为 true 时 total 为估算值（大表无筛选时使用数据库统计信息）
+    totalIsEstimate?: boolean
   }
 }
 
@@ -50,7 +50,8 @@ export interface PaginatedExams {
 
 export interface PaginatedScores {
   scores: ScoreListItem[]
-  pagination: { page: number; pageSize: number; total: number; totalPages: number }
+  // totalIsEstimate 为 true 时 total 为估算值
+  pagination: { page: number; pageSize: number; total: number; totalPages: number; totalIsEstimate?: boolean }
 }
 
 export interface ScoreSummaryRow {
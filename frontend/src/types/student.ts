@@ -57,5 +57,17 @@ export interface PaginatedStudents {
     pageSize: number
     total: number
     totalPages: number
+    // 为 true 时 total 为估算值（大表无筛选时使用数据库统计信息）
+    totalIsEstimate?: boolean
+  }
+}
+
+// 游标分页响应（虚拟滚动按 nextCursor 连续加载，不返回总数）
+export interface CursorStudents {
+  students: StudentDetailView[]
+  pagination: {
+    pageSize: number
+    nextCursor: string | null
+    hasMore: boolean
   }
 }